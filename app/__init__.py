@@ -17,6 +17,14 @@ from app.db import close_db
 from app.db import ensure_initial_users
 from app.db import init_app as init_db_app
 from app.db import init_db as init_schema
+from app.services.outbox import init_app as init_outbox_app
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() not in {"0", "false", "no", "off"}
 
 
 def create_app(test_config: dict | None = None) -> Flask:
@@ -25,6 +33,8 @@ def create_app(test_config: dict | None = None) -> Flask:
     app.config.from_mapping(
         SECRET_KEY=os.environ.get("SECRET_KEY", "dev-secret-key"),
         DATABASE=str(Path(app.instance_path) / "app.sqlite3"),
+        # Set BOOTSTRAP_ON_STARTUP=0 for web workers once "flask init-db" / "flask db-migrate" is part of the deploy.
+        BOOTSTRAP_ON_STARTUP=_env_flag("BOOTSTRAP_ON_STARTUP", True),
     )
 
     if test_config is not None:
@@ -33,11 +43,13 @@ def create_app(test_config: dict | None = None) -> Flask:
     Path(app.instance_path).mkdir(parents=True, exist_ok=True)
 
     init_db_app(app)
+    init_outbox_app(app)
     app.teardown_appcontext(close_db)
 
-    with app.app_context():
-        init_schema()
-        ensure_initial_users()
+    if app.config["BOOTSTRAP_ON_STARTUP"]:
+        with app.app_context():
+            init_schema()
+            ensure_initial_users()
 
     app.register_blueprint(auth.bp)
     app.register_blueprint(tickets.bp)
@@ -8,9 +8,11 @@ from flask import render_template
 from flask import request
 from flask import url_for
 
+from app.cache import clear_caches
 from app.db import get_db
 from app.roles import roles_required
 from app.security import hash_password
+from app.services.user_cache import invalidate_user
 from app.utils import ROLE_LABELS
 
 bp = Blueprint("admin", __name__, url_prefix="/admin")
@@ -58,6 +60,7 @@ def users_new():
                 (username, hash_password(password), full_name, role),
             )
             db.commit()
+            clear_caches("specialists", "ticket_aggregates", "notification_recipients")
         except Exception:
             db.rollback()
             flash("Не удалось создать пользователя. Возможно, логин уже занят.", "error")
@@ -104,6 +107,8 @@ def users_edit(user_id: int):
                     return render_template("admin/users_edit.html", user=user, role_labels=ROLE_LABELS)
                 db.execute("UPDATE users SET password_hash = ? WHERE id = ?", (hash_password(password), user_id))
             db.commit()
+            clear_caches("specialists", "ticket_aggregates", "notification_recipients")
+            invalidate_user(user_id)
         except Exception:
             db.rollback()
             flash("Не удалось сохранить пользователя.", "error")
@@ -130,6 +135,8 @@ def users_delete(user_id: int):
     try:
         db.execute("DELETE FROM users WHERE id = ?", (user_id,))
         db.commit()
+        clear_caches("specialists", "ticket_aggregates", "notification_recipients")
+        invalidate_user(user_id)
     except Exception:
         db.rollback()
         flash("Не удалось удалить пользователя. Возможно, он используется в заявках.", "error")
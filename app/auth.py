@@ -17,6 +17,7 @@ from flask import url_for
 
 from app.db import get_db
 from app.security import verify_password
+from app.services.user_cache import load_session_user
 
 bp = Blueprint("auth", __name__)
 
@@ -31,11 +32,7 @@ def load_logged_in_user() -> None:
         g.unread_notifications = 0
         return
 
-    db = get_db()
-    user = db.execute(
-        "SELECT id, username, full_name, role, is_active FROM users WHERE id = ?",
-        (user_id,),
-    ).fetchone()
+    user = load_session_user(get_db, int(user_id))
     if user is None:
         session.clear()
         g.user = None
@@ -49,12 +46,8 @@ def load_logged_in_user() -> None:
         flash("Пользователь заблокирован. Обратитесь к администратору.", "error")
         return
 
+    g.unread_notifications = int(user.pop("unread_notifications"))
     g.user = user
-    unread = db.execute(
-        "SELECT COUNT(*) AS cnt FROM notifications WHERE user_id = ? AND is_read = 0",
-        (user["id"],),
-    ).fetchone()
-    g.unread_notifications = int(unread["cnt"]) if unread is not None else 0
 
 
 def login_required(view: F) -> F:
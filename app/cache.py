@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+from typing import Callable
+from typing import Hashable
+
+from flask import current_app
+
+_MISSING = object()
+
+
+class TTLCache:
+    def __init__(self, *, maxsize: int = 1024, ttl: float | None = None) -> None:
+        if maxsize <= 0:
+            raise ValueError("maxsize must be > 0")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._data: OrderedDict[Hashable, tuple[float | None, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_set(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = factory()
+            self.set(key, value)
+        return value
+
+    def update(self, key: Hashable, func: Callable[[Any], Any]) -> None:
+        # Rewrites a live entry in place without extending its lifetime.
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                return
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return
+            self._data[key] = (expires_at, func(value))
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+
+def app_cache(name: str, *, maxsize: int = 1024, ttl: float | None = None) -> TTLCache:
+    caches: dict[str, TTLCache] = current_app.extensions.setdefault("caches", {})
+    cache = caches.get(name)
+    if cache is None:
+        cache = caches.setdefault(name, TTLCache(maxsize=maxsize, ttl=ttl))
+    return cache
+
+
+def clear_caches(*names: str) -> None:
+    caches: dict[str, TTLCache] = current_app.extensions.get("caches", {})
+    for name in names:
+        cache = caches.get(name)
+        if cache is not None:
+            cache.clear()
+
+
+def evict(name: str, key: Hashable) -> None:
+    caches: dict[str, TTLCache] = current_app.extensions.get("caches", {})
+    cache = caches.get(name)
+    if cache is not None:
+        cache.pop(key)
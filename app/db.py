@@ -1,27 +1,68 @@
 from __future__ import annotations
 
 import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from datetime import timedelta
 from pathlib import Path
 from typing import Any
+from typing import Callable
+from typing import Iterator
+from typing import TypeVar
 
 import click
 from flask import Flask
 from flask import current_app
 from flask import g
 
-from app.seed_data import seed_app_db
+from app.migrations import LATEST_VERSION
+from app.migrations import Migration
+from app.migrations import migrate
+from app.migrations import pending_migrations
+from app.migrations import schema_version
+from app.pool import ConnectionPool
+from app.pool import PoolStats
 from app.security import hash_password
+from app.services.dashboard import reconcile_dashboard
+from app.services.notifications import archive_read_notifications
+from app.services.statistics import backfill_fault_categories
+
+T = TypeVar("T")
+
+DB_PROFILES: dict[str, dict[str, Any]] = {
+    # Rollback journal and full fsync: the behaviour of a plain sqlite3.connect().
+    "compat": {
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+        "busy_timeout": 5000,
+    },
+    # WAL lets readers proceed while a writer commits; NORMAL is durable across app crashes.
+    "balanced": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -16000,
+        "mmap_size": 64 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+    },
+    # For throwaway/load-test databases: an OS crash may lose the last transactions.
+    "fast": {
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "cache_size": -64000,
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "busy_timeout": 10000,
+    },
+}
+
+PRAGMA_ORDER = ("busy_timeout", "journal_mode", "synchronous", "cache_size", "mmap_size", "temp_store")
 
 
 def get_db() -> sqlite3.Connection:
     if "db" not in g:
-        db_path = Path(current_app.config["DATABASE"])
-        db_path.parent.mkdir(parents=True, exist_ok=True)
-
-        connection = sqlite3.connect(db_path, detect_types=sqlite3.PARSE_DECLTYPES)
-        connection.row_factory = sqlite3.Row
-        connection.execute("PRAGMA foreign_keys = ON")
-        g.db = connection
+        g.db = _get_pool().acquire()
 
     return g.db
 
@@ -29,15 +70,101 @@ def get_db() -> sqlite3.Connection:
 def close_db(_: Exception | None = None) -> None:
     connection = g.pop("db", None)
     if connection is not None:
-        connection.close()
+        _get_pool().release(connection)
 
 
-def init_db() -> None:
-    db = get_db()
-    schema_path = Path(current_app.root_path) / "schema.sql"
-    db.executescript(schema_path.read_text(encoding="utf-8"))
-    _migrate_schema(db)
-    db.commit()
+def get_pool_stats() -> PoolStats:
+    return _get_pool().stats()
+
+
+def dispose_pool() -> None:
+    pool = current_app.extensions.pop("db_pool", None)
+    if pool is not None:
+        pool.close()
+
+
+def resolve_pragmas(profile: str, overrides: dict[str, Any] | None = None) -> dict[str, Any]:
+    if profile not in DB_PROFILES:
+        raise ValueError(f"Unknown DB_PROFILE {profile!r}; expected one of: {', '.join(DB_PROFILES)}")
+    pragmas = dict(DB_PROFILES[profile])
+    if overrides:
+        pragmas.update(overrides)
+    return pragmas
+
+
+def apply_pragmas(connection: sqlite3.Connection, pragmas: dict[str, Any]) -> None:
+    ordered = [name for name in PRAGMA_ORDER if name in pragmas]
+    ordered += [name for name in pragmas if name not in PRAGMA_ORDER]
+    for name in ordered:
+        if not name.replace("_", "").isalnum():
+            raise ValueError(f"Invalid PRAGMA name: {name!r}")
+        value = pragmas[name]
+        if not str(value).lstrip("-").replace("_", "").isalnum():
+            raise ValueError(f"Invalid PRAGMA value for {name}: {value!r}")
+        connection.execute(f"PRAGMA {name} = {value}").fetchall()
+
+
+@contextmanager
+def relaxed_durability(connection: sqlite3.Connection) -> Iterator[None]:
+    # For bulk loads only: the "fast" profile's durability and cache settings, restored afterwards.
+    names = ("synchronous", "cache_size", "temp_store")
+    saved = {name: connection.execute(f"PRAGMA {name}").fetchone()[0] for name in names}
+    apply_pragmas(connection, {name: DB_PROFILES["fast"][name] for name in names})
+    try:
+        yield
+    finally:
+        apply_pragmas(connection, saved)
+
+
+def is_busy_error(exc: BaseException) -> bool:
+    if not isinstance(exc, sqlite3.OperationalError):
+        return False
+    message = str(exc).lower()
+    return "locked" in message or "busy" in message
+
+
+def run_write(operation: Callable[[sqlite3.Connection], T], *, db: sqlite3.Connection | None = None) -> T:
+    if db is None:
+        db = get_db()
+    retries = int(current_app.config.get("DB_WRITE_RETRIES", 3))
+    backoff = float(current_app.config.get("DB_WRITE_RETRY_BACKOFF", 0.05))
+
+    attempt = 0
+    while True:
+        try:
+            result = operation(db)
+            db.commit()
+            return result
+        except sqlite3.OperationalError as exc:
+            db.rollback()
+            if not is_busy_error(exc) or attempt >= retries:
+                raise
+            time.sleep(backoff * (2**attempt))
+            attempt += 1
+        except Exception:
+            db.rollback()
+            raise
+
+
+def _get_pool() -> ConnectionPool:
+    pool = current_app.extensions.get("db_pool")
+    if pool is None:
+        pragmas = resolve_pragmas(
+            current_app.config.get("DB_PROFILE", "balanced"),
+            current_app.config.get("DB_PRAGMAS"),
+        )
+        pool = ConnectionPool(
+            current_app.config["DATABASE"],
+            size=int(current_app.config.get("DB_POOL_SIZE", 8)),
+            timeout=float(current_app.config.get("DB_POOL_TIMEOUT", 30.0)),
+            bootstrap=lambda connection: apply_pragmas(connection, pragmas),
+        )
+        pool = current_app.extensions.setdefault("db_pool", pool)
+    return pool
+
+
+def init_db(*, batch_size: int = 1000, report: Callable[[str], None] | None = None) -> list[Migration]:
+    return migrate(get_db(), batch_size=batch_size, report=report)
 
 
 def ensure_initial_users() -> None:
@@ -74,9 +201,17 @@ def ensure_initial_users() -> None:
         },
     ]
 
+    # One lookup for all of them; passwords are hashed only for accounts that are actually missing.
+    placeholders = ", ".join("?" for _ in users)
+    existing = {
+        row["username"]
+        for row in db.execute(
+            f"SELECT username FROM users WHERE username IN ({placeholders})",
+            [user["username"] for user in users],
+        ).fetchall()
+    }
     for user in users:
-        exists = db.execute("SELECT 1 FROM users WHERE username = ?", (user["username"],)).fetchone()
-        if exists is not None:
+        if user["username"] in existing:
             continue
         db.execute(
             "INSERT INTO users (username, password_hash, full_name, role) VALUES (?, ?, ?, ?)",
@@ -92,6 +227,28 @@ def init_db_command() -> None:
     ensure_initial_users()
     click.echo("Database initialized. Users ensured: admin/operator/specialist/manager.")
 
+@click.command("db-migrate")
+@click.option("--batch-size", type=int, default=1000, show_default=True, help="Rows per chunk in backfills and table copies")
+@click.option("--status", "show_status", is_flag=True, help="Only show the schema version and pending migrations")
+def db_migrate_command(batch_size: int, show_status: bool) -> None:
+    if batch_size <= 0:
+        raise click.BadParameter("--batch-size must be > 0")
+
+    db = get_db()
+    if show_status:
+        pending = pending_migrations(db)
+        click.echo(f"Версия схемы: {schema_version(db)} из {LATEST_VERSION}")
+        for migration in pending:
+            click.echo(f"  ожидает: [{migration.version}] {migration.name}")
+        return
+
+    applied = init_db(batch_size=batch_size, report=click.echo)
+    if applied:
+        click.echo(f"[OK] Применено миграций: {len(applied)}, версия схемы: {schema_version(db)}")
+    else:
+        click.echo(f"[OK] Схема актуальна (версия {schema_version(db)})")
+
+
 @click.command("reset-db")
 def reset_db_command() -> None:
     db_path = _reset_db_file()
@@ -108,6 +265,9 @@ def reset_db_command() -> None:
 @click.option("--parts-max", type=int, default=2, show_default=True)
 @click.option("--seed", type=int, default=42, show_default=True)
 @click.option("--reset", is_flag=True, help="Reset application DB before seeding")
+@click.option("--bulk", is_flag=True, help="Load with executemany in chunked transactions (large datasets)")
+@click.option("--batch-size", type=int, default=5000, show_default=True, help="Tickets per transaction in --bulk mode")
+@click.option("--workers", type=int, default=1, show_default=True, help="Generator processes in --bulk mode")
 def seed_db_command(
     tickets: int,
     operators: int,
@@ -117,6 +277,9 @@ def seed_db_command(
     parts_max: int,
     seed: int,
     reset: bool,
+    bulk: bool,
+    batch_size: int,
+    workers: int,
 ) -> None:
     click.echo("Генерация тестовых данных для app (Flask)...")
     click.echo("--------------------------------------------------")
@@ -133,6 +296,12 @@ def seed_db_command(
         raise click.BadParameter("--comments-max must be >= 0")
     if parts_max < 0:
         raise click.BadParameter("--parts-max must be >= 0")
+    if batch_size <= 0:
+        raise click.BadParameter("--batch-size must be > 0")
+    if workers <= 0:
+        raise click.BadParameter("--workers must be > 0")
+    if workers > 1 and not bulk:
+        raise click.BadParameter("--workers requires --bulk")
 
     if reset:
         db_path = _reset_db_file()
@@ -140,22 +309,37 @@ def seed_db_command(
         ensure_initial_users()
         click.echo(f"[OK] БД сброшена: {db_path}")
 
+    # Imported here: the generator and its word lists are only needed by this command.
+    from app.seed_data import seed_app_db
+    from app.seed_data import seed_app_db_bulk
+
+    options = dict(
+        seed=seed,
+        tickets_count=tickets,
+        operators_count=operators,
+        specialists_count=specialists,
+        days_back=days_back,
+        comments_max=comments_max,
+        parts_max=parts_max,
+    )
     db = get_db()
-    try:
-        result = seed_app_db(
-            db,
-            seed=seed,
-            tickets_count=tickets,
-            operators_count=operators,
-            specialists_count=specialists,
-            days_back=days_back,
-            comments_max=comments_max,
-            parts_max=parts_max,
-        )
-        db.commit()
-    except Exception:
-        db.rollback()
-        raise
+    started = time.perf_counter()
+    if bulk:
+
+        def report(done: int, total: int) -> None:
+            rate = done / max(time.perf_counter() - started, 1e-9)
+            click.echo(f"  заявки: {done}/{total} ({rate:,.0f} в секунду)")
+
+        with relaxed_durability(db):
+            result = seed_app_db_bulk(db, batch_size=batch_size, workers=workers, report=report, **options)
+    else:
+        try:
+            result = seed_app_db(db, **options)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+    elapsed = max(time.perf_counter() - started, 1e-9)
 
     click.echo(f"[OK] Пользователи: +{result.users_created}")
     click.echo(f"[OK] Заявки: {result.tickets_created}")
@@ -167,71 +351,73 @@ def seed_db_command(
     click.echo(f"[OK] Комментарии: {result.comments_created}")
     click.echo(f"[OK] Комплектующие: {result.parts_created}")
     click.echo("--------------------------------------------------")
-    click.echo("[OK] Генерация завершена!")
+    click.echo(f"[OK] Генерация завершена за {elapsed:.1f} с ({result.tickets_created / elapsed:,.0f} заявок в секунду)")
+
+
+@click.command("backfill-fault-categories")
+@click.option("--all", "recompute_all", is_flag=True, help="Recompute categories for every ticket")
+@click.option("--batch-size", type=int, default=500, show_default=True)
+def backfill_fault_categories_command(recompute_all: bool, batch_size: int) -> None:
+    if batch_size <= 0:
+        raise click.BadParameter("--batch-size must be > 0")
+
+    updated = backfill_fault_categories(get_db(), only_missing=not recompute_all, batch_size=batch_size)
+    click.echo(f"[OK] Категории неисправностей обновлены: {updated}")
+
+
+@click.command("archive-notifications")
+@click.option("--days", type=int, default=None, help="Archive read notifications older than this (NOTIFICATION_RETENTION_DAYS)")
+@click.option("--batch-size", type=int, default=1000, show_default=True)
+@click.option("--vacuum", is_flag=True, help="Rebuild the database file afterwards to return freed pages")
+def archive_notifications_command(days: int | None, batch_size: int, vacuum: bool) -> None:
+    if days is None:
+        days = int(current_app.config.get("NOTIFICATION_RETENTION_DAYS", 90))
+    if days < 0:
+        raise click.BadParameter("--days must be >= 0")
+    if batch_size <= 0:
+        raise click.BadParameter("--batch-size must be > 0")
+
+    older_than = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+    db = get_db()
+    archived = archive_read_notifications(db, older_than=older_than, batch_size=batch_size)
+    click.echo(f"[OK] Уведомления перенесены в архив: {archived}")
+    if vacuum:
+        db.execute("VACUUM")
+        click.echo("[OK] Файл БД сжат")
+
+
+@click.command("reconcile-dashboard")
+@click.option("--interval", type=float, default=0, help="Repeat every N seconds instead of running once")
+def reconcile_dashboard_command(interval: float) -> None:
+    if interval < 0:
+        raise click.BadParameter("--interval must be >= 0")
+
+    while True:
+        db = get_db()
+        drift = run_write(reconcile_dashboard, db=db)
+        total = sum(drift.values())
+        details = ", ".join(f"{table}: {count}" for table, count in drift.items())
+        click.echo(f"[OK] Сводки панели менеджера сверены, исправлено строк: {total} ({details})")
+        if not interval:
+            break
+        time.sleep(interval)
 
 
 def init_app(app: Flask) -> None:
     app.cli.add_command(init_db_command)
+    app.cli.add_command(db_migrate_command)
     app.cli.add_command(reset_db_command)
     app.cli.add_command(seed_db_command)
+    app.cli.add_command(backfill_fault_categories_command)
+    app.cli.add_command(archive_notifications_command)
+    app.cli.add_command(reconcile_dashboard_command)
 
 
 def _reset_db_file() -> Path:
     db_path = Path(current_app.config["DATABASE"])
-    connection = g.pop("db", None)
-    if connection is not None:
-        connection.close()
-    if db_path.exists():
-        db_path.unlink()
+    close_db()
+    dispose_pool()
+    for path in (db_path, Path(f"{db_path}-wal"), Path(f"{db_path}-shm")):
+        if path.exists():
+            path.unlink()
     return db_path
-
-
-def _column_exists(db: sqlite3.Connection, table: str, column: str) -> bool:
-    rows = db.execute(f"PRAGMA table_info({table})").fetchall()
-    return any(row["name"] == column for row in rows)
-
-
-def _table_create_sql(db: sqlite3.Connection, table: str) -> str | None:
-    row = db.execute(
-        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?",
-        (table,),
-    ).fetchone()
-    if row is None:
-        return None
-    return str(row["sql"] or "")
-
-
-def _rebuild_users_table_with_manager(db: sqlite3.Connection) -> None:
-    db.execute("PRAGMA foreign_keys = OFF")
-    db.execute(
-        """
-        CREATE TABLE users_new (
-          id INTEGER PRIMARY KEY AUTOINCREMENT,
-          username TEXT NOT NULL UNIQUE,
-          password_hash TEXT NOT NULL,
-          full_name TEXT NOT NULL,
-          role TEXT NOT NULL CHECK(role IN ('admin', 'operator', 'specialist', 'manager')),
-          is_active INTEGER NOT NULL DEFAULT 1,
-          created_at TEXT NOT NULL DEFAULT (datetime('now'))
-        )
-        """
-    )
-    db.execute(
-        """
-        INSERT INTO users_new (id, username, password_hash, full_name, role, is_active, created_at)
-        SELECT id, username, password_hash, full_name, role, is_active, created_at
-        FROM users
-        """
-    )
-    db.execute("DROP TABLE users")
-    db.execute("ALTER TABLE users_new RENAME TO users")
-    db.execute("PRAGMA foreign_keys = ON")
-
-
-def _migrate_schema(db: sqlite3.Connection) -> None:
-    users_sql = _table_create_sql(db, "users")
-    if users_sql and "manager" not in users_sql:
-        _rebuild_users_table_with_manager(db)
-
-    if _table_create_sql(db, "tickets") and not _column_exists(db, "tickets", "due_at"):
-        db.execute("ALTER TABLE tickets ADD COLUMN due_at TEXT")
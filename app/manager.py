@@ -1,10 +1,12 @@
 from __future__ import annotations
 
 from flask import Blueprint
-from flask import render_template
+from flask import g
 
 from app.db import get_db
 from app.roles import roles_required
+from app.services.dashboard import load_dashboard
+from app.services.page_cache import render_cached_page
 from app.utils import STATUS_LABELS
 from app.utils import format_datetime
 
@@ -14,49 +16,15 @@ bp = Blueprint("manager", __name__, url_prefix="/manager")
 @bp.route("/", methods=("GET",))
 @roles_required("admin", "manager")
 def dashboard():
-    db = get_db()
+    return render_cached_page("manager/dashboard.html", _dashboard_context, vary=(g.user["role"],))
 
-    overdue = db.execute(
-        """
-        SELECT
-          t.id,
-          t.request_number,
-          t.due_at,
-          t.status,
-          u.full_name AS specialist_name
-        FROM tickets t
-        LEFT JOIN users u ON u.id = t.assigned_specialist_id
-        WHERE t.due_at IS NOT NULL
-          AND t.status != 'completed'
-          AND t.due_at < datetime('now')
-        ORDER BY t.due_at ASC
-        LIMIT 200
-        """
-    ).fetchall()
 
-    help_requests = db.execute(
-        """
-        SELECT
-          r.id,
-          r.ticket_id,
-          r.requested_at,
-          r.message,
-          t.request_number,
-          req.full_name AS requested_by_name
-        FROM ticket_help_requests r
-        JOIN tickets t ON t.id = r.ticket_id
-        JOIN users req ON req.id = r.requested_by_user_id
-        WHERE r.status = 'open'
-        ORDER BY r.requested_at DESC
-        LIMIT 200
-        """
-    ).fetchall()
-
-    return render_template(
-        "manager/dashboard.html",
-        overdue=overdue,
-        help_requests=help_requests,
+def _dashboard_context() -> dict:
+    data = load_dashboard(get_db())
+    return dict(
+        overdue=data.overdue,
+        help_requests=data.help_requests,
+        workload=data.workload,
         status_labels=STATUS_LABELS,
         format_datetime=format_datetime,
     )
-
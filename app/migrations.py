@@ -0,0 +1,324 @@
+from __future__ import annotations
+
+import sqlite3
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+from typing import Iterable
+from typing import Iterator
+
+from app.services.dashboard import ensure_dashboard_triggers
+from app.services.dashboard import reconcile_dashboard
+from app.services.page_cache import bump_data_version
+from app.services.page_cache import ensure_data_version_triggers
+from app.services.search import ensure_search_index
+from app.services.search import search_index_available
+from app.services.statistics import backfill_fault_categories
+
+SCHEMA_PATH = Path(__file__).with_name("schema.sql")
+
+# Derived from the WHERE/ORDER BY shapes of the list, detail, dashboard and stats queries;
+# tests/test_query_plans.py fails when one of those queries falls back to a full table scan.
+INDEXES: dict[str, str] = {
+    # List filters followed by the keyset order (created_at, id).
+    "idx_tickets_status_created": "tickets(status, created_at, id)",
+    "idx_tickets_assigned_created": "tickets(assigned_specialist_id, created_at, id)",
+    # Unfinished tickets only: overdue checks and per-specialist workload.
+    "idx_tickets_open_due": "tickets(due_at) WHERE status != 'completed' AND due_at IS NOT NULL",
+    "idx_tickets_open_assigned": (
+        "tickets(assigned_specialist_id) WHERE status != 'completed' AND assigned_specialist_id IS NOT NULL"
+    ),
+    "idx_tickets_fault_category": "tickets(fault_category)",
+    "idx_tickets_completed_stats": "tickets(completed_at, created_at, fault_category) WHERE status = 'completed'",
+    # Child rows of a ticket, in the order the detail page shows them; also used by ON DELETE CASCADE.
+    "idx_ticket_specialists_specialist": "ticket_specialists(specialist_user_id, ticket_id)",
+    "idx_due_history_ticket": "ticket_due_history(ticket_id, changed_at)",
+    "idx_help_requests_ticket": "ticket_help_requests(ticket_id, requested_at)",
+    "idx_status_history_ticket": "status_history(ticket_id, changed_at)",
+    "idx_ticket_comments_ticket": "ticket_comments(ticket_id, created_at)",
+    "idx_ticket_parts_ticket": "ticket_parts(ticket_id, created_at)",
+    "idx_notifications_ticket": "notifications(ticket_id)",
+    "idx_users_role_active": "users(role, is_active)",
+}
+
+# Covered by a UNIQUE constraint or by a wider index above.
+REDUNDANT_INDEXES = ("idx_tickets_request_number", "idx_tickets_status")
+
+
+@dataclass(frozen=True)
+class MigrationContext:
+    db: sqlite3.Connection
+    batch_size: int
+    report: Callable[[str], None]
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    apply: Callable[[MigrationContext], None]
+    # Runs in one IMMEDIATE transaction; the version is re-checked inside it, so concurrent
+    # processes never apply the same step twice.
+    transactional: bool = True
+    foreign_keys_off: bool = False
+
+
+def schema_version(db: sqlite3.Connection) -> int:
+    return int(db.execute("PRAGMA user_version").fetchone()[0])
+
+
+def _set_schema_version(db: sqlite3.Connection, version: int) -> None:
+    db.execute(f"PRAGMA user_version = {int(version)}")
+
+
+def _column_exists(db: sqlite3.Connection, table: str, column: str) -> bool:
+    rows = db.execute(f"PRAGMA table_info({table})").fetchall()
+    return any(row[1] == column for row in rows)
+
+
+def _table_create_sql(db: sqlite3.Connection, table: str) -> str | None:
+    row = db.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?",
+        (table,),
+    ).fetchone()
+    if row is None:
+        return None
+    return str(row[0] or "")
+
+
+def _id_chunks(ctx: MigrationContext, table: str, label: str):
+    # Yields (low, high] id ranges of at most batch_size rows and reports progress after each one.
+    total = int(ctx.db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0])
+    done = 0
+    last_id = 0
+    while True:
+        row = ctx.db.execute(
+            f"SELECT MAX(id), COUNT(*) FROM (SELECT id FROM {table} WHERE id > ? ORDER BY id LIMIT ?)",
+            (last_id, ctx.batch_size),
+        ).fetchone()
+        if not row[1]:
+            break
+        high = int(row[0])
+        yield last_id, high
+        done += int(row[1])
+        last_id = high
+        ctx.report(f"{label}: {done}/{total}")
+
+
+def _apply_base_schema(ctx: MigrationContext) -> None:
+    # Creates whatever is missing; existing tables keep their definition and are upgraded below.
+    ctx.db.executescript(SCHEMA_PATH.read_text(encoding="utf-8"))
+
+
+def _rebuild_users_with_manager_role(ctx: MigrationContext) -> None:
+    db = ctx.db
+    users_sql = _table_create_sql(db, "users")
+    if users_sql is None or "manager" in users_sql:
+        return
+
+    db.execute(
+        """
+        CREATE TABLE users_new (
+          id INTEGER PRIMARY KEY AUTOINCREMENT,
+          username TEXT NOT NULL UNIQUE,
+          password_hash TEXT NOT NULL,
+          full_name TEXT NOT NULL,
+          role TEXT NOT NULL CHECK(role IN ('admin', 'operator', 'specialist', 'manager')),
+          is_active INTEGER NOT NULL DEFAULT 1,
+          created_at TEXT NOT NULL DEFAULT (datetime('now')),
+          unread_notifications INTEGER NOT NULL DEFAULT 0
+        )
+        """
+    )
+    columns = ", ".join(
+        row[1] for row in db.execute("PRAGMA table_info(users)").fetchall() if _column_exists(db, "users_new", row[1])
+    )
+    for low, high in _id_chunks(ctx, "users", "users"):
+        db.execute(
+            f"INSERT INTO users_new ({columns}) SELECT {columns} FROM users WHERE id > ? AND id <= ?",
+            (low, high),
+        )
+    db.execute("DROP TABLE users")
+    db.execute("ALTER TABLE users_new RENAME TO users")
+
+
+def _add_tickets_due_at(ctx: MigrationContext) -> None:
+    if not _column_exists(ctx.db, "tickets", "due_at"):
+        ctx.db.execute("ALTER TABLE tickets ADD COLUMN due_at TEXT")
+
+
+def _add_unread_counter(ctx: MigrationContext) -> None:
+    db = ctx.db
+    if not _column_exists(db, "users", "unread_notifications"):
+        db.execute("ALTER TABLE users ADD COLUMN unread_notifications INTEGER NOT NULL DEFAULT 0")
+    for low, high in _id_chunks(ctx, "users", "unread counters"):
+        db.execute(
+            """
+            UPDATE users
+            SET unread_notifications = (
+              SELECT COUNT(*) FROM notifications n WHERE n.user_id = users.id AND n.is_read = 0
+            )
+            WHERE id > ? AND id <= ?
+            """,
+            (low, high),
+        )
+    _ensure_unread_counter_triggers(db)
+
+
+def _add_data_version_triggers(ctx: MigrationContext) -> None:
+    ensure_data_version_triggers(ctx.db)
+
+
+def _add_fault_category(ctx: MigrationContext) -> None:
+    # The backfill commits per batch and only touches rows without a category, so it resumes after a crash.
+    if not _column_exists(ctx.db, "tickets", "fault_category"):
+        ctx.db.execute("ALTER TABLE tickets ADD COLUMN fault_category TEXT")
+        ctx.db.commit()
+    updated = backfill_fault_categories(ctx.db, only_missing=True, batch_size=ctx.batch_size)
+    ctx.report(f"fault categories: {updated}")
+
+
+def _build_indexes(ctx: MigrationContext) -> None:
+    db = ctx.db
+    for name in REDUNDANT_INDEXES:
+        db.execute(f"DROP INDEX IF EXISTS {name}")
+    for number, (name, definition) in enumerate(INDEXES.items(), start=1):
+        db.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {definition}")
+        ctx.report(f"indexes: {number}/{len(INDEXES)} {name}")
+    # Keeps the planner statistics current for the new indexes; a no-op when nothing changed much.
+    db.execute("PRAGMA optimize")
+
+
+def _add_search_index(ctx: MigrationContext) -> None:
+    ensure_search_index(ctx.db)
+
+
+def _add_dashboard_summaries(ctx: MigrationContext) -> None:
+    ensure_dashboard_triggers(ctx.db)
+
+
+def _add_outbox_dead_letters(ctx: MigrationContext) -> None:
+    # notification_outbox_dead is a new table only, so the base schema script creates it.
+    _apply_base_schema(ctx)
+
+
+MIGRATIONS: tuple[Migration, ...] = (
+    Migration(1, "base schema", _apply_base_schema, transactional=False),
+    Migration(2, "users: manager role", _rebuild_users_with_manager_role, foreign_keys_off=True),
+    Migration(3, "tickets: due_at", _add_tickets_due_at),
+    Migration(4, "users: unread counter", _add_unread_counter),
+    Migration(5, "data version triggers", _add_data_version_triggers),
+    Migration(6, "tickets: fault_category", _add_fault_category, transactional=False),
+    Migration(7, "indexes", _build_indexes),
+    Migration(8, "ticket search index", _add_search_index),
+    Migration(9, "manager dashboard summaries", _add_dashboard_summaries),
+    Migration(10, "notification outbox: dead letters", _add_outbox_dead_letters, transactional=False),
+)
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def pending_migrations(db: sqlite3.Connection) -> list[Migration]:
+    current = schema_version(db)
+    return [migration for migration in MIGRATIONS if migration.version > current]
+
+
+def migrate(
+    db: sqlite3.Connection,
+    *,
+    batch_size: int = 1000,
+    report: Callable[[str], None] | None = None,
+) -> list[Migration]:
+    # Up to date: a single PRAGMA read, no schema introspection.
+    if schema_version(db) >= LATEST_VERSION:
+        return []
+
+    ctx = MigrationContext(db=db, batch_size=batch_size, report=report or (lambda _message: None))
+    applied: list[Migration] = []
+    for migration in pending_migrations(db):
+        foreign_keys = int(db.execute("PRAGMA foreign_keys").fetchone()[0])
+        if migration.foreign_keys_off:
+            db.execute("PRAGMA foreign_keys = OFF")
+        try:
+            if migration.transactional:
+                db.execute("BEGIN IMMEDIATE")
+                if schema_version(db) >= migration.version:
+                    db.rollback()
+                    continue
+            ctx.report(f"[{migration.version}] {migration.name}")
+            migration.apply(ctx)
+            _set_schema_version(db, migration.version)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            if migration.foreign_keys_off:
+                db.execute(f"PRAGMA foreign_keys = {foreign_keys}")
+        applied.append(migration)
+    return applied
+
+
+@contextmanager
+def deferred_maintenance(db: sqlite3.Connection, tables: Iterable[str]) -> Iterator[None]:
+    # Bulk loads: drops the triggers and secondary indexes on `tables`, then recreates them from their
+    # saved SQL and rebuilds what the triggers maintain (search index, dashboard summaries, data version).
+    # A process killed inside the block leaves them missing; reseed with --reset in that case.
+    names = list(tables)
+    placeholders = ", ".join("?" for _ in names)
+    objects = db.execute(
+        f"""
+        SELECT type, name, sql FROM sqlite_master
+        WHERE type IN ('trigger', 'index') AND sql IS NOT NULL AND tbl_name IN ({placeholders})
+        ORDER BY type DESC, name
+        """,
+        names,
+    ).fetchall()
+    for kind, name, _sql in objects:
+        db.execute(f"DROP {kind.upper()} IF EXISTS {name}")
+    db.commit()
+    try:
+        yield
+    finally:
+        db.rollback()
+        for _kind, _name, sql in objects:
+            db.execute(sql)
+        if search_index_available(db):
+            db.execute("INSERT INTO tickets_fts (tickets_fts) VALUES ('rebuild')")
+        reconcile_dashboard(db)
+        bump_data_version(db)
+        db.commit()
+
+
+def _ensure_unread_counter_triggers(db: sqlite3.Connection) -> None:
+    db.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS notifications_unread_ai AFTER INSERT ON notifications
+        WHEN new.is_read = 0
+        BEGIN
+          UPDATE users SET unread_notifications = unread_notifications + 1 WHERE id = new.user_id;
+        END
+        """
+    )
+    db.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS notifications_unread_au AFTER UPDATE OF is_read, user_id ON notifications
+        WHEN old.is_read != new.is_read OR old.user_id != new.user_id
+        BEGIN
+          UPDATE users SET unread_notifications = unread_notifications - 1
+          WHERE id = old.user_id AND old.is_read = 0;
+          UPDATE users SET unread_notifications = unread_notifications + 1
+          WHERE id = new.user_id AND new.is_read = 0;
+        END
+        """
+    )
+    db.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS notifications_unread_ad AFTER DELETE ON notifications
+        WHEN old.is_read = 0
+        BEGIN
+          UPDATE users SET unread_notifications = unread_notifications - 1 WHERE id = old.user_id;
+        END
+        """
+    )
@@ -1,35 +1,149 @@
 from __future__ import annotations
 
+import json
+import sqlite3
+import time
+from typing import Iterator
+
 from flask import Blueprint
+from flask import Response
+from flask import current_app
 from flask import flash
 from flask import g
+from flask import jsonify
 from flask import redirect
 from flask import render_template
+from flask import request
 from flask import url_for
 
 from app.auth import login_required
+from app.db import close_db
 from app.db import get_db
+from app.pagination import build_page
+from app.pagination import decode_cursor
+from app.pagination import keyset_condition
+from app.pagination import keyset_order
+from app.services.notification_events import BrokerFull
+from app.services.notification_events import get_broker
+from app.services.notification_events import publish_user_events
+from app.services.user_cache import adjust_unread
+from app.services.user_cache import reset_unread
 from app.utils import format_datetime
 
 bp = Blueprint("notifications", __name__)
 
+LIVE_BATCH_LIMIT = 20
+
+
+def _notifications_page_size() -> int:
+    default = int(current_app.config.get("NOTIFICATIONS_PAGE_SIZE", 50))
+    max_size = int(current_app.config.get("NOTIFICATIONS_MAX_PAGE_SIZE", 200))
+    try:
+        requested = int(request.args.get("per_page", default))
+    except ValueError:
+        requested = default
+    return max(1, min(requested, max_size))
+
 
 @bp.route("/notifications", methods=("GET",))
 @login_required
 def list_notifications():
     db = get_db()
+    key_columns = ["n.created_at", "n.id"]
+    page_size = _notifications_page_size()
+    after = decode_cursor(request.args.get("after"), size=len(key_columns))
+    before = decode_cursor(request.args.get("before"), size=len(key_columns)) if after is None else None
+    cursor = after or before
+    backward = before is not None
+
+    clauses = ["n.user_id = ?"]
+    params: list = [int(g.user["id"])]
+    if cursor is not None:
+        clauses.append(keyset_condition(key_columns, descending=True, backward=backward))
+        params.extend(cursor)
+
+    # Served by idx_notifications_user_created: a seek to the cursor instead of sorting the whole history.
     rows = db.execute(
-        """
+        f"""
         SELECT n.*, t.request_number
         FROM notifications n
         LEFT JOIN tickets t ON t.id = n.ticket_id
-        WHERE n.user_id = ?
-        ORDER BY n.created_at DESC
-        LIMIT 200
+        WHERE {" AND ".join(clauses)}
+        ORDER BY {keyset_order(key_columns, descending=True, backward=backward)}
+        LIMIT ?
         """,
-        (int(g.user["id"]),),
+        [*params, page_size + 1],
     ).fetchall()
-    return render_template("notifications/list.html", notifications=rows, format_datetime=format_datetime)
+    page = build_page(
+        rows,
+        page_size=page_size,
+        key=lambda row: (row["created_at"], row["id"]),
+        cursor_given=cursor is not None,
+        backward=backward,
+    )
+
+    page_args = {key: value for key, value in request.args.items() if key not in {"after", "before"} and value}
+    next_url = (
+        url_for("notifications.list_notifications", **page_args, after=page.next_cursor) if page.next_cursor else None
+    )
+    prev_url = (
+        url_for("notifications.list_notifications", **page_args, before=page.prev_cursor) if page.prev_cursor else None
+    )
+    return render_template(
+        "notifications/list.html",
+        notifications=page.items,
+        next_url=next_url,
+        prev_url=prev_url,
+        return_to=request.full_path.rstrip("?"),
+        format_datetime=format_datetime,
+    )
+
+
+def _redirect_back():
+    return_to = request.form.get("return_to", "")
+    if not return_to.startswith("/notifications") or return_to.startswith("//"):
+        return_to = url_for("notifications.list_notifications")
+    return redirect(return_to)
+
+
+def _mark_read(ids: list[int]) -> int:
+    user_id = int(g.user["id"])
+    db = get_db()
+    placeholders = ", ".join("?" for _ in ids)
+    cur = db.execute(
+        f"UPDATE notifications SET is_read = 1 WHERE user_id = ? AND is_read = 0 AND id IN ({placeholders})",
+        (user_id, *ids),
+    )
+    db.commit()
+    if cur.rowcount:
+        adjust_unread(user_id, -cur.rowcount)
+        publish_user_events([user_id])
+    return cur.rowcount
+
+
+@bp.route("/notifications/<int:notification_id>/read", methods=("POST",))
+@login_required
+def mark_read(notification_id: int):
+    _mark_read([notification_id])
+    return _redirect_back()
+
+
+@bp.route("/notifications/mark-read", methods=("POST",))
+@login_required
+def mark_selected_read():
+    ids: list[int] = []
+    for raw in request.form.getlist("ids"):
+        try:
+            ids.append(int(raw))
+        except ValueError:
+            continue
+    if not ids:
+        flash("Выберите уведомления.", "warning")
+        return _redirect_back()
+
+    changed = _mark_read(ids[: int(current_app.config.get("NOTIFICATIONS_MAX_PAGE_SIZE", 200))])
+    flash(f"Отмечено прочитанными: {changed}.", "success")
+    return _redirect_back()
 
 
 @bp.route("/notifications/mark-all-read", methods=("POST",))
@@ -41,5 +155,137 @@ def mark_all_read():
         (int(g.user["id"]),),
     )
     db.commit()
+    reset_unread(int(g.user["id"]))
+    publish_user_events([int(g.user["id"])])
     flash("Уведомления отмечены как прочитанные.", "success")
     return redirect(url_for("notifications.list_notifications"))
+
+
+def _live_state(db: sqlite3.Connection, user_id: int, after_id: int) -> tuple[int, list[dict]]:
+    # Two primary-key lookups: the maintained counter and the notifications newer than the client's cursor.
+    row = db.execute("SELECT unread_notifications FROM users WHERE id = ?", (user_id,)).fetchone()
+    unread = int(row["unread_notifications"]) if row is not None else 0
+    rows = db.execute(
+        """
+        SELECT id, ticket_id, type, message, created_at
+        FROM notifications
+        WHERE user_id = ? AND id > ?
+        ORDER BY id
+        LIMIT ?
+        """,
+        (user_id, after_id, LIVE_BATCH_LIMIT),
+    ).fetchall()
+    return unread, [dict(r) for r in rows]
+
+
+def _latest_notification_id(db: sqlite3.Connection, user_id: int) -> int:
+    row = db.execute("SELECT MAX(id) AS last_id FROM notifications WHERE user_id = ?", (user_id,)).fetchone()
+    return int(row["last_id"] or 0)
+
+
+def _int_arg(value: str | None, default: int) -> int:
+    try:
+        return int(value) if value not in (None, "") else default
+    except ValueError:
+        return default
+
+
+def _sse(event: str, data: dict, *, event_id: int | None = None) -> str:
+    lines = [f"event: {event}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False)}")
+    return "\n".join(lines) + "\n\n"
+
+
+@bp.route("/notifications/stream", methods=("GET",))
+@login_required
+def stream():
+    user_id = int(g.user["id"])
+    try:
+        subscription = get_broker().subscribe(user_id)
+    except BrokerFull:
+        response = jsonify({"error": "too_many_streams", "poll_url": url_for("notifications.poll")})
+        response.status_code = 503
+        response.headers["Retry-After"] = "30"
+        return response
+
+    app = current_app._get_current_object()  # type: ignore[attr-defined]
+    broker = get_broker()
+    heartbeat = float(app.config.get("NOTIFICATION_STREAM_HEARTBEAT", 15))
+    max_age = float(app.config.get("NOTIFICATION_STREAM_MAX_AGE", 300))
+    last_event_id = request.headers.get("Last-Event-ID")
+    after_id = _int_arg(last_event_id, -1)
+    if after_id < 0:
+        after_id = _latest_notification_id(get_db(), user_id)
+
+    def read_state(after: int) -> tuple[int, list[dict]]:
+        # A short-lived app context per read: an idle stream does not hold a pooled connection.
+        with app.app_context():
+            return _live_state(get_db(), user_id, after)
+
+    def events() -> Iterator[str]:
+        nonlocal after_id
+        try:
+            yield f"retry: {int(heartbeat * 1000)}\n\n"
+            unread, _ = read_state(after_id)
+            yield _sse("unread", {"count": unread})
+            deadline = time.monotonic() + max_age
+            while time.monotonic() < deadline:
+                fired = subscription.wait(min(heartbeat, max(0.0, deadline - time.monotonic())))
+                # Heartbeats re-check the database too, so changes made by another process still arrive.
+                count, notifications = read_state(after_id)
+                for item in notifications:
+                    after_id = int(item["id"])
+                    yield _sse("notification", item, event_id=after_id)
+                if fired or notifications or count != unread:
+                    unread = count
+                    yield _sse("unread", {"count": unread})
+                else:
+                    yield ": keep-alive\n\n"
+        finally:
+            broker.unsubscribe(subscription)
+
+    response = Response(events(), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+@bp.route("/notifications/poll", methods=("GET",))
+@login_required
+def poll():
+    # Long-poll fallback for clients without EventSource or when the stream cap is reached.
+    user_id = int(g.user["id"])
+    db = get_db()
+    after_id = _int_arg(request.args.get("after"), -1)
+    if after_id < 0:
+        after_id = _latest_notification_id(db, user_id)
+    known_unread = _int_arg(request.args.get("unread"), -1)
+    max_timeout = float(current_app.config.get("NOTIFICATION_POLL_TIMEOUT", 25))
+    timeout = min(max(0.0, float(_int_arg(request.args.get("timeout"), int(max_timeout)))), max_timeout)
+
+    unread, notifications = _live_state(db, user_id, after_id)
+    if not notifications and unread == known_unread and timeout > 0:
+        try:
+            subscription = get_broker().subscribe(user_id)
+        except BrokerFull:
+            # No free slot to wait in: answer now and let the client back off instead of re-polling at once.
+            return jsonify(
+                {
+                    "unread": unread,
+                    "after": after_id,
+                    "notifications": [],
+                    "retry_after": int(current_app.config.get("NOTIFICATION_POLL_RETRY_AFTER", 15)),
+                }
+            )
+        close_db()
+        try:
+            subscription.wait(timeout)
+        finally:
+            get_broker().unsubscribe(subscription)
+        unread, notifications = _live_state(get_db(), user_id, after_id)
+
+    if notifications:
+        after_id = int(notifications[-1]["id"])
+    return jsonify({"unread": unread, "after": after_id, "notifications": notifications})
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from typing import Any
+from typing import Callable
+from typing import Sequence
+
+
+@dataclass(frozen=True)
+class Page:
+    items: list[Any]
+    next_cursor: str | None
+    prev_cursor: str | None
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps(list(values), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(value: str | None, *, size: int) -> tuple[Any, ...] | None:
+    if not value:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+        decoded = json.loads(raw.decode("utf-8"))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    if not isinstance(decoded, list) or len(decoded) != size:
+        return None
+    if not all(isinstance(item, (str, int, float)) for item in decoded):
+        return None
+    return tuple(decoded)
+
+
+def keyset_condition(columns: Sequence[str], *, descending: bool, backward: bool) -> str:
+    # Row-value comparison lets SQLite seek straight to the cursor position in the index.
+    operator = ">" if descending == backward else "<"
+    placeholders = ", ".join("?" for _ in columns)
+    return f"({', '.join(columns)}) {operator} ({placeholders})"
+
+
+def keyset_order(columns: Sequence[str], *, descending: bool, backward: bool) -> str:
+    direction = "DESC" if descending != backward else "ASC"
+    return ", ".join(f"{column} {direction}" for column in columns)
+
+
+def build_page(
+    rows: list[Any],
+    *,
+    page_size: int,
+    key: Callable[[Any], Sequence[Any]],
+    cursor_given: bool,
+    backward: bool,
+) -> Page:
+    has_more = len(rows) > page_size
+    items = list(rows[:page_size])
+    if backward:
+        items.reverse()
+
+    if not items:
+        return Page(items=[], next_cursor=None, prev_cursor=None)
+
+    first = encode_cursor(key(items[0]))
+    last = encode_cursor(key(items[-1]))
+    if backward:
+        return Page(items=items, next_cursor=last, prev_cursor=first if has_more else None)
+    return Page(items=items, next_cursor=last if has_more else None, prev_cursor=first if cursor_given else None)
@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+
+@dataclass(frozen=True)
+class PoolStats:
+    size: int
+    open_connections: int
+    idle_connections: int
+    hits: int
+    misses: int
+    waits: int
+    wait_seconds: float
+    health_check_failures: int
+
+
+class PoolTimeout(RuntimeError):
+    pass
+
+
+class ConnectionPool:
+    def __init__(
+        self,
+        db_path: str | Path,
+        *,
+        size: int = 8,
+        timeout: float = 30.0,
+        bootstrap: Callable[[sqlite3.Connection], None] | None = None,
+    ) -> None:
+        if size <= 0:
+            raise ValueError("pool size must be > 0")
+        self.db_path = Path(db_path)
+        self.size = size
+        self.timeout = timeout
+        self._bootstrap = bootstrap
+        self._condition = threading.Condition(threading.Lock())
+        self._idle: list[sqlite3.Connection] = []
+        self._open = 0
+        self._owners: dict[int, sqlite3.Connection] = {}
+        self._closed = False
+
+        self._hits = 0
+        self._misses = 0
+        self._waits = 0
+        self._wait_seconds = 0.0
+        self._health_check_failures = 0
+
+    def acquire(self) -> sqlite3.Connection:
+        thread_id = threading.get_ident()
+        deadline = time.monotonic() + self.timeout
+        waited = False
+        started = time.monotonic()
+
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise RuntimeError("connection pool is closed")
+
+                connection = self._take_idle(thread_id)
+                if connection is not None:
+                    self._hits += 1
+                    break
+
+                if self._open < self.size:
+                    self._open += 1
+                    self._misses += 1
+                    connection = None
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeout(f"no free database connection after {self.timeout:.1f}s")
+                if not waited:
+                    waited = True
+                    self._waits += 1
+                self._condition.wait(remaining)
+
+            if waited:
+                self._wait_seconds += time.monotonic() - started
+
+        if connection is not None and not self._is_healthy(connection):
+            with self._condition:
+                self._health_check_failures += 1
+            self._discard(connection)
+            return self.acquire()
+
+        if connection is None:
+            try:
+                connection = self._connect()
+            except Exception:
+                with self._condition:
+                    self._open -= 1
+                    self._condition.notify()
+                raise
+
+        with self._condition:
+            if len(self._owners) > self.size * 4:
+                self._owners.clear()
+            self._owners[thread_id] = connection
+        return connection
+
+    def release(self, connection: sqlite3.Connection) -> None:
+        try:
+            if connection.in_transaction:
+                connection.rollback()
+        except sqlite3.Error:
+            self._discard(connection)
+            return
+
+        with self._condition:
+            if self._closed:
+                self._open -= 1
+                connection.close()
+                return
+            self._idle.append(connection)
+            self._condition.notify()
+
+    def close(self) -> None:
+        with self._condition:
+            self._closed = True
+            idle = self._idle
+            self._idle = []
+            self._open -= len(idle)
+            self._owners.clear()
+            self._condition.notify_all()
+        for connection in idle:
+            connection.close()
+
+    def stats(self) -> PoolStats:
+        with self._condition:
+            return PoolStats(
+                size=self.size,
+                open_connections=self._open,
+                idle_connections=len(self._idle),
+                hits=self._hits,
+                misses=self._misses,
+                waits=self._waits,
+                wait_seconds=self._wait_seconds,
+                health_check_failures=self._health_check_failures,
+            )
+
+    def _take_idle(self, thread_id: int) -> sqlite3.Connection | None:
+        if not self._idle:
+            return None
+        # Prefer the connection this thread used last: its page cache is warm.
+        preferred = self._owners.get(thread_id)
+        if preferred is not None:
+            for idx, connection in enumerate(self._idle):
+                if connection is preferred:
+                    return self._idle.pop(idx)
+        return self._idle.pop()
+
+    def _connect(self) -> sqlite3.Connection:
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(
+            self.db_path,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            check_same_thread=False,
+        )
+        connection.row_factory = sqlite3.Row
+        connection.execute("PRAGMA foreign_keys = ON")
+        if self._bootstrap is not None:
+            self._bootstrap(connection)
+        return connection
+
+    def _is_healthy(self, connection: sqlite3.Connection) -> bool:
+        try:
+            connection.execute("SELECT 1").fetchone()
+        except sqlite3.Error:
+            return False
+        return True
+
+    def _discard(self, connection: sqlite3.Connection) -> None:
+        try:
+            connection.close()
+        except sqlite3.Error:
+            pass
+        with self._condition:
+            self._open -= 1
+            for thread_id, owned in list(self._owners.items()):
+                if owned is connection:
+                    del self._owners[thread_id]
+            self._condition.notify()
@@ -7,7 +7,8 @@ CREATE TABLE IF NOT EXISTS users (
   full_name TEXT NOT NULL,
   role TEXT NOT NULL CHECK(role IN ('admin', 'operator', 'specialist', 'manager')),
   is_active INTEGER NOT NULL DEFAULT 1,
-  created_at TEXT NOT NULL DEFAULT (datetime('now'))
+  created_at TEXT NOT NULL DEFAULT (datetime('now')),
+  unread_notifications INTEGER NOT NULL DEFAULT 0
 );
 
 CREATE TABLE IF NOT EXISTS tickets (
@@ -17,6 +18,7 @@ CREATE TABLE IF NOT EXISTS tickets (
   equipment_type TEXT NOT NULL,
   device_model TEXT NOT NULL,
   problem_description TEXT NOT NULL,
+  fault_category TEXT,
   customer_full_name TEXT NOT NULL,
   customer_phone TEXT NOT NULL,
   status TEXT NOT NULL CHECK(status IN ('open', 'in_repair', 'waiting_parts', 'completed')),
@@ -27,9 +29,20 @@ CREATE TABLE IF NOT EXISTS tickets (
   FOREIGN KEY (assigned_specialist_id) REFERENCES users(id) ON DELETE SET NULL
 );
 
-CREATE INDEX IF NOT EXISTS idx_tickets_status ON tickets(status);
 CREATE INDEX IF NOT EXISTS idx_tickets_created_at ON tickets(created_at);
-CREATE INDEX IF NOT EXISTS idx_tickets_request_number ON tickets(request_number);
+-- Other ticket and history indexes are created by app/migrations.py: some columns
+-- (due_at, fault_category) only exist after the migration on older databases.
+
+CREATE TABLE IF NOT EXISTS data_versions (
+  scope TEXT PRIMARY KEY,
+  version INTEGER NOT NULL,
+  changed_at INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS request_number_sequences (
+  day TEXT PRIMARY KEY,
+  last_value INTEGER NOT NULL
+);
 
 CREATE TABLE IF NOT EXISTS ticket_specialists (
   id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -73,6 +86,27 @@ CREATE TABLE IF NOT EXISTS ticket_help_requests (
 
 CREATE INDEX IF NOT EXISTS idx_help_requests_status ON ticket_help_requests(status);
 
+-- Manager dashboard summaries, maintained by triggers (app/services/dashboard.py).
+CREATE TABLE IF NOT EXISTS dashboard_due_tickets (
+  ticket_id INTEGER PRIMARY KEY,
+  due_at TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_dashboard_due_tickets_due ON dashboard_due_tickets(due_at);
+
+CREATE TABLE IF NOT EXISTS dashboard_open_help (
+  help_id INTEGER PRIMARY KEY,
+  ticket_id INTEGER NOT NULL,
+  requested_at TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_dashboard_open_help_requested ON dashboard_open_help(requested_at);
+
+CREATE TABLE IF NOT EXISTS specialist_workload (
+  specialist_user_id INTEGER PRIMARY KEY,
+  active_tickets INTEGER NOT NULL
+);
+
 CREATE TABLE IF NOT EXISTS ticket_reviews (
   id INTEGER PRIMARY KEY AUTOINCREMENT,
   ticket_id INTEGER NOT NULL UNIQUE,
@@ -131,3 +165,44 @@ CREATE TABLE IF NOT EXISTS notifications (
 );
 
 CREATE INDEX IF NOT EXISTS idx_notifications_user_read ON notifications(user_id, is_read);
+CREATE INDEX IF NOT EXISTS idx_notifications_user_created ON notifications(user_id, created_at, id);
+
+CREATE TABLE IF NOT EXISTS notifications_archive (
+  id INTEGER PRIMARY KEY,
+  user_id INTEGER NOT NULL,
+  ticket_id INTEGER,
+  type TEXT NOT NULL,
+  message TEXT NOT NULL,
+  created_at TEXT NOT NULL,
+  archived_at TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_notifications_archive_user_created ON notifications_archive(user_id, created_at, id);
+
+CREATE TABLE IF NOT EXISTS notification_outbox (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  ticket_id INTEGER,
+  type TEXT NOT NULL,
+  message TEXT NOT NULL,
+  recipients TEXT NOT NULL,
+  created_at TEXT NOT NULL,
+  available_at TEXT NOT NULL,
+  attempts INTEGER NOT NULL DEFAULT 0,
+  last_error TEXT,
+  FOREIGN KEY(ticket_id) REFERENCES tickets(id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_notification_outbox_available ON notification_outbox(available_at, id);
+
+-- Outbox events that failed NOTIFICATION_OUTBOX_MAX_ATTEMPTS times (app/services/outbox.py).
+CREATE TABLE IF NOT EXISTS notification_outbox_dead (
+  id INTEGER PRIMARY KEY,
+  ticket_id INTEGER,
+  type TEXT NOT NULL,
+  message TEXT NOT NULL,
+  recipients TEXT NOT NULL,
+  created_at TEXT NOT NULL,
+  attempts INTEGER NOT NULL,
+  last_error TEXT,
+  failed_at TEXT NOT NULL
+);
@@ -1,13 +1,24 @@
 from __future__ import annotations
 
+import multiprocessing
 import random
 import sqlite3
+import traceback
+from contextlib import closing
+from queue import Empty
 from dataclasses import dataclass
+from dataclasses import field
+from dataclasses import replace
 from datetime import datetime
 from datetime import timedelta
+from typing import Callable
+from typing import Iterator
 
+from app.migrations import deferred_maintenance
 from app.security import hash_password
+from app.services.statistics import categorize_fault_type
 from app.utils import generate_request_number
+from app.utils import request_sequence_value
 
 
 FIRST_NAMES = [
@@ -140,7 +151,8 @@ REVIEW_COMMENTS = [
 
 
 def _iso(dt: datetime) -> str:
-    return dt.replace(microsecond=0).strftime("%Y-%m-%d %H:%M:%S")
+    # Same text as strftime("%Y-%m-%d %H:%M:%S"), several times faster.
+    return dt.isoformat(" ", "seconds")
 
 
 def _random_full_name(rng: random.Random) -> str:
@@ -172,22 +184,17 @@ def _create_users(
     password: str,
     name_prefix: str,
 ) -> int:
-    created = 0
-    for idx in range(1, count + 1):
-        username = f"{prefix}{idx}"
-        full_name = f"{name_prefix} {idx}"
-        try:
-            db.execute(
-                """
-                INSERT OR IGNORE INTO users (username, password_hash, full_name, role, is_active)
-                VALUES (?, ?, ?, ?, 1)
-                """,
-                (username, hash_password(password), full_name, role),
-            )
-            created += 1
-        except Exception:
-            continue
-    return created
+    # All generated accounts of a role share one password, so it is hashed once.
+    password_hash = hash_password(password)
+    before = db.total_changes
+    db.executemany(
+        """
+        INSERT OR IGNORE INTO users (username, password_hash, full_name, role, is_active)
+        VALUES (?, ?, ?, ?, 1)
+        """,
+        [(f"{prefix}{idx}", password_hash, f"{name_prefix} {idx}", role) for idx in range(1, count + 1)],
+    )
+    return db.total_changes - before
 
 
 def _fetch_user_ids_by_role(db: sqlite3.Connection, role: str) -> list[int]:
@@ -208,21 +215,230 @@ class SeedResult:
     status_history_created: int
 
 
-def seed_app_db(
+@dataclass
+class _TicketDraft:
+    # One generated ticket with its child rows; child tuples leave out ticket_id.
+    created_at: str
+    values: tuple
+    status_history: list[tuple] = field(default_factory=list)
+    due_history: list[tuple] = field(default_factory=list)
+    assistants: list[tuple] = field(default_factory=list)
+    comments: list[tuple] = field(default_factory=list)
+    parts: list[tuple] = field(default_factory=list)
+    help_requests: list[tuple] = field(default_factory=list)
+    reviews: list[tuple] = field(default_factory=list)
+
+
+@dataclass(frozen=True)
+class _SeedContext:
+    operator_id: int
+    manager_id: int
+    specialist_ids: list[int]
+    start_dt: datetime
+    end_dt: datetime
+    comments_max: int
+    parts_max: int
+
+
+_TICKET_COLUMNS = (
+    "created_at, equipment_type, device_model, problem_description, fault_category, customer_full_name, "
+    "customer_phone, status, assigned_specialist_id, due_at, completed_at, updated_at"
+)
+_STATUS_HISTORY_SQL = """
+    INSERT INTO status_history (ticket_id, old_status, new_status, changed_by_user_id, changed_at, comment)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+_DUE_HISTORY_SQL = """
+    INSERT INTO ticket_due_history (ticket_id, old_due_at, new_due_at, changed_by_user_id, changed_at, customer_agreed, comment)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+_ASSISTANTS_SQL = """
+    INSERT OR IGNORE INTO ticket_specialists (ticket_id, specialist_user_id, added_by_user_id, added_at)
+    VALUES (?, ?, ?, ?)
+"""
+_COMMENTS_SQL = "INSERT INTO ticket_comments (ticket_id, user_id, body, created_at) VALUES (?, ?, ?, ?)"
+_PARTS_SQL = """
+    INSERT INTO ticket_parts (ticket_id, part_name, quantity, created_by_user_id, created_at)
+    VALUES (?, ?, ?, ?, ?)
+"""
+_HELP_REQUESTS_SQL = """
+    INSERT INTO ticket_help_requests (
+      ticket_id, requested_by_user_id, requested_at, message, status, resolved_by_user_id, resolved_at, resolution_comment
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+_REVIEWS_SQL = """
+    INSERT OR IGNORE INTO ticket_reviews (ticket_id, rating, comment, source, recorded_by_user_id, created_at)
+    VALUES (?, ?, ?, 'manual', ?, ?)
+"""
+_CHILD_TABLES = (
+    ("status_history", _STATUS_HISTORY_SQL),
+    ("due_history", _DUE_HISTORY_SQL),
+    ("assistants", _ASSISTANTS_SQL),
+    ("comments", _COMMENTS_SQL),
+    ("parts", _PARTS_SQL),
+    ("help_requests", _HELP_REQUESTS_SQL),
+    ("reviews", _REVIEWS_SQL),
+)
+
+SEEDED_TABLES = (
+    "tickets",
+    "status_history",
+    "ticket_due_history",
+    "ticket_specialists",
+    "ticket_comments",
+    "ticket_parts",
+    "ticket_help_requests",
+    "ticket_reviews",
+)
+
+_STATUSES = ["open", "in_repair", "waiting_parts", "completed"]
+_STATUS_WEIGHTS = [0.25, 0.35, 0.25, 0.15]
+
+
+def _draft_ticket(rng: random.Random, ctx: _SeedContext, categories: dict[str, str]) -> _TicketDraft:
+    # The order of rng calls defines the dataset for a seed; both seeding modes share this function.
+    created_at_dt = ctx.start_dt + (ctx.end_dt - ctx.start_dt) * rng.random()
+    created_at = _iso(created_at_dt)
+    updated_at = created_at
+
+    equipment_type = rng.choice(EQUIPMENT_TYPES)
+    device_model = rng.choice(DEVICE_MODELS)
+    problem_description = rng.choice(PROBLEM_DESCRIPTIONS)
+    customer_full_name = _random_full_name(rng)
+    customer_phone = _random_phone(rng)
+
+    assigned_specialist_id: int | None = None
+    if rng.random() < 0.8 and ctx.specialist_ids:
+        assigned_specialist_id = rng.choice(ctx.specialist_ids)
+
+    status = rng.choices(_STATUSES, weights=_STATUS_WEIGHTS, k=1)[0]
+
+    due_at: str | None = None
+    if rng.random() < 0.75:
+        due_dt = created_at_dt + timedelta(days=rng.randint(1, 10))
+        due_at = _iso(due_dt.replace(hour=23, minute=59, second=59))
+
+    completed_at: str | None = None
+    if status == "completed":
+        completed_dt = created_at_dt + timedelta(hours=rng.randint(2, 72))
+        completed_at = _iso(completed_dt)
+        updated_at = completed_at
+
+    status_history = [(None, "open", ctx.operator_id, created_at, "Создание заявки")]
+    if status != "open":
+        change_dt = created_at_dt + timedelta(hours=rng.randint(1, 24))
+        status_history.append(("open", status, ctx.operator_id, _iso(change_dt), "Смена статуса"))
+
+    due_history: list[tuple] = []
+    if due_at is not None:
+        due_history.append((None, due_at, ctx.operator_id, created_at, 0, "Установка срока выполнения"))
+        if rng.random() < 0.2:
+            old_due_at = due_at
+            due_dt = datetime.fromisoformat(due_at) + timedelta(days=rng.randint(1, 5))
+            due_at = _iso(due_dt.replace(hour=23, minute=59, second=59))
+            updated_at = _iso(created_at_dt + timedelta(days=rng.randint(1, 3)))
+            due_history.append((old_due_at, due_at, ctx.manager_id, updated_at, 1, "Продление срока выполнения"))
+
+    assistants_for_ticket: list[int] = []
+    if rng.random() < 0.25 and len(ctx.specialist_ids) >= 2:
+        pool = [sid for sid in ctx.specialist_ids if sid != assigned_specialist_id]
+        rng.shuffle(pool)
+        assistants_for_ticket = pool[: rng.randint(1, min(2, len(pool)))]
+
+    comments: list[tuple] = []
+    for _ in range(rng.randint(0, ctx.comments_max)):
+        author_id = ctx.operator_id
+        if assigned_specialist_id is not None and rng.random() < 0.6:
+            author_id = assigned_specialist_id
+        if assistants_for_ticket and rng.random() < 0.15:
+            author_id = rng.choice(assistants_for_ticket)
+        comment_dt = created_at_dt + timedelta(hours=rng.randint(0, 72))
+        comments.append((author_id, rng.choice(COMMENTS), _iso(comment_dt)))
+
+    parts: list[tuple] = []
+    for _ in range(rng.randint(0, ctx.parts_max)):
+        created_by = assigned_specialist_id if assigned_specialist_id is not None else ctx.operator_id
+        part_dt = created_at_dt + timedelta(hours=rng.randint(1, 96))
+        parts.append((rng.choice(PARTS), rng.randint(1, 3), created_by, _iso(part_dt)))
+
+    help_requests: list[tuple] = []
+    if assigned_specialist_id is not None and status in {"in_repair", "waiting_parts"} and rng.random() < 0.18:
+        requested_dt = created_at_dt + timedelta(hours=rng.randint(2, 48))
+        status_value = "open"
+        resolved_by: int | None = None
+        resolved_at: str | None = None
+        resolution_comment: str | None = None
+
+        if rng.random() < 0.55:
+            status_value = "resolved"
+            resolved_by = ctx.manager_id
+            resolved_at = _iso(requested_dt + timedelta(hours=rng.randint(1, 24)))
+            resolution_comment = "Рекомендации переданы специалисту."
+
+        help_requests.append(
+            (
+                assigned_specialist_id,
+                _iso(requested_dt),
+                rng.choice(HELP_MESSAGES),
+                status_value,
+                resolved_by,
+                resolved_at,
+                resolution_comment,
+            )
+        )
+
+    reviews: list[tuple] = []
+    if status == "completed" and rng.random() < 0.55:
+        rating = rng.randint(3, 5)
+        comment = None
+        if rng.random() < 0.5:
+            comment = rng.choice(REVIEW_COMMENTS)
+        review_dt = created_at_dt + timedelta(hours=rng.randint(10, 120))
+        reviews.append((rating, comment, ctx.manager_id, _iso(review_dt)))
+
+    fault_category = categories.get(problem_description)
+    if fault_category is None:
+        fault_category = categories[problem_description] = categorize_fault_type(problem_description)
+
+    return _TicketDraft(
+        created_at=created_at,
+        values=(
+            created_at,
+            equipment_type,
+            device_model,
+            problem_description,
+            fault_category,
+            customer_full_name,
+            customer_phone,
+            status,
+            assigned_specialist_id,
+            due_at,
+            completed_at,
+            updated_at,
+        ),
+        status_history=status_history,
+        due_history=due_history,
+        assistants=[(assistant_id, ctx.manager_id, created_at) for assistant_id in assistants_for_ticket],
+        comments=comments,
+        parts=parts,
+        help_requests=help_requests,
+        reviews=reviews,
+    )
+
+
+def _prepare(
     db: sqlite3.Connection,
     *,
-    seed: int,
-    tickets_count: int,
+    rng: random.Random,
     operators_count: int,
     specialists_count: int,
     days_back: int,
     comments_max: int,
     parts_max: int,
-) -> SeedResult:
-    rng = random.Random(seed)
-
-    users_created = 0
-    users_created += _create_users(
+    now: datetime | None,
+) -> tuple[int, _SeedContext]:
+    users_created = _create_users(
         db,
         rng=rng,
         role="operator",
@@ -249,249 +465,342 @@ def seed_app_db(
     if manager_id is None:
         manager_id = _fetch_user_ids_by_role(db, "manager")[0]
 
-    specialist_ids = _fetch_user_ids_by_role(db, "specialist")
+    end_dt = now or datetime.now()
+    return users_created, _SeedContext(
+        operator_id=operator_id,
+        manager_id=manager_id,
+        specialist_ids=_fetch_user_ids_by_role(db, "specialist"),
+        start_dt=end_dt - timedelta(days=days_back),
+        end_dt=end_dt,
+        comments_max=comments_max,
+        parts_max=parts_max,
+    )
+
 
-    start_dt = datetime.now() - timedelta(days=days_back)
-    end_dt = datetime.now()
+def _result(users_created: int, tickets_created: int, counts: dict[str, int]) -> SeedResult:
+    return SeedResult(
+        users_created=users_created,
+        tickets_created=tickets_created,
+        comments_created=counts["comments"],
+        parts_created=counts["parts"],
+        assistants_created=counts["assistants"],
+        help_requests_created=counts["help_requests"],
+        reviews_created=counts["reviews"],
+        due_history_created=counts["due_history"],
+        status_history_created=counts["status_history"],
+    )
 
-    tickets_created = 0
-    comments_created = 0
-    parts_created = 0
-    assistants_created = 0
-    help_requests_created = 0
-    reviews_created = 0
-    due_history_created = 0
-    status_history_created = 0
 
-    statuses = ["open", "in_repair", "waiting_parts", "completed"]
-    weights = [0.25, 0.35, 0.25, 0.15]
+def seed_app_db(
+    db: sqlite3.Connection,
+    *,
+    seed: int,
+    tickets_count: int,
+    operators_count: int,
+    specialists_count: int,
+    days_back: int,
+    comments_max: int,
+    parts_max: int,
+    now: datetime | None = None,
+) -> SeedResult:
+    rng = random.Random(seed)
+    users_created, ctx = _prepare(
+        db,
+        rng=rng,
+        operators_count=operators_count,
+        specialists_count=specialists_count,
+        days_back=days_back,
+        comments_max=comments_max,
+        parts_max=parts_max,
+        now=now,
+    )
 
+    categories: dict[str, str] = {}
+    counts = {name: 0 for name, _ in _CHILD_TABLES}
     for _ in range(tickets_count):
-        created_at_dt = start_dt + (end_dt - start_dt) * rng.random()
-        created_at = _iso(created_at_dt)
-        updated_at = created_at
+        draft = _draft_ticket(rng, ctx, categories)
+        request_number = generate_request_number(db, draft.created_at)
+        cur = db.execute(
+            f"INSERT INTO tickets (request_number, {_TICKET_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (request_number, *draft.values),
+        )
+        ticket_id = int(cur.lastrowid)
+        for name, sql in _CHILD_TABLES:
+            for row in getattr(draft, name):
+                db.execute(sql, (ticket_id, *row))
+                counts[name] += 1
 
-        equipment_type = rng.choice(EQUIPMENT_TYPES)
-        device_model = rng.choice(DEVICE_MODELS)
-        problem_description = rng.choice(PROBLEM_DESCRIPTIONS)
-        customer_full_name = _random_full_name(rng)
-        customer_phone = _random_phone(rng)
+    return _result(users_created, tickets_count, counts)
 
-        assigned_specialist_id: int | None = None
-        if rng.random() < 0.8 and specialist_ids:
-            assigned_specialist_id = rng.choice(specialist_ids)
 
-        status = rng.choices(statuses, weights=weights, k=1)[0]
+class _RequestNumbers:
+    # In-memory per-day counters; `start` gives the last number already used for a day on first use.
+    def __init__(self, start: Callable[[str], int]) -> None:
+        self._start = start
+        self._last: dict[str, int] = {}
+        self._dirty: set[str] = set()
 
-        due_at: str | None = None
-        if rng.random() < 0.75:
-            due_dt = created_at_dt + timedelta(days=rng.randint(1, 10))
-            due_at = _iso(due_dt.replace(hour=23, minute=59, second=59))
+    def next(self, created_at: str) -> str:
+        day = created_at[:10].replace("-", "")
+        last = self._last.get(day)
+        if last is None:
+            last = self._start(day)
+        last += 1
+        self._last[day] = last
+        self._dirty.add(day)
+        return f"R-{day}-{last:04d}"
 
-        completed_at: str | None = None
-        if status == "completed":
-            completed_dt = created_at_dt + timedelta(hours=rng.randint(2, 72))
-            completed_at = _iso(completed_dt)
-            updated_at = completed_at
+    def take_changes(self) -> dict[str, int]:
+        changes = {day: self._last[day] for day in sorted(self._dirty)}
+        self._dirty.clear()
+        return changes
 
-        request_number = generate_request_number(db, created_at)
 
-        cur = db.execute(
-            """
-            INSERT INTO tickets (
-              request_number,
-              created_at,
-              equipment_type,
-              device_model,
-              problem_description,
-              customer_full_name,
-              customer_phone,
-              status,
-              assigned_specialist_id,
-              due_at,
-              completed_at,
-              updated_at
-            )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
-                request_number,
-                created_at,
-                equipment_type,
-                device_model,
-                problem_description,
-                customer_full_name,
-                customer_phone,
-                status,
-                assigned_specialist_id,
-                due_at,
-                completed_at,
-                updated_at,
-            ),
-        )
-        ticket_id = int(cur.lastrowid)
-        tickets_created += 1
+@dataclass
+class _Batch:
+    tickets: list[tuple]
+    children: dict[str, list[tuple]]
+    sequences: dict[str, int]
 
-        db.execute(
+
+def _generate_batches(
+    rng: random.Random,
+    ctx: _SeedContext,
+    numbers: _RequestNumbers,
+    *,
+    first_id: int,
+    count: int,
+    batch_size: int,
+) -> Iterator[_Batch]:
+    categories: dict[str, str] = {}
+    next_id = first_id
+    done = 0
+    while done < count:
+        tickets: list[tuple] = []
+        children: dict[str, list[tuple]] = {name: [] for name, _ in _CHILD_TABLES}
+        for _ in range(min(batch_size, count - done)):
+            draft = _draft_ticket(rng, ctx, categories)
+            tickets.append((next_id, numbers.next(draft.created_at), *draft.values))
+            for name, _sql in _CHILD_TABLES:
+                children[name].extend((next_id, *row) for row in getattr(draft, name))
+            next_id += 1
+        done += len(tickets)
+        yield _Batch(tickets=tickets, children=children, sequences=numbers.take_changes())
+
+
+def _write_batch(db: sqlite3.Connection, batch: _Batch, counts: dict[str, int]) -> None:
+    try:
+        db.executemany(
+            f"INSERT INTO tickets (id, request_number, {_TICKET_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            batch.tickets,
+        )
+        for name, sql in _CHILD_TABLES:
+            db.executemany(sql, batch.children[name])
+        db.executemany(
             """
-            INSERT INTO status_history (ticket_id, old_status, new_status, changed_by_user_id, changed_at, comment)
-            VALUES (?, ?, ?, ?, ?, ?)
+            INSERT INTO request_number_sequences (day, last_value) VALUES (?, ?)
+            ON CONFLICT(day) DO UPDATE SET last_value = MAX(last_value, excluded.last_value)
             """,
-            (ticket_id, None, "open", operator_id, created_at, "Создание заявки"),
+            list(batch.sequences.items()),
         )
-        status_history_created += 1
-
-        if status != "open":
-            change_dt = created_at_dt + timedelta(hours=rng.randint(1, 24))
-            changed_at = _iso(change_dt)
-            db.execute(
-                """
-                INSERT INTO status_history (ticket_id, old_status, new_status, changed_by_user_id, changed_at, comment)
-                VALUES (?, ?, ?, ?, ?, ?)
-                """,
-                (ticket_id, "open", status, operator_id, changed_at, "Смена статуса"),
-            )
-            status_history_created += 1
-
-        if due_at is not None:
-            db.execute(
-                """
-                INSERT INTO ticket_due_history (ticket_id, old_due_at, new_due_at, changed_by_user_id, changed_at, customer_agreed, comment)
-                VALUES (?, ?, ?, ?, ?, 0, ?)
-                """,
-                (ticket_id, None, due_at, operator_id, created_at, "Установка срока выполнения"),
-            )
-            due_history_created += 1
-
-            if rng.random() < 0.2:
-                old_due_at = due_at
-                due_dt = datetime.fromisoformat(due_at) + timedelta(days=rng.randint(1, 5))
-                due_at = _iso(due_dt.replace(hour=23, minute=59, second=59))
-                change_dt = created_at_dt + timedelta(days=rng.randint(1, 3))
-                changed_at = _iso(change_dt)
-                db.execute("UPDATE tickets SET due_at = ?, updated_at = ? WHERE id = ?", (due_at, changed_at, ticket_id))
-                db.execute(
-                    """
-                    INSERT INTO ticket_due_history (ticket_id, old_due_at, new_due_at, changed_by_user_id, changed_at, customer_agreed, comment)
-                    VALUES (?, ?, ?, ?, ?, 1, ?)
-                    """,
-                    (ticket_id, old_due_at, due_at, manager_id, changed_at, "Продление срока выполнения"),
-                )
-                due_history_created += 1
-
-        assistants_for_ticket: list[int] = []
-        if rng.random() < 0.25 and len(specialist_ids) >= 2:
-            pool = [sid for sid in specialist_ids if sid != assigned_specialist_id]
-            rng.shuffle(pool)
-            assistants_for_ticket = pool[: rng.randint(1, min(2, len(pool)))]
-            for assistant_id in assistants_for_ticket:
-                db.execute(
-                    """
-                    INSERT OR IGNORE INTO ticket_specialists (ticket_id, specialist_user_id, added_by_user_id, added_at)
-                    VALUES (?, ?, ?, ?)
-                    """,
-                    (ticket_id, assistant_id, manager_id, created_at),
-                )
-                assistants_created += 1
-
-        comment_count = rng.randint(0, comments_max)
-        for _ in range(comment_count):
-            author_id = operator_id
-            if assigned_specialist_id is not None and rng.random() < 0.6:
-                author_id = assigned_specialist_id
-            if assistants_for_ticket and rng.random() < 0.15:
-                author_id = rng.choice(assistants_for_ticket)
-
-            comment_dt = created_at_dt + timedelta(hours=rng.randint(0, 72))
-            db.execute(
-                """
-                INSERT INTO ticket_comments (ticket_id, user_id, body, created_at)
-                VALUES (?, ?, ?, ?)
-                """,
-                (ticket_id, author_id, rng.choice(COMMENTS), _iso(comment_dt)),
-            )
-            comments_created += 1
-
-        part_count = rng.randint(0, parts_max)
-        for _ in range(part_count):
-            created_by = operator_id
-            if assigned_specialist_id is not None:
-                created_by = assigned_specialist_id
-            part_dt = created_at_dt + timedelta(hours=rng.randint(1, 96))
-            db.execute(
-                """
-                INSERT INTO ticket_parts (ticket_id, part_name, quantity, created_by_user_id, created_at)
-                VALUES (?, ?, ?, ?, ?)
-                """,
-                (ticket_id, rng.choice(PARTS), rng.randint(1, 3), created_by, _iso(part_dt)),
-            )
-            parts_created += 1
-
-        if assigned_specialist_id is not None and status in {"in_repair", "waiting_parts"} and rng.random() < 0.18:
-            requested_dt = created_at_dt + timedelta(hours=rng.randint(2, 48))
-            status_value = "open"
-            resolved_by: int | None = None
-            resolved_at: str | None = None
-            resolution_comment: str | None = None
-
-            if rng.random() < 0.55:
-                status_value = "resolved"
-                resolved_by = manager_id
-                resolved_dt = requested_dt + timedelta(hours=rng.randint(1, 24))
-                resolved_at = _iso(resolved_dt)
-                resolution_comment = "Рекомендации переданы специалисту."
-
-            db.execute(
-                """
-                INSERT INTO ticket_help_requests (
-                  ticket_id,
-                  requested_by_user_id,
-                  requested_at,
-                  message,
-                  status,
-                  resolved_by_user_id,
-                  resolved_at,
-                  resolution_comment
-                )
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    ticket_id,
-                    assigned_specialist_id,
-                    _iso(requested_dt),
-                    rng.choice(HELP_MESSAGES),
-                    status_value,
-                    resolved_by,
-                    resolved_at,
-                    resolution_comment,
-                ),
-            )
-            help_requests_created += 1
-
-        if status == "completed" and rng.random() < 0.55:
-            rating = rng.randint(3, 5)
-            comment = None
-            if rng.random() < 0.5:
-                comment = rng.choice(REVIEW_COMMENTS)
-            review_dt = created_at_dt + timedelta(hours=rng.randint(10, 120))
-            db.execute(
-                """
-                INSERT OR IGNORE INTO ticket_reviews (ticket_id, rating, comment, source, recorded_by_user_id, created_at)
-                VALUES (?, ?, ?, 'manual', ?, ?)
-                """,
-                (ticket_id, rating, comment, manager_id, _iso(review_dt)),
-            )
-            reviews_created += 1
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    for name, _sql in _CHILD_TABLES:
+        counts[name] += len(batch.children[name])
 
-    return SeedResult(
-        users_created=users_created,
-        tickets_created=tickets_created,
-        comments_created=comments_created,
-        parts_created=parts_created,
-        assistants_created=assistants_created,
-        help_requests_created=help_requests_created,
-        reviews_created=reviews_created,
-        due_history_created=due_history_created,
-        status_history_created=status_history_created,
-    )
 
+@dataclass(frozen=True)
+class _Shard:
+    # A worker's share: its own sub-seed, a contiguous run of whole days (so request numbers never
+    # collide) and a contiguous block of ticket ids.
+    seed: str
+    ctx: _SeedContext
+    first_id: int
+    count: int
+    batch_size: int
+    sequences: dict[str, int]
+
+
+def _plan_shards(
+    db: sqlite3.Connection,
+    ctx: _SeedContext,
+    *,
+    seed: int,
+    workers: int,
+    tickets_count: int,
+    first_id: int,
+    batch_size: int,
+) -> list[_Shard]:
+    first_day = ctx.start_dt.date()
+    days = [first_day + timedelta(days=offset) for offset in range((ctx.end_dt.date() - first_day).days + 1)]
+    groups = min(workers, len(days))
+    sequences = {day.strftime("%Y%m%d"): request_sequence_value(db, day.strftime("%Y%m%d")) for day in days}
+
+    windows: list[tuple[datetime, datetime]] = []
+    for index in range(groups):
+        group = days[len(days) * index // groups : len(days) * (index + 1) // groups]
+        start = max(ctx.start_dt, datetime.combine(group[0], datetime.min.time()))
+        end = min(ctx.end_dt, datetime.combine(group[-1] + timedelta(days=1), datetime.min.time()))
+        windows.append((start, end))
+
+    # Tickets are split in proportion to each window's length; the remainder goes to the first shards.
+    # A zero-length period (days_back=0) is a single window, so the first shard takes every ticket.
+    total_seconds = sum((end - start).total_seconds() for start, end in windows)
+    if total_seconds:
+        counts = [int(tickets_count * (end - start).total_seconds() // total_seconds) for start, end in windows]
+    else:
+        counts = [tickets_count] + [0] * (groups - 1)
+    for index in range(tickets_count - sum(counts)):
+        counts[index % groups] += 1
+
+    shards: list[_Shard] = []
+    for index, ((start, end), count) in enumerate(zip(windows, counts)):
+        shards.append(
+            _Shard(
+                seed=f"{seed}/{index}",
+                ctx=replace(ctx, start_dt=start, end_dt=end),
+                first_id=first_id,
+                count=count,
+                batch_size=batch_size,
+                sequences=sequences,
+            )
+        )
+        first_id += count
+    return shards
+
+
+def _run_shard(shard: _Shard, queue) -> None:
+    try:
+        numbers = _RequestNumbers(lambda day: shard.sequences.get(day, 0))
+        for batch in _generate_batches(
+            random.Random(shard.seed),
+            shard.ctx,
+            numbers,
+            first_id=shard.first_id,
+            count=shard.count,
+            batch_size=shard.batch_size,
+        ):
+            queue.put(batch)
+        queue.put(None)
+    except BaseException:
+        queue.put(traceback.format_exc())
+
+
+def _next_item(queue, process, index: int, poll_interval: float):
+    # _run_shard reports Python errors itself; a worker killed by a signal or the OOM killer just
+    # disappears, so waiting must notice a dead process instead of blocking forever.
+    while True:
+        try:
+            return queue.get(timeout=poll_interval)
+        except Empty:
+            if process.is_alive():
+                continue
+        try:
+            # The worker may have put its last item right before exiting.
+            return queue.get(timeout=poll_interval)
+        except Empty:
+            raise RuntimeError(
+                f"Seed worker {index} exited with code {process.exitcode} before finishing its shard"
+            ) from None
+
+
+def _sharded_batches(shards: list[_Shard], *, queue_size: int = 4, poll_interval: float = 1.0) -> Iterator[_Batch]:
+    # Each worker fills its own bounded queue; batches are taken round-robin in shard order, so the
+    # write order (and with it every AUTOINCREMENT id) does not depend on process timing.
+    mp = multiprocessing.get_context("spawn")
+    queues = [mp.Queue(maxsize=queue_size) for _ in shards]
+    processes = [mp.Process(target=_run_shard, args=(shard, queue), daemon=True) for shard, queue in zip(shards, queues)]
+    for process in processes:
+        process.start()
+    try:
+        active = list(range(len(shards)))
+        while active:
+            for index in list(active):
+                item = _next_item(queues[index], processes[index], index, poll_interval)
+                if item is None:
+                    active.remove(index)
+                elif isinstance(item, str):
+                    raise RuntimeError(f"Seed worker {index} failed:\n{item}")
+                else:
+                    yield item
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+            process.join()
+
+
+def _next_ticket_id(db: sqlite3.Connection) -> int:
+    # tickets is AUTOINCREMENT: ids of deleted tickets must not come back (notifications_archive
+    # keeps ticket_id without a foreign key), so sqlite_sequence counts as much as MAX(id).
+    row = db.execute(
+        """
+        SELECT MAX(
+          COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'tickets'), 0),
+          COALESCE((SELECT MAX(id) FROM tickets), 0)
+        ) + 1
+        """
+    ).fetchone()
+    return int(row[0])
+
+
+def seed_app_db_bulk(
+    db: sqlite3.Connection,
+    *,
+    seed: int,
+    tickets_count: int,
+    operators_count: int,
+    specialists_count: int,
+    days_back: int,
+    comments_max: int,
+    parts_max: int,
+    batch_size: int = 5000,
+    workers: int = 1,
+    now: datetime | None = None,
+    report: Callable[[int, int], None] | None = None,
+) -> SeedResult:
+    # Written with executemany in transactions of batch_size tickets. Ticket ids and request numbers are
+    # assigned in memory, so no per-row lookups; triggers and secondary indexes of the seeded tables are
+    # rebuilt once at the end. With workers == 1 the rows equal seed_app_db's for the same seed; with more,
+    # worker processes generate shards and this process is the only writer (output depends on seed and workers).
+    rng = random.Random(seed)
+    users_created, ctx = _prepare(
+        db,
+        rng=rng,
+        operators_count=operators_count,
+        specialists_count=specialists_count,
+        days_back=days_back,
+        comments_max=comments_max,
+        parts_max=parts_max,
+        now=now,
+    )
+    db.commit()
+
+    first_id = _next_ticket_id(db)
+    if workers > 1:
+        shards = _plan_shards(
+            db,
+            ctx,
+            seed=seed,
+            workers=workers,
+            tickets_count=tickets_count,
+            first_id=first_id,
+            batch_size=batch_size,
+        )
+        batches = _sharded_batches(shards)
+    else:
+        numbers = _RequestNumbers(lambda day: request_sequence_value(db, day))
+        batches = _generate_batches(rng, ctx, numbers, first_id=first_id, count=tickets_count, batch_size=batch_size)
+
+    counts = {name: 0 for name, _ in _CHILD_TABLES}
+    done = 0
+    with closing(batches), deferred_maintenance(db, SEEDED_TABLES):
+        for batch in batches:
+            _write_batch(db, batch, counts)
+            done += len(batch.tickets)
+            if report is not None:
+                report(done, tickets_count)
+
+    return _result(users_created, done, counts)
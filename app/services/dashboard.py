@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import sqlite3
+from dataclasses import dataclass
+
+# Summary tables behind /manager, kept current by triggers on tickets and ticket_help_requests:
+#   dashboard_due_tickets   - unfinished tickets that have a due date (overdue = range scan on due_at)
+#   dashboard_open_help     - open help requests
+#   specialist_workload     - unfinished tickets per assigned specialist
+_DUE_QUALIFIES = "{row}.status != 'completed' AND {row}.due_at IS NOT NULL"
+_ACTIVE_QUALIFIES = "{row}.status != 'completed' AND {row}.assigned_specialist_id IS NOT NULL"
+
+_TRIGGERS = {
+    "tickets_dashboard_ai": f"""
+        AFTER INSERT ON tickets
+        BEGIN
+          INSERT OR REPLACE INTO dashboard_due_tickets (ticket_id, due_at)
+          SELECT new.id, new.due_at WHERE {_DUE_QUALIFIES.format(row="new")};
+          INSERT INTO specialist_workload (specialist_user_id, active_tickets)
+          SELECT new.assigned_specialist_id, 1 WHERE {_ACTIVE_QUALIFIES.format(row="new")}
+          ON CONFLICT(specialist_user_id) DO UPDATE SET active_tickets = active_tickets + 1;
+        END
+    """,
+    "tickets_dashboard_au": f"""
+        AFTER UPDATE OF status, due_at, assigned_specialist_id ON tickets
+        BEGIN
+          DELETE FROM dashboard_due_tickets WHERE ticket_id = old.id;
+          INSERT INTO dashboard_due_tickets (ticket_id, due_at)
+          SELECT new.id, new.due_at WHERE {_DUE_QUALIFIES.format(row="new")};
+          UPDATE specialist_workload SET active_tickets = active_tickets - 1
+          WHERE specialist_user_id = old.assigned_specialist_id AND {_ACTIVE_QUALIFIES.format(row="old")};
+          INSERT INTO specialist_workload (specialist_user_id, active_tickets)
+          SELECT new.assigned_specialist_id, 1 WHERE {_ACTIVE_QUALIFIES.format(row="new")}
+          ON CONFLICT(specialist_user_id) DO UPDATE SET active_tickets = active_tickets + 1;
+          DELETE FROM specialist_workload WHERE active_tickets <= 0;
+        END
+    """,
+    "tickets_dashboard_ad": f"""
+        AFTER DELETE ON tickets
+        BEGIN
+          DELETE FROM dashboard_due_tickets WHERE ticket_id = old.id;
+          UPDATE specialist_workload SET active_tickets = active_tickets - 1
+          WHERE specialist_user_id = old.assigned_specialist_id AND {_ACTIVE_QUALIFIES.format(row="old")};
+          DELETE FROM specialist_workload WHERE active_tickets <= 0;
+        END
+    """,
+    "help_requests_dashboard_ai": """
+        AFTER INSERT ON ticket_help_requests
+        WHEN new.status = 'open'
+        BEGIN
+          INSERT OR REPLACE INTO dashboard_open_help (help_id, ticket_id, requested_at)
+          VALUES (new.id, new.ticket_id, new.requested_at);
+        END
+    """,
+    "help_requests_dashboard_au": """
+        AFTER UPDATE OF status ON ticket_help_requests
+        BEGIN
+          DELETE FROM dashboard_open_help WHERE help_id = old.id;
+          INSERT INTO dashboard_open_help (help_id, ticket_id, requested_at)
+          SELECT new.id, new.ticket_id, new.requested_at WHERE new.status = 'open';
+        END
+    """,
+    "help_requests_dashboard_ad": """
+        AFTER DELETE ON ticket_help_requests
+        BEGIN
+          DELETE FROM dashboard_open_help WHERE help_id = old.id;
+        END
+    """,
+}
+
+# The source of truth for each summary table, used by the reconciliation job.
+_EXPECTED = {
+    "dashboard_due_tickets": (
+        "ticket_id, due_at",
+        f"SELECT id, due_at FROM tickets WHERE {_DUE_QUALIFIES.format(row='tickets')}",
+    ),
+    "dashboard_open_help": (
+        "help_id, ticket_id, requested_at",
+        "SELECT id, ticket_id, requested_at FROM ticket_help_requests WHERE status = 'open'",
+    ),
+    "specialist_workload": (
+        "specialist_user_id, active_tickets",
+        f"""
+        SELECT assigned_specialist_id, COUNT(*)
+        FROM tickets
+        WHERE {_ACTIVE_QUALIFIES.format(row='tickets')}
+        GROUP BY assigned_specialist_id
+        """,
+    ),
+}
+
+
+@dataclass(frozen=True)
+class DashboardData:
+    overdue: list[sqlite3.Row]
+    help_requests: list[sqlite3.Row]
+    workload: list[sqlite3.Row]
+
+
+def ensure_dashboard_triggers(db: sqlite3.Connection) -> None:
+    for name, body in _TRIGGERS.items():
+        db.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+
+    # First run on an existing database: the triggers only see changes from now on.
+    needs_fill = db.execute(
+        """
+        SELECT
+          NOT EXISTS (SELECT 1 FROM dashboard_due_tickets)
+          AND NOT EXISTS (SELECT 1 FROM dashboard_open_help)
+          AND NOT EXISTS (SELECT 1 FROM specialist_workload)
+          AND (
+            EXISTS (SELECT 1 FROM tickets WHERE status != 'completed')
+            OR EXISTS (SELECT 1 FROM ticket_help_requests WHERE status = 'open')
+          )
+        """
+    ).fetchone()[0]
+    if needs_fill:
+        reconcile_dashboard(db)
+
+
+def reconcile_dashboard(db: sqlite3.Connection) -> dict[str, int]:
+    # Rebuilds every summary table from the base tables and reports how many rows were out of sync.
+    # Does not commit.
+    drift: dict[str, int] = {}
+    for table, (columns, expected_sql) in _EXPECTED.items():
+        missing = db.execute(f"SELECT COUNT(*) FROM ({expected_sql} EXCEPT SELECT {columns} FROM {table})").fetchone()[0]
+        extra = db.execute(f"SELECT COUNT(*) FROM (SELECT {columns} FROM {table} EXCEPT {expected_sql})").fetchone()[0]
+        drift[table] = int(missing) + int(extra)
+        if drift[table]:
+            db.execute(f"DELETE FROM {table}")
+            db.execute(f"INSERT INTO {table} ({columns}) {expected_sql}")
+    return drift
+
+
+def load_dashboard(db: sqlite3.Connection, *, limit: int = 200) -> DashboardData:
+    overdue = db.execute(
+        """
+        SELECT
+          t.id,
+          t.request_number,
+          t.due_at,
+          t.status,
+          u.full_name AS specialist_name
+        FROM dashboard_due_tickets d
+        JOIN tickets t ON t.id = d.ticket_id
+        LEFT JOIN users u ON u.id = t.assigned_specialist_id
+        WHERE d.due_at < datetime('now')
+        ORDER BY d.due_at ASC
+        LIMIT ?
+        """,
+        (limit,),
+    ).fetchall()
+
+    help_requests = db.execute(
+        """
+        SELECT
+          r.id,
+          r.ticket_id,
+          r.requested_at,
+          r.message,
+          t.request_number,
+          req.full_name AS requested_by_name
+        FROM dashboard_open_help h
+        JOIN ticket_help_requests r ON r.id = h.help_id
+        JOIN tickets t ON t.id = h.ticket_id
+        JOIN users req ON req.id = r.requested_by_user_id
+        ORDER BY h.requested_at DESC
+        LIMIT ?
+        """,
+        (limit,),
+    ).fetchall()
+
+    workload = db.execute(
+        """
+        SELECT u.id, u.full_name, w.active_tickets
+        FROM specialist_workload w
+        JOIN users u ON u.id = w.specialist_user_id
+        ORDER BY w.active_tickets DESC, u.full_name
+        LIMIT ?
+        """,
+        (limit,),
+    ).fetchall()
+
+    return DashboardData(overdue=overdue, help_requests=help_requests, workload=workload)
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import threading
+from typing import Iterable
+
+from flask import current_app
+from flask import has_app_context
+
+
+class BrokerFull(RuntimeError):
+    pass
+
+
+class Subscription:
+    def __init__(self, user_id: int) -> None:
+        self.user_id = user_id
+        self._event = threading.Event()
+
+    def notify(self) -> None:
+        self._event.set()
+
+    def wait(self, timeout: float) -> bool:
+        # True when something was published for this user since the previous wait.
+        fired = self._event.wait(timeout)
+        self._event.clear()
+        return fired
+
+
+class NotificationBroker:
+    # In-process pub/sub: events only say "something changed for this user"; subscribers read the
+    # current state from the database, so coalesced or missed signals never lose data.
+    def __init__(self, *, max_connections: int, max_per_user: int) -> None:
+        self.max_connections = max_connections
+        self.max_per_user = max_per_user
+        self._lock = threading.Lock()
+        self._subscribers: dict[int, list[Subscription]] = {}
+        self._count = 0
+        self._rejected = 0
+
+    def subscribe(self, user_id: int) -> Subscription:
+        with self._lock:
+            current = self._subscribers.setdefault(user_id, [])
+            if self._count >= self.max_connections or len(current) >= self.max_per_user:
+                self._rejected += 1
+                raise BrokerFull("too many notification streams")
+            subscription = Subscription(user_id)
+            current.append(subscription)
+            self._count += 1
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            current = self._subscribers.get(subscription.user_id, [])
+            if subscription in current:
+                current.remove(subscription)
+                self._count -= 1
+            if not current:
+                self._subscribers.pop(subscription.user_id, None)
+
+    def publish(self, user_ids: Iterable[int]) -> None:
+        with self._lock:
+            targets = [s for user_id in user_ids for s in self._subscribers.get(int(user_id), ())]
+        for subscription in targets:
+            subscription.notify()
+
+    @property
+    def connections(self) -> int:
+        return self._count
+
+    @property
+    def rejected(self) -> int:
+        return self._rejected
+
+
+_broker_lock = threading.Lock()
+
+# Every open stream or waiting long poll holds a request thread. With sync or threaded workers the
+# default cap is a quarter of the worker's threads, so live updates cannot starve ordinary pages.
+STREAM_THREAD_SHARE = 4
+
+
+def stream_connection_cap(config) -> int:
+    configured = config.get("NOTIFICATION_STREAM_MAX_CONNECTIONS")
+    if configured is not None:
+        return max(0, int(configured))
+    return max(1, int(config.get("WEB_WORKER_THREADS", 8)) // STREAM_THREAD_SHARE)
+
+
+def get_broker() -> NotificationBroker:
+    with _broker_lock:
+        broker: NotificationBroker | None = current_app.extensions.get("notification_broker")
+        if broker is None:
+            broker = NotificationBroker(
+                max_connections=stream_connection_cap(current_app.config),
+                max_per_user=int(current_app.config.get("NOTIFICATION_STREAM_MAX_PER_USER", 3)),
+            )
+            current_app.extensions["notification_broker"] = broker
+        return broker
+
+
+def publish_user_events(user_ids: Iterable[int]) -> None:
+    if not has_app_context():
+        return
+    broker: NotificationBroker | None = current_app.extensions.get("notification_broker")
+    if broker is not None:
+        broker.publish(user_ids)
@@ -1,10 +1,58 @@
 from __future__ import annotations
 
 import sqlite3
+from dataclasses import dataclass
+from typing import Iterable
 
+from flask import current_app
+from flask import has_app_context
+
+from app.cache import app_cache
+from app.services.notification_events import publish_user_events
+from app.services.user_cache import adjust_unread
 from app.utils import now_iso
 
 
+@dataclass(frozen=True)
+class NewNotification:
+    user_id: int
+    ticket_id: int | None
+    type_: str
+    message: str
+    created_at: str | None = None
+
+
+def insert_notifications(db: sqlite3.Connection, notifications: Iterable[NewNotification]) -> dict[int, int]:
+    # Does not commit: callers fold the rows into their own transaction and call notify_unread afterwards.
+    created_at = now_iso()
+    rows = [(n.user_id, n.ticket_id, n.type_, n.message, n.created_at or created_at) for n in notifications]
+    if rows:
+        db.executemany(
+            """
+            INSERT INTO notifications (user_id, ticket_id, type, message, is_read, created_at)
+            VALUES (?, ?, ?, ?, 0, ?)
+            """,
+            rows,
+        )
+
+    unread: dict[int, int] = {}
+    for row in rows:
+        unread[row[0]] = unread.get(row[0], 0) + 1
+    return unread
+
+
+def notify_unread(unread: dict[int, int]) -> None:
+    for user_id, count in unread.items():
+        adjust_unread(user_id, count)
+    publish_user_events(unread)
+
+
+def create_notifications(*, db: sqlite3.Connection, notifications: Iterable[NewNotification]) -> None:
+    unread = insert_notifications(db, notifications)
+    db.commit()
+    notify_unread(unread)
+
+
 def create_notification(
     *,
     db: sqlite3.Connection,
@@ -13,12 +61,67 @@ def create_notification(
     type_: str,
     message: str,
 ) -> None:
-    db.execute(
-        """
-        INSERT INTO notifications (user_id, ticket_id, type, message, is_read, created_at)
-        VALUES (?, ?, ?, ?, 0, ?)
-        """,
-        (user_id, ticket_id, type_, message, now_iso()),
+    create_notifications(
+        db=db,
+        notifications=[NewNotification(user_id=user_id, ticket_id=ticket_id, type_=type_, message=message)],
     )
-    db.commit()
 
+
+def recipient_ids(db: sqlite3.Connection, roles: Iterable[str]) -> tuple[int, ...]:
+    # Active users per role change only through the admin pages, which clear this cache.
+    cache = None
+    if has_app_context() and current_app.config.get("NOTIFICATION_RECIPIENTS_CACHE_ENABLED", True):
+        cache = app_cache(
+            "notification_recipients",
+            maxsize=16,
+            ttl=float(current_app.config.get("NOTIFICATION_RECIPIENTS_TTL", 60)),
+        )
+
+    result: list[int] = []
+    for role in roles:
+        ids = cache.get(role) if cache is not None else None
+        if ids is None:
+            rows = db.execute(
+                "SELECT id FROM users WHERE role = ? AND is_active = 1 ORDER BY id",
+                (role,),
+            ).fetchall()
+            ids = tuple(int(row["id"]) for row in rows)
+            if cache is not None:
+                cache.set(role, ids)
+        result.extend(ids)
+    return tuple(result)
+
+
+def archive_read_notifications(db: sqlite3.Connection, *, older_than: str, batch_size: int = 1000) -> int:
+    # Moves read notifications into the cold table in short transactions, so writers are never blocked for long.
+    # Archived rows keep their ids; tickets may be deleted later, so the archive has no foreign keys.
+    archived = 0
+    while True:
+        ids = [
+            int(row["id"])
+            for row in db.execute(
+                """
+                SELECT id FROM notifications
+                WHERE is_read = 1 AND created_at < ?
+                ORDER BY id
+                LIMIT ?
+                """,
+                (older_than, batch_size),
+            ).fetchall()
+        ]
+        if not ids:
+            break
+        placeholders = ", ".join("?" for _ in ids)
+        db.execute(
+            f"""
+            INSERT OR REPLACE INTO notifications_archive (id, user_id, ticket_id, type, message, created_at, archived_at)
+            SELECT id, user_id, ticket_id, type, message, created_at, ?
+            FROM notifications
+            WHERE id IN ({placeholders})
+            """,
+            (now_iso(), *ids),
+        )
+        db.execute(f"DELETE FROM notifications WHERE id IN ({placeholders})", ids)
+        db.commit()
+        archived += len(ids)
+    return archived
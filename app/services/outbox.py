@@ -0,0 +1,390 @@
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from datetime import timedelta
+from typing import Iterable
+
+import click
+from flask import Flask
+from flask import current_app
+
+from app.services.notifications import NewNotification
+from app.services.notifications import insert_notifications
+from app.services.notifications import notify_unread
+from app.services.notifications import recipient_ids
+from app.utils import now_iso
+
+logger = logging.getLogger(__name__)
+
+DELIVERY_MODES = ("sync", "thread", "external")
+
+_worker_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class OutboxStats:
+    pending: int
+    retrying: int
+    dead: int
+    oldest_pending_seconds: float
+    high_water: int
+    delivered_events: int
+    delivered_notifications: int
+    batches: int
+    failed_batches: int
+    inline_drains: int
+    last_error: str | None
+
+
+class _Metrics:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.delivered_events = 0
+        self.delivered_notifications = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self.inline_drains = 0
+        self.last_error: str | None = None
+
+
+class OutboxWorker:
+    def __init__(self, app: Flask, *, batch_size: int, poll_interval: float) -> None:
+        self.app = app
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="notification-outbox", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def stop(self, timeout: float | None = 5.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+
+    @property
+    def alive(self) -> bool:
+        return self._thread.is_alive()
+
+    def _run(self) -> None:
+        from app.db import get_db
+
+        while not self._stop.is_set():
+            delivered = 0
+            try:
+                with self.app.app_context():
+                    delivered = drain_outbox(get_db(), batch_size=self.batch_size)
+            except Exception:
+                logger.exception("Notification outbox worker failed")
+            if delivered < self.batch_size:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+
+def _metrics() -> _Metrics:
+    return current_app.extensions.setdefault("notification_outbox_metrics", _Metrics())
+
+
+def _delivery_mode() -> str:
+    mode = str(current_app.config.get("NOTIFICATION_DELIVERY", "thread"))
+    if mode not in DELIVERY_MODES:
+        raise ValueError(f"Unknown NOTIFICATION_DELIVERY mode: {mode!r}")
+    return mode
+
+
+def _batch_size() -> int:
+    return int(current_app.config.get("NOTIFICATION_OUTBOX_BATCH_SIZE", 100))
+
+
+def enqueue_notification(
+    db: sqlite3.Connection,
+    *,
+    ticket_id: int | None,
+    type_: str,
+    message: str,
+    user_ids: Iterable[int] = (),
+    roles: Iterable[str] = (),
+) -> None:
+    # One row per event regardless of the number of recipients; roles are resolved by the worker.
+    # Does not commit: the event becomes visible together with the caller's own changes.
+    payload = {"user_ids": sorted({int(user_id) for user_id in user_ids}), "roles": sorted(set(roles))}
+    if not payload["user_ids"] and not payload["roles"]:
+        return
+    created_at = now_iso()
+    db.execute(
+        """
+        INSERT INTO notification_outbox (ticket_id, type, message, recipients, created_at, available_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+        """,
+        (ticket_id, type_, message, json.dumps(payload), created_at, created_at),
+    )
+
+
+def _resolve_recipients(db: sqlite3.Connection, rows: list[sqlite3.Row]) -> list[NewNotification]:
+    payloads = [json.loads(row["recipients"]) for row in rows]
+
+    explicit_ids = {int(user_id) for payload in payloads for user_id in payload.get("user_ids", ())}
+    existing: set[int] = set()
+    if explicit_ids:
+        placeholders = ", ".join("?" for _ in explicit_ids)
+        existing = {
+            int(r["id"]) for r in db.execute(f"SELECT id FROM users WHERE id IN ({placeholders})", tuple(explicit_ids))
+        }
+
+    notifications: list[NewNotification] = []
+    for row, payload in zip(rows, payloads):
+        user_ids = [int(user_id) for user_id in payload.get("user_ids", ()) if int(user_id) in existing]
+        user_ids.extend(recipient_ids(db, payload.get("roles", ())))
+        for user_id in dict.fromkeys(user_ids):
+            notifications.append(
+                NewNotification(
+                    user_id=user_id,
+                    ticket_id=row["ticket_id"],
+                    type_=row["type"],
+                    message=row["message"],
+                    created_at=row["created_at"],
+                )
+            )
+    return notifications
+
+
+def _try_deliver(db: sqlite3.Connection, condition: str, params: tuple) -> tuple[list[sqlite3.Row], Exception | None]:
+    # At-least-once: events are claimed with DELETE ... RETURNING in the same transaction that writes
+    # the notifications, so a crash before COMMIT leaves them queued and two drains never share a row.
+    rows: list[sqlite3.Row] = []
+    try:
+        rows = sorted(
+            db.execute(
+                f"""
+                DELETE FROM notification_outbox
+                WHERE id IN (SELECT id FROM notification_outbox WHERE {condition})
+                RETURNING id, ticket_id, type, message, recipients, created_at, attempts
+                """,
+                params,
+            ).fetchall(),
+            key=lambda row: int(row["id"]),
+        )
+        if not rows:
+            db.rollback()
+            return rows, None
+        notifications = _resolve_recipients(db, rows)
+        unread = insert_notifications(db, notifications)
+        db.commit()
+    except Exception as exc:
+        db.rollback()
+        if not rows:
+            raise
+        return rows, exc
+
+    notify_unread(unread)
+    metrics = _metrics()
+    with metrics.lock:
+        metrics.batches += 1
+        metrics.delivered_events += len(rows)
+        metrics.delivered_notifications += len(notifications)
+    return rows, None
+
+
+def drain_outbox(db: sqlite3.Connection, *, batch_size: int = 100) -> int:
+    rows, error = _try_deliver(db, "available_at <= ? ORDER BY id LIMIT ?", (now_iso(), batch_size))
+    if error is None:
+        return len(rows)
+
+    metrics = _metrics()
+    with metrics.lock:
+        metrics.failed_batches += 1
+        metrics.last_error = str(error)
+    logger.warning("Notification outbox batch failed: %s", error)
+    if len(rows) == 1:
+        _postpone(db, rows, error)
+        return 0
+
+    # Retry the batch event by event, so one bad event does not hold back the rest.
+    delivered = 0
+    for row in rows:
+        single, single_error = _try_deliver(db, "id = ?", (int(row["id"]),))
+        if single_error is not None:
+            _postpone(db, single, single_error)
+        else:
+            delivered += len(single)
+    return delivered
+
+
+def _postpone(db: sqlite3.Connection, rows: list[sqlite3.Row], error: Exception) -> None:
+    # Events that used up NOTIFICATION_OUTBOX_MAX_ATTEMPTS move to notification_outbox_dead
+    # and are no longer drained; the rest wait for the next attempt with a growing delay.
+    max_attempts = int(current_app.config.get("NOTIFICATION_OUTBOX_MAX_ATTEMPTS", 10))
+    dead: list[sqlite3.Row] = []
+    retry: list[sqlite3.Row] = []
+    for row in rows:
+        if 0 < max_attempts <= int(row["attempts"]) + 1:
+            dead.append(row)
+        else:
+            retry.append(row)
+
+    if retry:
+        ids = [int(row["id"]) for row in retry]
+        placeholders = ", ".join("?" for _ in ids)
+        retry_at = (datetime.now() + timedelta(seconds=_retry_delay(retry))).strftime("%Y-%m-%d %H:%M:%S")
+        db.execute(
+            f"""
+            UPDATE notification_outbox
+            SET attempts = attempts + 1, last_error = ?, available_at = ?
+            WHERE id IN ({placeholders})
+            """,
+            (str(error), retry_at, *ids),
+        )
+    if dead:
+        ids = [int(row["id"]) for row in dead]
+        placeholders = ", ".join("?" for _ in ids)
+        db.execute(
+            f"""
+            INSERT INTO notification_outbox_dead (
+              id, ticket_id, type, message, recipients, created_at, attempts, last_error, failed_at
+            )
+            SELECT id, ticket_id, type, message, recipients, created_at, attempts + 1, ?, ?
+            FROM notification_outbox
+            WHERE id IN ({placeholders})
+            """,
+            (str(error), now_iso(), *ids),
+        )
+        db.execute(f"DELETE FROM notification_outbox WHERE id IN ({placeholders})", ids)
+        logger.error("Notification outbox events moved to dead letters after %s attempts: %s", max_attempts, ids)
+    db.commit()
+
+
+def _retry_delay(rows: list[sqlite3.Row]) -> float:
+    base = float(current_app.config.get("NOTIFICATION_OUTBOX_RETRY_DELAY", 5))
+    attempts = max(int(row["attempts"]) for row in rows)
+    return min(base * (2**attempts), 600.0)
+
+
+def _backlog_exceeds(db: sqlite3.Connection, high_water: int) -> bool:
+    row = db.execute("SELECT 1 FROM notification_outbox ORDER BY id LIMIT 1 OFFSET ?", (high_water,)).fetchone()
+    return row is not None
+
+
+def _worker() -> OutboxWorker:
+    with _worker_lock:
+        worker: OutboxWorker | None = current_app.extensions.get("notification_outbox_worker")
+        if worker is None or not worker.alive:
+            worker = OutboxWorker(
+                current_app._get_current_object(),  # type: ignore[attr-defined]
+                batch_size=_batch_size(),
+                poll_interval=float(current_app.config.get("NOTIFICATION_OUTBOX_POLL_INTERVAL", 2.0)),
+            )
+            current_app.extensions["notification_outbox_worker"] = worker
+            worker.start()
+        return worker
+
+
+def dispatch_notifications(db: sqlite3.Connection) -> None:
+    # Called after the caller's COMMIT.
+    mode = _delivery_mode()
+    if mode == "sync":
+        while drain_outbox(db, batch_size=_batch_size()):
+            pass
+        return
+
+    high_water = int(current_app.config.get("NOTIFICATION_OUTBOX_HIGH_WATER", 1000))
+    if high_water > 0 and _backlog_exceeds(db, high_water):
+        # Back-pressure: producers help draining instead of growing the queue without bound.
+        metrics = _metrics()
+        with metrics.lock:
+            metrics.inline_drains += 1
+        drain_outbox(db, batch_size=_batch_size())
+
+    if mode == "thread":
+        _worker().wake()
+
+
+def stop_outbox_worker(app: Flask) -> None:
+    worker: OutboxWorker | None = app.extensions.pop("notification_outbox_worker", None)
+    if worker is not None:
+        worker.stop()
+
+
+def outbox_stats(db: sqlite3.Connection) -> OutboxStats:
+    row = db.execute(
+        """
+        SELECT
+          COUNT(*) AS pending,
+          COALESCE(SUM(attempts > 0), 0) AS retrying,
+          MIN(created_at) AS oldest
+        FROM notification_outbox
+        """
+    ).fetchone()
+    dead = db.execute("SELECT COUNT(*) FROM notification_outbox_dead").fetchone()[0]
+    oldest_seconds = 0.0
+    if row["oldest"] is not None:
+        oldest = datetime.strptime(row["oldest"], "%Y-%m-%d %H:%M:%S")
+        oldest_seconds = max(0.0, (datetime.now() - oldest).total_seconds())
+
+    metrics = _metrics()
+    with metrics.lock:
+        return OutboxStats(
+            pending=int(row["pending"]),
+            retrying=int(row["retrying"]),
+            dead=int(dead),
+            oldest_pending_seconds=oldest_seconds,
+            high_water=int(current_app.config.get("NOTIFICATION_OUTBOX_HIGH_WATER", 1000)),
+            delivered_events=metrics.delivered_events,
+            delivered_notifications=metrics.delivered_notifications,
+            batches=metrics.batches,
+            failed_batches=metrics.failed_batches,
+            inline_drains=metrics.inline_drains,
+            last_error=metrics.last_error,
+        )
+
+
+@click.command("notifications-worker")
+@click.option("--once", is_flag=True, help="Deliver everything that is due and exit")
+@click.option("--stats", "show_stats", is_flag=True, help="Print queue metrics and exit")
+@click.option("--batch-size", type=int, default=None, help="Events per transaction")
+@click.option("--poll-interval", type=float, default=2.0, show_default=True)
+def notifications_worker_command(once: bool, show_stats: bool, batch_size: int | None, poll_interval: float) -> None:
+    from app.db import close_db
+    from app.db import get_db
+
+    batch_size = batch_size or _batch_size()
+    if batch_size <= 0:
+        raise click.BadParameter("--batch-size must be > 0")
+
+    if show_stats:
+        stats = outbox_stats(get_db())
+        click.echo(
+            f"В очереди: {stats.pending} (повторы: {stats.retrying}), не доставлено: {stats.dead}, "
+            f"старейшее событие: {stats.oldest_pending_seconds:.0f} с, порог: {stats.high_water}"
+        )
+        return
+
+    delivered = 0
+    try:
+        while True:
+            count = drain_outbox(get_db(), batch_size=batch_size)
+            delivered += count
+            if count:
+                continue
+            if once:
+                break
+            close_db()
+            time.sleep(poll_interval)
+    except KeyboardInterrupt:
+        pass
+    click.echo(f"[OK] Доставлено событий: {delivered}")
+
+
+def init_app(app: Flask) -> None:
+    app.cli.add_command(notifications_worker_command)
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import time
+from datetime import datetime
+from datetime import timezone
+from typing import Any
+from typing import Callable
+from typing import Iterable
+
+from flask import Response
+from flask import current_app
+from flask import flash
+from flask import g
+from flask import render_template
+from flask import request
+from flask import session
+
+from app.cache import app_cache
+
+# Writes to these tables change what the cached pages show; each one bumps data_versions.version.
+VERSIONED_TABLES = (
+    "tickets",
+    "status_history",
+    "ticket_comments",
+    "ticket_parts",
+    "ticket_specialists",
+    "ticket_help_requests",
+    "ticket_reviews",
+    "ticket_due_history",
+)
+
+_NOW_EPOCH = "CAST(strftime('%s', 'now') AS INTEGER)"
+_BUMP_SQL = f"UPDATE data_versions SET version = version + 1, changed_at = {_NOW_EPOCH} WHERE scope = 'app';"
+
+
+def ensure_data_version_triggers(db: sqlite3.Connection) -> None:
+    db.execute(f"INSERT OR IGNORE INTO data_versions (scope, version, changed_at) VALUES ('app', 0, {_NOW_EPOCH})")
+    for table in VERSIONED_TABLES:
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            db.execute(
+                f"""
+                CREATE TRIGGER IF NOT EXISTS {table}_data_version_{event.lower()} AFTER {event} ON {table}
+                BEGIN
+                  {_BUMP_SQL}
+                END
+                """
+            )
+    # Only columns that appear on pages: the unread counter is updated on every notification.
+    db.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS users_data_version_update
+        AFTER UPDATE OF username, full_name, role, is_active ON users
+        BEGIN
+          {_BUMP_SQL}
+        END
+        """
+    )
+    for event in ("INSERT", "DELETE"):
+        db.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS users_data_version_{event.lower()} AFTER {event} ON users
+            BEGIN
+              {_BUMP_SQL}
+            END
+            """
+        )
+
+
+def bump_data_version(db: sqlite3.Connection) -> None:
+    # For writes made with the triggers suspended (bulk loads).
+    db.execute(_BUMP_SQL)
+
+
+def data_version(db: sqlite3.Connection) -> tuple[int, int]:
+    row = db.execute("SELECT version, changed_at FROM data_versions WHERE scope = 'app'").fetchone()
+    if row is None:
+        return 0, 0
+    return int(row["version"]), int(row["changed_at"])
+
+
+def _render_content_block(template_name: str, context: dict[str, Any]) -> str:
+    template = current_app.jinja_env.get_template(template_name)
+    current_app.update_template_context(context)
+    return "".join(template.blocks["content"](template.new_context(context)))
+
+
+def _digest(parts: Iterable[Any]) -> str:
+    raw = json.dumps(list(parts), ensure_ascii=False, default=str, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+
+def render_cached_page(
+    template_name: str,
+    build: Callable[[], dict[str, Any]],
+    *,
+    vary: Iterable[Any] = (),
+) -> Response:
+    # build() runs the queries and returns the template context; it is skipped on a 304 or a fragment hit.
+    # vary lists what the content depends on besides the data version and query string (role, user id, ...).
+    from app.db import get_db
+
+    config = current_app.config
+    version, changed_at = data_version(get_db())
+    bucket_seconds = int(config.get("PAGE_CACHE_TIME_BUCKET", 60))
+    # Pages compare due dates with the clock, so cached copies also expire with the time bucket.
+    time_bucket = int(time.time() // bucket_seconds) if bucket_seconds > 0 else 0
+    content_key = _digest([template_name, version, time_bucket, *vary, sorted(request.args.items(multi=True))])
+
+    has_flashes = bool(session.get("_flashes"))
+    etag = _digest([content_key, g.user["id"] if g.user else None, g.get("unread_notifications", 0)])
+    conditional = config.get("PAGE_CACHE_ENABLED", True) and not has_flashes
+    if conditional and etag in request.if_none_match:
+        response = Response(status=304)
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "private, no-cache"
+        return response
+
+    cache = None
+    if config.get("PAGE_FRAGMENT_CACHE_ENABLED", True):
+        cache = app_cache(
+            "page_fragments",
+            maxsize=int(config.get("PAGE_FRAGMENT_CACHE_SIZE", 256)),
+            ttl=float(config.get("PAGE_FRAGMENT_CACHE_TTL", 300)),
+        )
+
+    cached = cache.get(content_key) if cache is not None else None
+    if cached is not None:
+        fragment, messages = cached
+        for category, message in messages:
+            flash(message, category)
+    else:
+        flashed_before = len(session.get("_flashes", []))
+        context = build()
+        fragment = _render_content_block(template_name, dict(context))
+        messages = tuple(tuple(item) for item in session.get("_flashes", [])[flashed_before:])
+        if cache is not None:
+            cache.set(content_key, (fragment, messages))
+    # Messages flashed while building are consumed by this response, so it must not be revalidated later.
+    conditional = conditional and not messages
+
+    response = Response(render_template("cached_page.html", fragment=fragment))
+    if conditional:
+        response.set_etag(etag)
+        if changed_at:
+            response.last_modified = datetime.fromtimestamp(changed_at, tz=timezone.utc)
+        response.headers["Cache-Control"] = "private, no-cache"
+    else:
+        response.headers["Cache-Control"] = "no-store"
+    return response
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import hashlib
+import importlib
+import io
+import os
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from types import ModuleType
+
+from flask import current_app
+from flask import has_app_context
+
+from app.cache import app_cache
+from app.utils import FEEDBACK_FORM_URL
+
+QR_FORMATS: dict[str, str] = {
+    "svg": "image/svg+xml",
+    "png": "image/png",
+}
+QR_SCALE = 5
+QR_BORDER = 2
+
+_segno: ModuleType | None = None
+_segno_checked = False
+
+
+@dataclass(frozen=True)
+class QRImage:
+    data: bytes
+    mimetype: str
+    etag: str
+
+
+def feedback_url(request_number: str) -> str:
+    return f"{FEEDBACK_FORM_URL}&ticket={request_number}"
+
+
+def _load_segno() -> ModuleType | None:
+    global _segno, _segno_checked
+    if not _segno_checked:
+        try:
+            _segno = importlib.import_module("segno")
+        except ImportError:
+            _segno = None
+        _segno_checked = True
+    return _segno
+
+
+def qr_available() -> bool:
+    return _load_segno() is not None
+
+
+def qr_etag(payload: str, kind: str) -> str:
+    # Content address: everything the image depends on, so the tag is known without rendering.
+    source = f"{kind}:{QR_SCALE}:{QR_BORDER}:{payload}".encode("utf-8")
+    return hashlib.sha256(source).hexdigest()[:32]
+
+
+def _render(payload: str, kind: str) -> bytes:
+    segno = _load_segno()
+    assert segno is not None
+    buffer = io.BytesIO()
+    options = {"xmldecl": False} if kind == "svg" else {}
+    segno.make(payload).save(buffer, kind=kind, scale=QR_SCALE, border=QR_BORDER, **options)
+    return buffer.getvalue()
+
+
+def _disk_path(etag: str, kind: str) -> Path | None:
+    if not has_app_context():
+        return None
+    directory = current_app.config.get("QR_CACHE_DIR")
+    if not directory:
+        return None
+    return Path(directory) / f"{etag}.{kind}"
+
+
+def _read_disk(path: Path | None) -> bytes | None:
+    if path is None:
+        return None
+    try:
+        return path.read_bytes()
+    except OSError:
+        return None
+
+
+def _write_disk(path: Path | None, data: bytes) -> None:
+    if path is None:
+        return
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "wb") as tmp:
+            tmp.write(data)
+        os.replace(tmp_name, path)
+    except OSError:
+        pass
+
+
+def render_qr(payload: str, kind: str = "svg") -> QRImage | None:
+    if kind not in QR_FORMATS or not qr_available():
+        return None
+
+    etag = qr_etag(payload, kind)
+
+    def build() -> bytes:
+        path = _disk_path(etag, kind)
+        data = _read_disk(path)
+        if data is None:
+            data = _render(payload, kind)
+            _write_disk(path, data)
+        return data
+
+    if has_app_context():
+        cache = app_cache("qr_codes", maxsize=int(current_app.config.get("QR_CACHE_SIZE", 512)))
+        data = cache.get_or_set(etag, build)
+    else:
+        data = build()
+    return QRImage(data=data, mimetype=QR_FORMATS[kind], etag=etag)
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import sqlite3
+from dataclasses import dataclass
+from typing import Iterable
+
+SEARCH_COLUMNS: tuple[str, ...] = (
+    "request_number",
+    "customer_full_name",
+    "customer_phone",
+    "equipment_type",
+    "device_model",
+)
+
+# The trigram tokenizer cannot answer queries shorter than one trigram.
+FTS_MIN_TOKEN_LENGTH = 3
+
+
+@dataclass(frozen=True)
+class SearchFilter:
+    clauses: list[str]
+    params: list[object]
+    match: str | None
+
+
+def ensure_search_index(db: sqlite3.Connection) -> bool:
+    if search_index_available(db):
+        return True
+
+    columns = ", ".join(SEARCH_COLUMNS)
+    new_columns = ", ".join(f"new.{column}" for column in SEARCH_COLUMNS)
+    old_columns = ", ".join(f"old.{column}" for column in SEARCH_COLUMNS)
+    try:
+        db.execute(
+            f"""
+            CREATE VIRTUAL TABLE tickets_fts USING fts5(
+              {columns},
+              content='tickets',
+              content_rowid='id',
+              tokenize='trigram'
+            )
+            """
+        )
+    except sqlite3.OperationalError:
+        return False
+
+    db.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS tickets_fts_ai AFTER INSERT ON tickets BEGIN
+          INSERT INTO tickets_fts (rowid, {columns}) VALUES (new.id, {new_columns});
+        END
+        """
+    )
+    db.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS tickets_fts_ad AFTER DELETE ON tickets BEGIN
+          INSERT INTO tickets_fts (tickets_fts, rowid, {columns}) VALUES ('delete', old.id, {old_columns});
+        END
+        """
+    )
+    db.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS tickets_fts_au AFTER UPDATE OF {columns} ON tickets BEGIN
+          INSERT INTO tickets_fts (tickets_fts, rowid, {columns}) VALUES ('delete', old.id, {old_columns});
+          INSERT INTO tickets_fts (rowid, {columns}) VALUES (new.id, {new_columns});
+        END
+        """
+    )
+    db.execute("INSERT INTO tickets_fts (tickets_fts) VALUES ('rebuild')")
+    return True
+
+
+def search_index_available(db: sqlite3.Connection) -> bool:
+    row = db.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tickets_fts'").fetchone()
+    return row is not None
+
+
+def build_search_filter(tokens: Iterable[str], *, use_fts: bool, alias: str = "t") -> SearchFilter:
+    clauses: list[str] = []
+    params: list[object] = []
+    fts_terms: list[str] = []
+
+    for token in tokens:
+        if use_fts and len(token) >= FTS_MIN_TOKEN_LENGTH:
+            fts_terms.append('"' + token.replace('"', '""') + '"')
+            continue
+        clauses.append("(" + " OR ".join(f"{alias}.{column} LIKE ?" for column in SEARCH_COLUMNS) + ")")
+        like = f"%{token}%"
+        params.extend([like] * len(SEARCH_COLUMNS))
+
+    match = " AND ".join(fts_terms) if fts_terms else None
+    return SearchFilter(clauses=clauses, params=params, match=match)
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
+import sqlite3
 from dataclasses import dataclass
+from typing import Iterable
 
 from app.utils import parse_iso
 
@@ -12,25 +14,47 @@ class StatisticsResult:
     fault_type_counts: dict[str, int]
 
 
+FAULT_TYPE_KEYWORDS: dict[str, tuple[str, ...]] = {
+    "Не включается": ("не включ", "не запуска", "нет питания", "не горит"),
+    "Шум/вибрация": ("шум", "гуд", "вибрац", "стук"),
+    "Не охлаждает": ("не охлажд", "плохо охлажд", "теплый воздух"),
+    "Не греет": ("не греет", "плохо греет"),
+    "Протечка": ("теч", "капает", "конденсат", "вода"),
+    "Запах": ("запах", "воняет"),
+    "Ошибка/код": ("ошибк", "код", "error", "err"),
+}
+DEFAULT_FAULT_TYPE = "Другое"
+
+# Flattened once in priority order: the first matching keyword gives the label of the first matching group.
+# Plain substring checks beat a compiled alternation regex on descriptions of this length
+# (see tools/bench_fault_matcher.py), so the scan stays a single loop over this tuple.
+_FAULT_KEYWORDS: tuple[tuple[str, str], ...] = tuple(
+    (part, label) for label, parts in FAULT_TYPE_KEYWORDS.items() for part in parts
+)
+
+
 def categorize_fault_type(problem_description: str) -> str:
     text = (problem_description or "").lower()
 
-    keywords: dict[str, tuple[str, ...]] = {
-        "Не включается": ("не включ", "не запуска", "нет питания", "не горит"),
-        "Шум/вибрация": ("шум", "гуд", "вибрац", "стук"),
-        "Не охлаждает": ("не охлажд", "плохо охлажд", "теплый воздух"),
-        "Не греет": ("не греет", "плохо греет"),
-        "Протечка": ("теч", "капает", "конденсат", "вода"),
-        "Запах": ("запах", "воняет"),
-        "Ошибка/код": ("ошибк", "код", "error", "err"),
-    }
+    for part, label in _FAULT_KEYWORDS:
+        if part in text:
+            return label
+
+    return DEFAULT_FAULT_TYPE
 
-    for label, parts in keywords.items():
-        for part in parts:
-            if part in text:
-                return label
 
-    return "Другое"
+def categorize_many(problem_descriptions: Iterable[str]) -> list[str]:
+    # Identical descriptions are common (templates, seed data), so each distinct text is matched once.
+    seen: dict[str, str] = {}
+    result: list[str] = []
+    for description in problem_descriptions:
+        key = description or ""
+        label = seen.get(key)
+        if label is None:
+            label = categorize_fault_type(key)
+            seen[key] = label
+        result.append(label)
+    return result
 
 
 def calculate_statistics(rows: list[dict]) -> StatisticsResult:
@@ -56,3 +80,66 @@ def calculate_statistics(rows: list[dict]) -> StatisticsResult:
 
     average = (sum_seconds / completed) if completed else 0.0
     return StatisticsResult(completed_count=completed, average_seconds=average, fault_type_counts=fault_counts)
+
+
+def backfill_fault_categories(db: sqlite3.Connection, *, only_missing: bool = True, batch_size: int = 500) -> int:
+    where = "WHERE fault_category IS NULL AND id > ?" if only_missing else "WHERE id > ?"
+    updated = 0
+    last_id = 0
+    while True:
+        rows = db.execute(
+            f"SELECT id, problem_description FROM tickets {where} ORDER BY id LIMIT ?",
+            (last_id, batch_size),
+        ).fetchall()
+        if not rows:
+            break
+        labels = categorize_many(str(row["problem_description"] or "") for row in rows)
+        db.executemany(
+            "UPDATE tickets SET fault_category = ? WHERE id = ?",
+            [(label, int(row["id"])) for label, row in zip(labels, rows)],
+        )
+        db.commit()
+        updated += len(rows)
+        last_id = int(rows[-1]["id"])
+    return updated
+
+
+def calculate_statistics_sql(db: sqlite3.Connection, date_from_iso: str, date_to_iso: str) -> StatisticsResult:
+    # Categories are stored at write time; rows not yet backfilled are classified from their description.
+    rows = db.execute(
+        """
+        SELECT
+          fault_category,
+          CASE WHEN fault_category IS NULL THEN problem_description END AS uncategorized_description,
+          COUNT(*) AS cnt,
+          SUM(duration) AS total_seconds
+        FROM (
+          SELECT
+            fault_category,
+            problem_description,
+            ROUND((julianday(completed_at) - julianday(created_at)) * 86400) AS duration
+          FROM tickets
+          WHERE status = 'completed'
+            AND completed_at IS NOT NULL
+            AND completed_at BETWEEN ? AND ?
+        )
+        WHERE duration >= 0
+        GROUP BY fault_category, uncategorized_description
+        """,
+        (date_from_iso, date_to_iso),
+    ).fetchall()
+
+    completed = 0
+    sum_seconds = 0.0
+    fault_counts: dict[str, int] = {}
+    for row in rows:
+        count = int(row["cnt"])
+        completed += count
+        sum_seconds += float(row["total_seconds"])
+        fault_type = row["fault_category"]
+        if fault_type is None:
+            fault_type = categorize_fault_type(str(row["uncategorized_description"] or ""))
+        fault_counts[fault_type] = fault_counts.get(fault_type, 0) + count
+
+    average = (sum_seconds / completed) if completed else 0.0
+    return StatisticsResult(completed_count=completed, average_seconds=average, fault_type_counts=fault_counts)
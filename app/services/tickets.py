@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any
+from typing import Mapping
+
+
+@dataclass(frozen=True)
+class TicketAggregate:
+    ticket: Mapping[str, Any]
+    assistants: tuple[Mapping[str, Any], ...]
+    due_history: tuple[Mapping[str, Any], ...]
+    help_requests: tuple[Mapping[str, Any], ...]
+    review: Mapping[str, Any] | None
+    comments: tuple[Mapping[str, Any], ...]
+    parts: tuple[Mapping[str, Any], ...]
+    history: tuple[Mapping[str, Any], ...]
+
+    @property
+    def assistant_ids(self) -> frozenset[int]:
+        return frozenset(int(row["id"]) for row in self.assistants)
+
+    def is_worker(self, user_id: int) -> bool:
+        return self.ticket["assigned_specialist_id"] == user_id or user_id in self.assistant_ids
+
+
+# All child collections are folded into JSON arrays by correlated subqueries,
+# so the whole detail page costs a single round trip.
+TICKET_AGGREGATE_SQL = """
+SELECT
+  t.*,
+  u.full_name AS specialist_name,
+  (
+    SELECT json_group_array(json_object('id', x.id, 'full_name', x.full_name))
+    FROM (
+      SELECT su.id, su.full_name
+      FROM ticket_specialists ts
+      JOIN users su ON su.id = ts.specialist_user_id
+      WHERE ts.ticket_id = t.id
+      ORDER BY su.full_name
+    ) x
+  ) AS assistants_json,
+  (
+    SELECT json_group_array(json_object(
+      'id', x.id, 'ticket_id', x.ticket_id, 'old_due_at', x.old_due_at, 'new_due_at', x.new_due_at,
+      'changed_by_user_id', x.changed_by_user_id, 'changed_at', x.changed_at,
+      'customer_agreed', x.customer_agreed, 'comment', x.comment, 'full_name', x.full_name
+    ))
+    FROM (
+      SELECT h.*, hu.full_name
+      FROM ticket_due_history h
+      JOIN users hu ON hu.id = h.changed_by_user_id
+      WHERE h.ticket_id = t.id
+      ORDER BY h.changed_at DESC
+    ) x
+  ) AS due_history_json,
+  (
+    SELECT json_group_array(json_object(
+      'id', x.id, 'ticket_id', x.ticket_id, 'requested_by_user_id', x.requested_by_user_id,
+      'requested_at', x.requested_at, 'message', x.message, 'status', x.status,
+      'resolved_by_user_id', x.resolved_by_user_id, 'resolved_at', x.resolved_at,
+      'resolution_comment', x.resolution_comment,
+      'requested_by_name', x.requested_by_name, 'resolved_by_name', x.resolved_by_name
+    ))
+    FROM (
+      SELECT r.*, req.full_name AS requested_by_name, res.full_name AS resolved_by_name
+      FROM ticket_help_requests r
+      JOIN users req ON req.id = r.requested_by_user_id
+      LEFT JOIN users res ON res.id = r.resolved_by_user_id
+      WHERE r.ticket_id = t.id
+      ORDER BY r.requested_at DESC
+    ) x
+  ) AS help_requests_json,
+  (
+    SELECT json_object(
+      'id', rv.id, 'ticket_id', rv.ticket_id, 'rating', rv.rating, 'comment', rv.comment,
+      'source', rv.source, 'recorded_by_user_id', rv.recorded_by_user_id, 'created_at', rv.created_at,
+      'recorded_by_name', ru.full_name
+    )
+    FROM ticket_reviews rv
+    JOIN users ru ON ru.id = rv.recorded_by_user_id
+    WHERE rv.ticket_id = t.id
+  ) AS review_json,
+  (
+    SELECT json_group_array(json_object(
+      'id', x.id, 'ticket_id', x.ticket_id, 'user_id', x.user_id, 'body', x.body,
+      'created_at', x.created_at, 'full_name', x.full_name
+    ))
+    FROM (
+      SELECT c.*, cu.full_name
+      FROM ticket_comments c
+      JOIN users cu ON cu.id = c.user_id
+      WHERE c.ticket_id = t.id
+      ORDER BY c.created_at DESC
+    ) x
+  ) AS comments_json,
+  (
+    SELECT json_group_array(json_object(
+      'id', x.id, 'ticket_id', x.ticket_id, 'part_name', x.part_name, 'quantity', x.quantity,
+      'created_by_user_id', x.created_by_user_id, 'created_at', x.created_at, 'full_name', x.full_name
+    ))
+    FROM (
+      SELECT p.*, pu.full_name
+      FROM ticket_parts p
+      JOIN users pu ON pu.id = p.created_by_user_id
+      WHERE p.ticket_id = t.id
+      ORDER BY p.created_at DESC
+    ) x
+  ) AS parts_json,
+  (
+    SELECT json_group_array(json_object(
+      'id', x.id, 'ticket_id', x.ticket_id, 'old_status', x.old_status, 'new_status', x.new_status,
+      'changed_by_user_id', x.changed_by_user_id, 'changed_at', x.changed_at, 'comment', x.comment,
+      'full_name', x.full_name
+    ))
+    FROM (
+      SELECT h.*, hu.full_name
+      FROM status_history h
+      JOIN users hu ON hu.id = h.changed_by_user_id
+      WHERE h.ticket_id = t.id
+      ORDER BY h.changed_at DESC
+    ) x
+  ) AS history_json
+FROM tickets t
+LEFT JOIN users u ON u.id = t.assigned_specialist_id
+WHERE t.id = ?
+"""
+
+_JSON_COLUMNS = (
+    "assistants_json",
+    "due_history_json",
+    "help_requests_json",
+    "review_json",
+    "comments_json",
+    "parts_json",
+    "history_json",
+)
+
+
+def load_ticket_aggregate(db: sqlite3.Connection, ticket_id: int) -> TicketAggregate | None:
+    row = db.execute(TICKET_AGGREGATE_SQL, (ticket_id,)).fetchone()
+    if row is None:
+        return None
+
+    ticket = {key: row[key] for key in row.keys() if key not in _JSON_COLUMNS}
+    review = json.loads(row["review_json"]) if row["review_json"] else None
+
+    return TicketAggregate(
+        ticket=MappingProxyType(ticket),
+        assistants=_frozen_rows(row["assistants_json"]),
+        due_history=_frozen_rows(row["due_history_json"]),
+        help_requests=_frozen_rows(row["help_requests_json"]),
+        review=MappingProxyType(review) if review is not None else None,
+        comments=_frozen_rows(row["comments_json"]),
+        parts=_frozen_rows(row["parts_json"]),
+        history=_frozen_rows(row["history_json"]),
+    )
+
+
+def _frozen_rows(raw: str | None) -> tuple[Mapping[str, Any], ...]:
+    if not raw:
+        return ()
+    return tuple(MappingProxyType(item) for item in json.loads(raw))
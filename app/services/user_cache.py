@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import sqlite3
+from typing import Any
+from typing import Callable
+
+from flask import current_app
+from flask import has_app_context
+
+from app.cache import TTLCache
+from app.cache import app_cache
+
+
+def _cache() -> TTLCache | None:
+    if not has_app_context() or not current_app.config.get("USER_CACHE_ENABLED", True):
+        return None
+    return app_cache(
+        "session_users",
+        maxsize=int(current_app.config.get("USER_CACHE_SIZE", 4096)),
+        ttl=float(current_app.config.get("USER_CACHE_TTL", 5)),
+    )
+
+
+def load_session_user(get_connection: Callable[[], sqlite3.Connection], user_id: int) -> dict[str, Any] | None:
+    # Takes a connection factory so that a cache hit does not even check out a pooled connection.
+    cache = _cache()
+    if cache is not None:
+        cached = cache.get(user_id)
+        if cached is not None:
+            return dict(cached)
+
+    row = get_connection().execute(
+        """
+        SELECT id, username, full_name, role, is_active, unread_notifications
+        FROM users
+        WHERE id = ?
+        """,
+        (user_id,),
+    ).fetchone()
+    if row is None:
+        return None
+
+    user = dict(row)
+    if cache is not None:
+        cache.set(user_id, user)
+    return dict(user)
+
+
+def adjust_unread(user_id: int, delta: int) -> None:
+    cache = _cache()
+    if cache is None:
+        return
+    cache.update(
+        user_id,
+        lambda cached: {**cached, "unread_notifications": max(0, int(cached["unread_notifications"]) + delta)},
+    )
+
+
+def reset_unread(user_id: int) -> None:
+    cache = _cache()
+    if cache is None:
+        return
+    cache.update(user_id, lambda cached: {**cached, "unread_notifications": 0})
+
+
+def invalidate_user(user_id: int | None = None) -> None:
+    cache = _cache()
+    if cache is None:
+        return
+    if user_id is None:
+        cache.clear()
+    else:
+        cache.pop(user_id)
@@ -0,0 +1,76 @@
+(function () {
+  "use strict";
+
+  var link = document.getElementById("nav-notifications");
+  if (!link) {
+    return;
+  }
+
+  var streamUrl = link.getAttribute("data-stream-url");
+  var pollUrl = link.getAttribute("data-poll-url");
+  var unread = parseInt(link.getAttribute("data-unread") || "0", 10);
+  var after = "";
+
+  function render(count) {
+    unread = count;
+    var badge = link.querySelector(".badge");
+    if (count > 0) {
+      if (!badge) {
+        badge = document.createElement("span");
+        badge.className = "badge";
+        badge.title = "Непрочитанные";
+        link.appendChild(badge);
+      }
+      badge.textContent = String(count);
+    } else if (badge) {
+      badge.parentNode.removeChild(badge);
+    }
+  }
+
+  function poll() {
+    var url = pollUrl + "?unread=" + unread + (after ? "&after=" + after : "");
+    fetch(url, { credentials: "same-origin", headers: { Accept: "application/json" } })
+      .then(function (response) {
+        if (!response.ok) {
+          throw new Error("poll failed");
+        }
+        return response.json();
+      })
+      .then(function (data) {
+        after = String(data.after);
+        render(data.unread);
+        if (data.retry_after) {
+          window.setTimeout(poll, data.retry_after * 1000);
+        } else {
+          poll();
+        }
+      })
+      .catch(function () {
+        window.setTimeout(poll, 15000);
+      });
+  }
+
+  if (!window.EventSource) {
+    if (window.fetch) {
+      poll();
+    }
+    return;
+  }
+
+  var opened = false;
+  var source = new EventSource(streamUrl);
+  source.addEventListener("open", function () {
+    opened = true;
+  });
+  source.addEventListener("unread", function (event) {
+    render(JSON.parse(event.data).count);
+  });
+  source.addEventListener("error", function () {
+    // A stream that never opened was refused (connection cap): switch to long polling.
+    if (!opened && window.fetch) {
+      source.close();
+      poll();
+    }
+    opened = false;
+  });
+})();
@@ -2,12 +2,13 @@ from __future__ import annotations
 
 from flask import Blueprint
 from flask import flash
-from flask import render_template
+from flask import g
 from flask import request
 
 from app.db import get_db
 from app.roles import roles_required
-from app.services.statistics import calculate_statistics
+from app.services.page_cache import render_cached_page
+from app.services.statistics import calculate_statistics_sql
 from app.utils import format_duration_seconds
 from app.utils import parse_iso
 
@@ -17,22 +18,23 @@ bp = Blueprint("stats", __name__)
 @bp.route("/stats", methods=("GET",))
 @roles_required("admin", "operator", "manager")
 def stats_view():
+    return render_cached_page("stats/view.html", _stats_context, vary=(g.user["role"],))
+
+
+def _stats_context() -> dict:
     date_from = request.args.get("date_from", "").strip()
     date_to = request.args.get("date_to", "").strip()
 
-    rows = []
     result = None
 
     if date_from or date_to:
         date_from_iso, date_to_iso = _validate_period(date_from, date_to)
         if date_from_iso and date_to_iso:
-            rows = _fetch_completed(date_from_iso, date_to_iso)
-            result = calculate_statistics(rows)
+            result = calculate_statistics_sql(get_db(), date_from_iso, date_to_iso)
             if result.completed_count == 0:
                 flash("За выбранный период выполненных заявок нет.", "info")
 
-    return render_template(
-        "stats/view.html",
+    return dict(
         date_from=date_from,
         date_to=date_to,
         result=result,
@@ -59,17 +61,3 @@ def _validate_period(date_from: str, date_to: str) -> tuple[str | None, str | No
     end = to_dt.strftime("%Y-%m-%d 23:59:59")
     return start, end
 
-
-def _fetch_completed(date_from_iso: str, date_to_iso: str) -> list[dict]:
-    db = get_db()
-    rows = db.execute(
-        """
-        SELECT created_at, completed_at, problem_description
-        FROM tickets
-        WHERE status = 'completed'
-          AND completed_at IS NOT NULL
-          AND completed_at BETWEEN ? AND ?
-        """,
-        (date_from_iso, date_to_iso),
-    ).fetchall()
-    return [dict(row) for row in rows]
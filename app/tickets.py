@@ -1,12 +1,12 @@
 from __future__ import annotations
 
-import base64
-import io
+import sqlite3
 from datetime import datetime
 
 from flask import Blueprint
 from flask import Response
 from flask import abort
+from flask import current_app
 from flask import flash
 from flask import g
 from flask import redirect
@@ -15,11 +15,29 @@ from flask import request
 from flask import url_for
 
 from app.auth import login_required
+from app.cache import app_cache
+from app.cache import evict
 from app.db import get_db
+from app.db import run_write
+from app.pagination import build_page
+from app.pagination import decode_cursor
+from app.pagination import keyset_condition
+from app.pagination import keyset_order
 from app.roles import roles_required
-from app.services.notifications import create_notification
+from app.services.outbox import dispatch_notifications
+from app.services.outbox import enqueue_notification
+from app.services.page_cache import render_cached_page
+from app.services.qr import QR_FORMATS
+from app.services.qr import feedback_url as feedback_qr_url
+from app.services.qr import qr_available
+from app.services.qr import qr_etag
+from app.services.qr import render_qr
+from app.services.search import build_search_filter
+from app.services.statistics import categorize_fault_type
+from app.services.tickets import TicketAggregate
+from app.services.tickets import load_ticket_aggregate
+from app.services.search import search_index_available
 from app.utils import STATUS_LABELS
-from app.utils import FEEDBACK_FORM_URL
 from app.utils import format_datetime
 from app.utils import generate_request_number
 from app.utils import now_iso
@@ -30,20 +48,52 @@ from app.utils import validate_phone
 
 bp = Blueprint("tickets", __name__, url_prefix="/tickets")
 
+REQUEST_NUMBER_ATTEMPTS = 5
+
 
 def _get_specialists():
-    db = get_db()
-    return db.execute(
-        """
-        SELECT id, full_name
-        FROM users
-        WHERE role = 'specialist' AND is_active = 1
-        ORDER BY full_name
-        """
-    ).fetchall()
+    def load():
+        db = get_db()
+        return tuple(
+            db.execute(
+                """
+                SELECT id, full_name
+                FROM users
+                WHERE role = 'specialist' AND is_active = 1
+                ORDER BY full_name
+                """
+            ).fetchall()
+        )
+
+    if not current_app.config.get("TICKET_CACHE_ENABLED", True):
+        return load()
+    return _cache("specialists", maxsize=1).get_or_set("active", load)
+
+
+def _cache(name: str, *, maxsize: int):
+    return app_cache(name, maxsize=maxsize, ttl=float(current_app.config.get("TICKET_CACHE_TTL", 30)))
+
+
+def _load_ticket(ticket_id: int) -> TicketAggregate:
+    if not current_app.config.get("TICKET_CACHE_ENABLED", True):
+        aggregate = load_ticket_aggregate(get_db(), ticket_id)
+    else:
+        cache = _cache("ticket_aggregates", maxsize=int(current_app.config.get("TICKET_CACHE_SIZE", 512)))
+        aggregate = cache.get(ticket_id)
+        if aggregate is None:
+            aggregate = load_ticket_aggregate(get_db(), ticket_id)
+            if aggregate is not None:
+                cache.set(ticket_id, aggregate)
+    if aggregate is None:
+        abort(404)
+    return aggregate
+
 
+def _invalidate_ticket(ticket_id: int) -> None:
+    evict("ticket_aggregates", ticket_id)
 
-def _ticket_access_allowed(ticket_row) -> bool:
+
+def _ticket_access_allowed(ticket_row, aggregate: TicketAggregate | None = None) -> bool:
     if g.user is None:
         return False
     if g.user["role"] in {"admin", "operator", "manager"}:
@@ -52,6 +102,8 @@ def _ticket_access_allowed(ticket_row) -> bool:
         return False
     if ticket_row["assigned_specialist_id"] == g.user["id"]:
         return True
+    if aggregate is not None:
+        return aggregate.is_worker(int(g.user["id"]))
     return _is_assistant_specialist(ticket_id=int(ticket_row["id"]), user_id=int(g.user["id"]))
 
 
@@ -72,9 +124,19 @@ def _get_ticket_row(ticket_id: int):
     return ticket
 
 
+def _page_vary() -> tuple:
+    # Specialists see only their own tickets; everyone else sees the same content for the same role.
+    user_id = int(g.user["id"]) if g.user["role"] == "specialist" else None
+    return (g.user["role"], user_id)
+
+
 @bp.route("/", methods=("GET",))
 @login_required
 def list_tickets():
+    return render_cached_page("tickets/list.html", _list_tickets_context, vary=_page_vary())
+
+
+def _list_tickets_context() -> dict:
     db = get_db()
 
     q = request.args.get("q", "").strip()
@@ -82,13 +144,18 @@ def list_tickets():
     specialist_id = request.args.get("specialist_id", "").strip()
     date_from = request.args.get("date_from", "").strip()
     date_to = request.args.get("date_to", "").strip()
+    sort = request.args.get("sort", "").strip()
 
     clauses: list[str] = []
     params: list[object] = []
 
     if g.user["role"] == "specialist":
+        # A UNION of two index lookups; "assigned = ? OR EXISTS (...)" would walk every ticket.
         clauses.append(
-            "(t.assigned_specialist_id = ? OR EXISTS (SELECT 1 FROM ticket_specialists ts WHERE ts.ticket_id = t.id AND ts.specialist_user_id = ?))"
+            "t.id IN ("
+            "SELECT id FROM tickets WHERE assigned_specialist_id = ? "
+            "UNION SELECT ticket_id FROM ticket_specialists WHERE specialist_user_id = ?"
+            ")"
         )
         params.append(int(g.user["id"]))
         params.append(int(g.user["id"]))
@@ -122,22 +189,44 @@ def list_tickets():
             clauses.append("t.created_at <= ?")
             params.append(parsed.strftime("%Y-%m-%d 23:59:59"))
 
+    join_sql = ""
+    rank_sql = ""
+    key_columns = ["t.created_at", "t.id"]
+    key_fields = ("created_at", "id")
+    descending = True
     if q:
-        token_clauses: list[str] = []
-        for token in normalize_search_tokens(q):
-            token_clauses.append(
-                "(t.request_number LIKE ? OR t.customer_full_name LIKE ? OR t.customer_phone LIKE ? OR "
-                "t.equipment_type LIKE ? OR t.device_model LIKE ?)"
-            )
-            like = f"%{token}%"
-            params.extend([like, like, like, like, like])
-        clauses.append("(" + " AND ".join(token_clauses) + ")")
+        use_fts = bool(current_app.config.get("TICKET_SEARCH_FTS", True)) and search_index_available(db)
+        search = build_search_filter(normalize_search_tokens(q), use_fts=use_fts)
+        clauses.extend(search.clauses)
+        params.extend(search.params)
+        if search.match is not None:
+            join_sql = "JOIN tickets_fts ON tickets_fts.rowid = t.id"
+            rank_sql = ", tickets_fts.rank AS search_rank"
+            clauses.append("tickets_fts MATCH ?")
+            params.append(search.match)
+            if sort == "relevance":
+                key_columns = ["tickets_fts.rank", "t.id"]
+                key_fields = ("search_rank", "id")
+                descending = False
+
+    page_size = _ticket_page_size()
+    after = decode_cursor(request.args.get("after"), size=len(key_columns))
+    before = decode_cursor(request.args.get("before"), size=len(key_columns)) if after is None else None
+    cursor = after or before
+    backward = before is not None
+
+    filter_sql = " AND ".join(clauses)
+    page_clauses = list(clauses)
+    page_params = list(params)
+    if cursor is not None:
+        page_clauses.append(keyset_condition(key_columns, descending=descending, backward=backward))
+        page_params.extend(cursor)
 
     where_sql = ""
-    if clauses:
-        where_sql = "WHERE " + " AND ".join(clauses)
+    if page_clauses:
+        where_sql = "WHERE " + " AND ".join(page_clauses)
 
-    tickets = db.execute(
+    rows = db.execute(
         f"""
         SELECT
           t.*,
@@ -147,19 +236,53 @@ def list_tickets():
               THEN 1
             ELSE 0
           END AS is_overdue
+          {rank_sql}
         FROM tickets t
+        {join_sql}
         LEFT JOIN users u ON u.id = t.assigned_specialist_id
         {where_sql}
-        ORDER BY t.created_at DESC
+        ORDER BY {keyset_order(key_columns, descending=descending, backward=backward)}
+        LIMIT ?
         """,
-        params,
+        [*page_params, page_size + 1],
     ).fetchall()
 
+    page = build_page(
+        rows,
+        page_size=page_size,
+        key=lambda row: tuple(row[field] for field in key_fields),
+        cursor_given=cursor is not None,
+        backward=backward,
+    )
+    tickets = page.items
+
+    total_count: int | None = None
+    total_limit = int(current_app.config.get("TICKETS_COUNT_LIMIT", 1000))
+    if total_limit > 0:
+        # Counting stops at total_limit + 1 rows, so the cost stays bounded on large tables.
+        count_row = db.execute(
+            f"""
+            SELECT COUNT(*) AS cnt
+            FROM (
+              SELECT 1
+              FROM tickets t
+              {join_sql}
+              {"WHERE " + filter_sql if filter_sql else ""}
+              LIMIT ?
+            )
+            """,
+            [*params, total_limit + 1],
+        ).fetchone()
+        total_count = int(count_row["cnt"])
+
+    page_args = {key: value for key, value in request.args.items() if key not in {"after", "before"} and value}
+    next_url = url_for("tickets.list_tickets", **page_args, after=page.next_cursor) if page.next_cursor else None
+    prev_url = url_for("tickets.list_tickets", **page_args, before=page.prev_cursor) if page.prev_cursor else None
+
     if q and not tickets:
         flash("По вашему запросу заявок не найдено.", "info")
 
-    return render_template(
-        "tickets/list.html",
+    return dict(
         tickets=tickets,
         status_options=status_options(),
         status_labels=STATUS_LABELS,
@@ -169,10 +292,87 @@ def list_tickets():
         selected_specialist_id=specialist_id,
         date_from=date_from,
         date_to=date_to,
+        sort=sort,
+        next_url=next_url,
+        prev_url=prev_url,
+        total_count=total_count,
+        total_limit=total_limit,
         format_datetime=format_datetime,
     )
 
 
+def _insert_ticket_with_number(
+    db,
+    *,
+    created_at: str,
+    equipment_type: str,
+    device_model: str,
+    problem_description: str,
+    customer_full_name: str,
+    customer_phone: str,
+    status: str,
+    assigned_specialist_id: int | None,
+    due_at: str | None,
+    updated_at: str,
+) -> tuple[int, str]:
+    # Numbers come from request_number_sequences inside the caller's transaction;
+    # a clash with a number written outside the sequence just takes the next one.
+    for _ in range(REQUEST_NUMBER_ATTEMPTS):
+        request_number = generate_request_number(db, created_at)
+        try:
+            cur = db.execute(
+                """
+                INSERT INTO tickets (
+                  request_number,
+                  created_at,
+                  equipment_type,
+                  device_model,
+                  problem_description,
+                  fault_category,
+                  customer_full_name,
+                  customer_phone,
+                  status,
+                  assigned_specialist_id,
+                  due_at,
+                  completed_at,
+                  updated_at
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    request_number,
+                    created_at,
+                    equipment_type,
+                    device_model,
+                    problem_description,
+                    categorize_fault_type(problem_description),
+                    customer_full_name,
+                    customer_phone,
+                    status,
+                    assigned_specialist_id,
+                    due_at,
+                    None,
+                    updated_at,
+                ),
+            )
+        except sqlite3.IntegrityError as exc:
+            if "request_number" not in str(exc):
+                raise
+            continue
+        return int(cur.lastrowid), request_number
+    raise RuntimeError("Could not allocate a free request number")
+
+
+def _ticket_page_size() -> int:
+    default = int(current_app.config.get("TICKETS_PAGE_SIZE", 50))
+    max_size = int(current_app.config.get("TICKETS_MAX_PAGE_SIZE", 200))
+    try:
+        requested = int(request.args.get("per_page", default))
+    except ValueError:
+        requested = default
+    return max(1, min(requested, max_size))
+
+
 @bp.route("/new", methods=("GET", "POST"))
 @roles_required("admin", "operator")
 def create_ticket():
@@ -209,7 +409,6 @@ def create_ticket():
 
         created_at = now_iso()
         updated_at = created_at
-        request_number = generate_request_number(db, created_at)
         status = "open"
         due_at: str | None = None
         if due_date:
@@ -227,47 +426,26 @@ def create_ticket():
                 flash("Некорректный специалист.", "error")
                 return render_template("tickets/new.html", specialists=specialists, form=request.form)
 
-        try:
-            cur = db.execute(
-                """
-                INSERT INTO tickets (
-                  request_number,
-                  created_at,
-                  equipment_type,
-                  device_model,
-                  problem_description,
-                  customer_full_name,
-                  customer_phone,
-                  status,
-                  assigned_specialist_id,
-                  due_at,
-                  completed_at,
-                  updated_at
-                )
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    request_number,
-                    created_at,
-                    equipment_type,
-                    device_model,
-                    problem_description,
-                    customer_full_name,
-                    customer_phone,
-                    status,
-                    assigned_specialist_id,
-                    due_at,
-                    None,
-                    updated_at,
-                ),
+        def insert_ticket(db) -> tuple[int, str]:
+            new_ticket_id, request_number = _insert_ticket_with_number(
+                db,
+                created_at=created_at,
+                equipment_type=equipment_type,
+                device_model=device_model,
+                problem_description=problem_description,
+                customer_full_name=customer_full_name,
+                customer_phone=customer_phone,
+                status=status,
+                assigned_specialist_id=assigned_specialist_id,
+                due_at=due_at,
+                updated_at=updated_at,
             )
-            ticket_id = int(cur.lastrowid)
             db.execute(
                 """
                 INSERT INTO status_history (ticket_id, old_status, new_status, changed_by_user_id, changed_at, comment)
                 VALUES (?, ?, ?, ?, ?, ?)
                 """,
-                (ticket_id, None, status, int(g.user["id"]), created_at, "Создание заявки"),
+                (new_ticket_id, None, status, int(g.user["id"]), created_at, "Создание заявки"),
             )
             if due_at:
                 db.execute(
@@ -275,22 +453,25 @@ def create_ticket():
                     INSERT INTO ticket_due_history (ticket_id, old_due_at, new_due_at, changed_by_user_id, changed_at, customer_agreed, comment)
                     VALUES (?, ?, ?, ?, ?, ?, ?)
                     """,
-                    (ticket_id, None, due_at, int(g.user["id"]), created_at, 0, "Установка срока выполнения"),
+                    (new_ticket_id, None, due_at, int(g.user["id"]), created_at, 0, "Установка срока выполнения"),
                 )
-            db.commit()
+            if assigned_specialist_id is not None:
+                enqueue_notification(
+                    db,
+                    ticket_id=new_ticket_id,
+                    type_="assigned",
+                    message=f"Вам назначена заявка {request_number}.",
+                    user_ids=(assigned_specialist_id,),
+                )
+            return new_ticket_id, request_number
+
+        try:
+            ticket_id, request_number = run_write(insert_ticket, db=db)
         except Exception:
-            db.rollback()
             flash("Не удалось создать заявку. Повторите попытку.", "error")
             return render_template("tickets/new.html", specialists=specialists, form=request.form)
 
-        if assigned_specialist_id is not None:
-            create_notification(
-                db=db,
-                user_id=assigned_specialist_id,
-                ticket_id=ticket_id,
-                type_="assigned",
-                message=f"Вам назначена заявка {request_number}.",
-            )
+        dispatch_notifications(db)
 
         flash(f"Заявка {request_number} создана.", "success")
         return redirect(url_for("tickets.view_ticket", ticket_id=ticket_id))
@@ -301,105 +482,20 @@ def create_ticket():
 @bp.route("/<int:ticket_id>", methods=("GET",))
 @login_required
 def view_ticket(ticket_id: int):
-    db = get_db()
-    ticket = db.execute(
-        """
-        SELECT
-          t.*,
-          u.full_name AS specialist_name
-        FROM tickets t
-        LEFT JOIN users u ON u.id = t.assigned_specialist_id
-        WHERE t.id = ?
-        """,
-        (ticket_id,),
-    ).fetchone()
-    if ticket is None:
-        abort(404)
-
-    if not _ticket_access_allowed(ticket):
+    aggregate = _load_ticket(ticket_id)
+    if not _ticket_access_allowed(aggregate.ticket, aggregate):
         abort(403)
 
-    assistants = db.execute(
-        """
-        SELECT u.id, u.full_name
-        FROM ticket_specialists ts
-        JOIN users u ON u.id = ts.specialist_user_id
-        WHERE ts.ticket_id = ?
-        ORDER BY u.full_name
-        """,
-        (ticket_id,),
-    ).fetchall()
-    assistant_ids = {int(row["id"]) for row in assistants}
-
-    due_history = db.execute(
-        """
-        SELECT h.*, u.full_name
-        FROM ticket_due_history h
-        JOIN users u ON u.id = h.changed_by_user_id
-        WHERE h.ticket_id = ?
-        ORDER BY h.changed_at DESC
-        """,
-        (ticket_id,),
-    ).fetchall()
-
-    help_requests = db.execute(
-        """
-        SELECT
-          r.*,
-          req.full_name AS requested_by_name,
-          res.full_name AS resolved_by_name
-        FROM ticket_help_requests r
-        JOIN users req ON req.id = r.requested_by_user_id
-        LEFT JOIN users res ON res.id = r.resolved_by_user_id
-        WHERE r.ticket_id = ?
-        ORDER BY r.requested_at DESC
-        """,
-        (ticket_id,),
-    ).fetchall()
-
-    review = db.execute(
-        """
-        SELECT rv.*, u.full_name AS recorded_by_name
-        FROM ticket_reviews rv
-        JOIN users u ON u.id = rv.recorded_by_user_id
-        WHERE rv.ticket_id = ?
-        """,
-        (ticket_id,),
-    ).fetchone()
-
-    comments = db.execute(
-        """
-        SELECT c.*, u.full_name
-        FROM ticket_comments c
-        JOIN users u ON u.id = c.user_id
-        WHERE c.ticket_id = ?
-        ORDER BY c.created_at DESC
-        """,
-        (ticket_id,),
-    ).fetchall()
-
-    parts = db.execute(
-        """
-        SELECT p.*, u.full_name
-        FROM ticket_parts p
-        JOIN users u ON u.id = p.created_by_user_id
-        WHERE p.ticket_id = ?
-        ORDER BY p.created_at DESC
-        """,
-        (ticket_id,),
-    ).fetchall()
+    return render_cached_page(
+        "tickets/detail.html",
+        lambda: _view_ticket_context(aggregate),
+        vary=(ticket_id, *_page_vary()),
+    )
 
-    history = db.execute(
-        """
-        SELECT h.*, u.full_name
-        FROM status_history h
-        JOIN users u ON u.id = h.changed_by_user_id
-        WHERE h.ticket_id = ?
-        ORDER BY h.changed_at DESC
-        """,
-        (ticket_id,),
-    ).fetchall()
 
+def _view_ticket_context(aggregate: TicketAggregate) -> dict:
+    ticket = aggregate.ticket
+    ticket_id = int(ticket["id"])
     specialists = _get_specialists() if g.user["role"] in {"admin", "operator", "manager"} else []
 
     is_overdue = False
@@ -408,46 +504,31 @@ def view_ticket(ticket_id: int):
         if due_at < datetime.now():
             is_overdue = True
 
-    is_specialist_worker = False
-    if g.user["role"] == "specialist":
-        is_specialist_worker = ticket["assigned_specialist_id"] == g.user["id"] or _is_assistant_specialist(
-            ticket_id=ticket_id,
-            user_id=int(g.user["id"]),
-        )
+    is_specialist_worker = g.user["role"] == "specialist" and aggregate.is_worker(int(g.user["id"]))
 
     can_change_status = g.user["role"] in {"admin", "operator"} or is_specialist_worker
     can_add_parts = g.user["role"] in {"admin", "operator"} or is_specialist_worker
     can_request_help = is_specialist_worker and ticket["status"] != "completed"
     can_manager_actions = g.user["role"] in {"admin", "manager"}
 
-    feedback_url = f"{FEEDBACK_FORM_URL}&ticket={ticket['request_number']}"
-    
-    # Генерируем QR код как data URI
-    qr_data_uri = None
-    try:
-        import segno
-        qr_url = f"{FEEDBACK_FORM_URL}&ticket={ticket['request_number']}"
-        qr = segno.make(qr_url)
-        buffer = io.BytesIO()
-        qr.save(buffer, kind="svg", scale=5, border=2, xmldecl=False)
-        svg_bytes = buffer.getvalue()
-        svg_base64 = base64.b64encode(svg_bytes).decode("utf-8")
-        qr_data_uri = f"data:image/svg+xml;base64,{svg_base64}"
-    except Exception:
-        pass  # Если не удалось сгенерировать QR, оставляем None
+    feedback_url = feedback_qr_url(ticket["request_number"])
 
-    return render_template(
-        "tickets/detail.html",
+    # The image itself is served by ticket_qr; the version argument makes the URL content-addressed.
+    qr_src = None
+    if qr_available():
+        qr_src = url_for("tickets.ticket_qr", ticket_id=ticket_id, v=qr_etag(feedback_url, "svg"))
+
+    return dict(
         ticket=ticket,
-        assistants=assistants,
-        assistant_ids=assistant_ids,
-        due_history=due_history,
-        help_requests=help_requests,
-        review=review,
+        assistants=aggregate.assistants,
+        assistant_ids=aggregate.assistant_ids,
+        due_history=aggregate.due_history,
+        help_requests=aggregate.help_requests,
+        review=aggregate.review,
         feedback_url=feedback_url,
-        comments=comments,
-        parts=parts,
-        history=history,
+        comments=aggregate.comments,
+        parts=aggregate.parts,
+        history=aggregate.history,
         is_overdue=is_overdue,
         status_labels=STATUS_LABELS,
         status_options=status_options(),
@@ -457,28 +538,30 @@ def view_ticket(ticket_id: int):
         can_request_help=can_request_help,
         can_manager_actions=can_manager_actions,
         format_datetime=format_datetime,
-        qr_data_uri=qr_data_uri,
+        qr_src=qr_src,
     )
 
 
 @bp.route("/<int:ticket_id>/qr", methods=("GET",))
 @login_required
 def ticket_qr(ticket_id: int):
-    ticket = _get_ticket_row(ticket_id)
-    if not _ticket_access_allowed(ticket):
+    aggregate = _load_ticket(ticket_id)
+    if not _ticket_access_allowed(aggregate.ticket, aggregate):
         abort(403)
 
-    try:
-        import segno
-    except Exception:
+    kind = request.args.get("format", "svg")
+    if kind not in QR_FORMATS:
+        abort(404)
+
+    image = render_qr(feedback_qr_url(aggregate.ticket["request_number"]), kind)
+    if image is None:
         abort(503)
 
-    url = f"{FEEDBACK_FORM_URL}&ticket={ticket['request_number']}"
-    qr = segno.make(url)
-    buffer = io.BytesIO()
-    qr.save(buffer, kind="svg", scale=5, border=2, xmldecl=False)
-    svg_bytes = buffer.getvalue()
-    return Response(svg_bytes, mimetype="image/svg+xml")
+    response = Response(image.data, mimetype=image.mimetype)
+    response.set_etag(image.etag)
+    # The image depends only on the request number, which never changes for a ticket.
+    response.headers["Cache-Control"] = "private, max-age=31536000, immutable"
+    return response.make_conditional(request)
 
 
 @bp.route("/<int:ticket_id>/assistants/add", methods=("POST",))
@@ -514,19 +597,21 @@ def add_assistant(ticket_id: int):
             """,
             (ticket_id, specialist_user_id, int(g.user["id"]), now_iso()),
         )
+        enqueue_notification(
+            db,
+            ticket_id=ticket_id,
+            type_="assistant_added",
+            message=f"Вас привлекли к заявке {ticket['request_number']} как помощника.",
+            user_ids=(specialist_user_id,),
+        )
         db.commit()
+        _invalidate_ticket(ticket_id)
     except Exception:
         db.rollback()
         flash("Не удалось привлечь специалиста. Возможно, он уже добавлен.", "warning")
         return redirect(url_for("tickets.view_ticket", ticket_id=ticket_id))
 
-    create_notification(
-        db=db,
-        user_id=specialist_user_id,
-        ticket_id=ticket_id,
-        type_="assistant_added",
-        message=f"Вас привлекли к заявке {ticket['request_number']} как помощника.",
-    )
+    dispatch_notifications(db)
     flash("Специалист добавлен к заявке.", "success")
     return redirect(url_for("tickets.view_ticket", ticket_id=ticket_id))
 
@@ -542,7 +627,16 @@ def remove_assistant(ticket_id: int, specialist_user_id: int):
             "DELETE FROM ticket_specialists WHERE ticket_id = ? AND specialist_user_id = ?",
             (ticket_id, specialist_user_id),
         )
+        if cur.rowcount:
+            enqueue_notification(
+                db,
+                ticket_id=ticket_id,
+                type_="assistant_removed",
+                message="Вас исключили из привлеченных специалистов по заявке.",
+                user_ids=(specialist_user_id,),
+            )
         db.commit()
+        _invalidate_ticket(ticket_id)
     except Exception:
         db.rollback()
         flash("Не удалось удалить привлеченного специалиста.", "error")
@@ -552,13 +646,7 @@ def remove_assistant(ticket_id: int, specialist_user_id: int):
         flash("Привлеченный специалист не найден.", "info")
         return redirect(url_for("tickets.view_ticket", ticket_id=ticket_id))
 
-    create_notification(
-        db=db,
-        user_id=specialist_user_id,
-        ticket_id=ticket_id,
-        type_="assistant_removed",
-        message="Вас исключили из привлеченных специалистов по заявке.",
-    )
+    dispatch_notifications(db)
     flash("Привлеченный специалист удален.", "info")
     return redirect(url_for("tickets.view_ticket", ticket_id=ticket_id))
 
@@ -614,31 +702,33 @@ def extend_due_date(ticket_id: int):
             """,
             (ticket_id, old_due_at, new_due_at, int(g.user["id"]), changed_at, history_comment),
         )
-        db.commit()
-    except Exception:
-        db.rollback()
-        flash("Не удалось продлить срок. Повторите попытку.", "error")
-        return redirect(url_for("tickets.view_ticket", ticket_id=ticket_id))
 
-    recipients = set()
-    if ticket["assigned_specialist_id"] is not None:
-        recipients.add(int(ticket["assigned_specialist_id"]))
+        recipients = set()
+        if ticket["assigned_specialist_id"] is not None:
+            recipients.add(int(ticket["assigned_specialist_id"]))
 
-    assistant_rows = db.execute(
-        "SELECT specialist_user_id FROM ticket_specialists WHERE ticket_id = ?",
-        (ticket_id,),
-    ).fetchall()
-    for row in assistant_rows:
-        recipients.add(int(row["specialist_user_id"]))
+        assistant_rows = db.execute(
+            "SELECT specialist_user_id FROM ticket_specialists WHERE ticket_id = ?",
+            (ticket_id,),
+        ).fetchall()
+        for row in assistant_rows:
+            recipients.add(int(row["specialist_user_id"]))
 
-    for user_id in recipients:
-        create_notification(
-            db=db,
-            user_id=user_id,
+        enqueue_notification(
+            db,
             ticket_id=ticket_id,
             type_="due_changed",
             message=f"Срок выполнения заявки {ticket['request_number']} изменен на {new_due_at}.",
+            user_ids=recipients,
         )
+        db.commit()
+        _invalidate_ticket(ticket_id)
+    except Exception:
+        db.rollback()
+        flash("Не удалось продлить срок. Повторите попытку.", "error")
+        return redirect(url_for("tickets.view_ticket", ticket_id=ticket_id))
+
+    dispatch_notifications(db)
 
     flash("Срок выполнения обновлен.", "success")
     return redirect(url_for("tickets.view_ticket", ticket_id=ticket_id))
@@ -680,21 +770,21 @@ def request_help(ticket_id: int):
             """,
             (ticket_id, int(g.user["id"]), requested_at, message),
         )
+        enqueue_notification(
+            db,
+            ticket_id=ticket_id,
+            type_="help_requested",
+            message=f"Запрос помощи по заявке {ticket['request_number']}: {message}",
+            roles=("manager",),
+        )
         db.commit()
+        _invalidate_ticket(ticket_id)
     except Exception:
         db.rollback()
         flash("Не удалось отправить запрос помощи. Повторите попытку.", "error")
         return redirect(url_for("tickets.view_ticket", ticket_id=ticket_id))
 
-    managers = db.execute("SELECT id FROM users WHERE role = 'manager' AND is_active = 1").fetchall()
-    for manager in managers:
-        create_notification(
-            db=db,
-            user_id=int(manager["id"]),
-            ticket_id=ticket_id,
-            type_="help_requested",
-            message=f"Запрос помощи по заявке {ticket['request_number']}: {message}",
-        )
+    dispatch_notifications(db)
 
     flash("Запрос помощи отправлен менеджеру по качеству.", "success")
     return redirect(url_for("tickets.view_ticket", ticket_id=ticket_id))
@@ -732,19 +822,21 @@ def resolve_help(ticket_id: int, help_id: int):
             """,
             (int(g.user["id"]), resolved_at, resolution_comment or None, help_id),
         )
+        enqueue_notification(
+            db,
+            ticket_id=ticket_id,
+            type_="help_resolved",
+            message=f"Запрос помощи по заявке {ticket['request_number']} закрыт. {resolution_comment}".strip(),
+            user_ids=(int(help_row["requested_by_user_id"]),),
+        )
         db.commit()
+        _invalidate_ticket(ticket_id)
     except Exception:
         db.rollback()
         flash("Не удалось закрыть запрос помощи. Повторите попытку.", "error")
         return redirect(url_for("tickets.view_ticket", ticket_id=ticket_id))
 
-    create_notification(
-        db=db,
-        user_id=int(help_row["requested_by_user_id"]),
-        ticket_id=ticket_id,
-        type_="help_resolved",
-        message=f"Запрос помощи по заявке {ticket['request_number']} закрыт. {resolution_comment}".strip(),
-    )
+    dispatch_notifications(db)
 
     flash("Запрос помощи закрыт.", "success")
     return redirect(url_for("tickets.view_ticket", ticket_id=ticket_id))
@@ -784,6 +876,7 @@ def record_review(ticket_id: int):
             (ticket_id, rating, comment or None, int(g.user["id"]), created_at),
         )
         db.commit()
+        _invalidate_ticket(ticket_id)
     except Exception:
         db.rollback()
         flash("Не удалось сохранить отзыв. Повторите попытку.", "error")
@@ -874,13 +967,23 @@ def edit_ticket(ticket_id: int):
                 UPDATE tickets
                 SET status = ?,
                     problem_description = ?,
+                    fault_category = ?,
                     assigned_specialist_id = ?,
                     due_at = ?,
                     completed_at = ?,
                     updated_at = ?
                 WHERE id = ?
                 """,
-                (new_status, new_description, assigned_specialist_id, new_due_at, completed_at, changed_at, ticket_id),
+                (
+                    new_status,
+                    new_description,
+                    categorize_fault_type(new_description),
+                    assigned_specialist_id,
+                    new_due_at,
+                    completed_at,
+                    changed_at,
+                    ticket_id,
+                ),
             )
 
             if old_status != new_status:
@@ -917,7 +1020,26 @@ def edit_ticket(ticket_id: int):
                     (ticket_id, old_due_at, new_due_at, int(g.user["id"]), changed_at, 0, "Изменение срока выполнения"),
                 )
 
+            request_number = ticket["request_number"]
+            if old_status != new_status:
+                _enqueue_status_change(
+                    db,
+                    ticket_id=ticket_id,
+                    request_number=request_number,
+                    new_status=new_status,
+                    assigned_specialist_id=assigned_specialist_id,
+                )
+            if old_specialist != assigned_specialist_id and assigned_specialist_id is not None:
+                enqueue_notification(
+                    db,
+                    ticket_id=ticket_id,
+                    type_="assigned",
+                    message=f"Вам назначена заявка {request_number}.",
+                    user_ids=(assigned_specialist_id,),
+                )
+
             db.commit()
+            _invalidate_ticket(ticket_id)
         except Exception:
             db.rollback()
             flash("Не удалось сохранить изменения. Повторите попытку.", "error")
@@ -929,19 +1051,7 @@ def edit_ticket(ticket_id: int):
                 status_labels=STATUS_LABELS,
             )
 
-        request_number = ticket["request_number"]
-        if old_status != new_status:
-            _notify_status_change(db=db, ticket_id=ticket_id, request_number=request_number, new_status=new_status)
-
-        if old_specialist != assigned_specialist_id and assigned_specialist_id is not None:
-            create_notification(
-                db=db,
-                user_id=assigned_specialist_id,
-                ticket_id=ticket_id,
-                type_="assigned",
-                message=f"Вам назначена заявка {request_number}.",
-            )
-
+        dispatch_notifications(db)
         flash("Изменения сохранены.", "success")
         return redirect(url_for("tickets.view_ticket", ticket_id=ticket_id))
 
@@ -954,29 +1064,17 @@ def edit_ticket(ticket_id: int):
     )
 
 
-def _notify_status_change(*, db, ticket_id: int, request_number: str, new_status: str) -> None:
-    recipients = db.execute(
-        "SELECT id FROM users WHERE role IN ('admin', 'operator') AND is_active = 1"
-    ).fetchall()
-
-    for recipient in recipients:
-        create_notification(
-            db=db,
-            user_id=int(recipient["id"]),
-            ticket_id=ticket_id,
-            type_="status_changed",
-            message=f"Статус заявки {request_number} изменен: {STATUS_LABELS[new_status]}.",
-        )
-
-    ticket = db.execute("SELECT assigned_specialist_id FROM tickets WHERE id = ?", (ticket_id,)).fetchone()
-    if ticket is not None and ticket["assigned_specialist_id"] is not None:
-        create_notification(
-            db=db,
-            user_id=int(ticket["assigned_specialist_id"]),
-            ticket_id=ticket_id,
-            type_="status_changed",
-            message=f"Статус заявки {request_number} изменен: {STATUS_LABELS[new_status]}.",
-        )
+def _enqueue_status_change(
+    db, *, ticket_id: int, request_number: str, new_status: str, assigned_specialist_id: int | None
+) -> None:
+    enqueue_notification(
+        db,
+        ticket_id=ticket_id,
+        type_="status_changed",
+        message=f"Статус заявки {request_number} изменен: {STATUS_LABELS[new_status]}.",
+        user_ids=() if assigned_specialist_id is None else (int(assigned_specialist_id),),
+        roles=("admin", "operator"),
+    )
 
 
 @bp.route("/<int:ticket_id>/status", methods=("POST",))
@@ -1011,7 +1109,7 @@ def update_status(ticket_id: int):
     if new_status != "completed":
         completed_at = None
 
-    try:
+    def apply_status(db) -> None:
         db.execute(
             "UPDATE tickets SET status = ?, completed_at = ?, updated_at = ? WHERE id = ?",
             (new_status, completed_at, changed_at, ticket_id),
@@ -1023,13 +1121,22 @@ def update_status(ticket_id: int):
             """,
             (ticket_id, old_status, new_status, int(g.user["id"]), changed_at, "Смена статуса"),
         )
-        db.commit()
+        _enqueue_status_change(
+            db,
+            ticket_id=ticket_id,
+            request_number=ticket["request_number"],
+            new_status=new_status,
+            assigned_specialist_id=ticket["assigned_specialist_id"],
+        )
+
+    try:
+        run_write(apply_status, db=db)
+        _invalidate_ticket(ticket_id)
     except Exception:
-        db.rollback()
         flash("Не удалось обновить статус. Повторите попытку.", "error")
         return redirect(url_for("tickets.view_ticket", ticket_id=ticket_id))
 
-    _notify_status_change(db=db, ticket_id=ticket_id, request_number=ticket["request_number"], new_status=new_status)
+    dispatch_notifications(db)
     flash("Статус обновлен.", "success")
     return redirect(url_for("tickets.view_ticket", ticket_id=ticket_id))
 
@@ -1059,6 +1166,7 @@ def add_comment(ticket_id: int):
             (ticket_id, int(g.user["id"]), body, created_at),
         )
         db.commit()
+        _invalidate_ticket(ticket_id)
     except Exception:
         db.rollback()
         flash("Не удалось добавить комментарий. Повторите попытку.", "error")
@@ -1105,6 +1213,7 @@ def add_part(ticket_id: int):
             (ticket_id, part_name, quantity, int(g.user["id"]), created_at),
         )
         db.commit()
+        _invalidate_ticket(ticket_id)
     except Exception:
         db.rollback()
         flash("Не удалось добавить комплектующую. Повторите попытку.", "error")
@@ -1125,6 +1234,7 @@ def delete_ticket(ticket_id: int):
     try:
         db.execute("DELETE FROM tickets WHERE id = ?", (ticket_id,))
         db.commit()
+        _invalidate_ticket(ticket_id)
     except Exception:
         db.rollback()
         flash("Не удалось удалить заявку. Проверьте связи и повторите попытку.", "error")
@@ -96,12 +96,44 @@ def generate_request_number(db: sqlite3.Connection, created_at_iso: str) -> str:
         created = datetime.now()
     day_prefix = created.strftime("%Y%m%d")
 
+    # The UPDATE takes the write lock before reading the counter, so concurrent
+    # writers are serialized and each gets its own value.
     row = db.execute(
-        "SELECT COUNT(*) AS cnt FROM tickets WHERE request_number LIKE ?",
-        (f"R-{day_prefix}-%",),
+        "UPDATE request_number_sequences SET last_value = last_value + 1 WHERE day = ? RETURNING last_value",
+        (day_prefix,),
     ).fetchone()
-    seq = int(row["cnt"]) + 1 if row is not None else 1
-    return f"R-{day_prefix}-{seq:04d}"
+    if row is None:
+        row = db.execute(
+            """
+            INSERT INTO request_number_sequences (day, last_value)
+            VALUES (?, ?)
+            ON CONFLICT(day) DO UPDATE SET last_value = last_value + 1
+            RETURNING last_value
+            """,
+            (day_prefix, _max_request_sequence(db, day_prefix) + 1),
+        ).fetchone()
+    return f"R-{day_prefix}-{int(row[0]):04d}"
+
+
+def request_sequence_value(db: sqlite3.Connection, day_prefix: str) -> int:
+    # Last number used for the day: the sequence row if there is one, else the highest existing ticket.
+    row = db.execute("SELECT last_value FROM request_number_sequences WHERE day = ?", (day_prefix,)).fetchone()
+    if row is not None:
+        return int(row[0])
+    return _max_request_sequence(db, day_prefix)
+
+
+def _max_request_sequence(db: sqlite3.Connection, day_prefix: str) -> int:
+    prefix = f"R-{day_prefix}-"
+    row = db.execute(
+        """
+        SELECT MAX(CAST(substr(request_number, ?) AS INTEGER))
+        FROM tickets
+        WHERE request_number >= ? AND request_number < ?
+        """,
+        (len(prefix) + 1, prefix, f"R-{day_prefix}."),
+    ).fetchone()
+    return int(row[0] or 0)
 
 
 def normalize_search_tokens(value: str) -> Iterable[str]:
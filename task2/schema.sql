@@ -1,5 +1,7 @@
 PRAGMA foreign_keys = ON;
 
+-- Import checkpoints are created by tools/task2_manage.py; a fresh schema starts the import over.
+DROP TABLE IF EXISTS import_checkpoints;
 DROP TABLE IF EXISTS ticket_parts;
 DROP TABLE IF EXISTS parts;
 DROP TABLE IF EXISTS ticket_comments;
@@ -113,6 +115,8 @@ CREATE TABLE ticket_comments (
   FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE RESTRICT
 );
 
+CREATE UNIQUE INDEX idx_ticket_comments_unique ON ticket_comments(ticket_id, user_id, created_at, body);
+
 CREATE TABLE parts (
   id INTEGER PRIMARY KEY AUTOINCREMENT,
   name TEXT NOT NULL UNIQUE
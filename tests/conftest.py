@@ -12,13 +12,21 @@ from app.db import init_db
 
 
 @pytest.fixture()
-def app(tmp_path):
+def app_config():
+    """Extra app config; override this fixture in a test module to change it."""
+    return {}
+
+
+@pytest.fixture()
+def app(tmp_path, app_config):
     test_db = tmp_path / "test.sqlite3"
     app = create_app(
         {
             "TESTING": True,
             "SECRET_KEY": "test-secret",
             "DATABASE": str(test_db),
+            "NOTIFICATION_DELIVERY": "sync",
+            **app_config,
         }
     )
     with app.app_context():
@@ -0,0 +1,79 @@
+from app.db import get_db
+from app.services.dashboard import reconcile_dashboard
+
+
+def _login(client, username: str, password: str) -> None:
+    response = client.post("/login", data={"username": username, "password": password})
+    assert response.status_code == 302
+
+
+def _create_ticket(client) -> int:
+    _login(client, "operator", "operator")
+    response = client.post(
+        "/tickets/new",
+        data={
+            "equipment_type": "Кондиционер",
+            "device_model": "LG S12EQ",
+            "problem_description": "Не включается",
+            "customer_full_name": "Иванов Иван",
+            "customer_phone": "+7 (999) 123-45-67",
+            "assigned_specialist_id": "3",
+        },
+    )
+    assert response.status_code == 302
+    return int(response.headers["Location"].rsplit("/", 1)[-1])
+
+
+def test_summary_tables_follow_ticket_changes(client, app):
+    ticket_id = _create_ticket(client)
+
+    with app.app_context():
+        db = get_db()
+        db.execute("UPDATE tickets SET due_at = '2000-01-01 23:59:59' WHERE id = ?", (ticket_id,))
+        db.execute(
+            """
+            INSERT INTO ticket_help_requests (ticket_id, requested_by_user_id, requested_at, message)
+            VALUES (?, 3, '2024-01-01 10:00:00', 'Нужна помощь')
+            """,
+            (ticket_id,),
+        )
+        db.commit()
+        assert db.execute("SELECT active_tickets FROM specialist_workload WHERE specialist_user_id = 3").fetchone()[0] == 1
+        assert db.execute("SELECT COUNT(*) FROM dashboard_due_tickets WHERE ticket_id = ?", (ticket_id,)).fetchone()[0] == 1
+        assert db.execute("SELECT COUNT(*) FROM dashboard_open_help").fetchone()[0] == 1
+
+    manager_client = app.test_client()
+    _login(manager_client, "manager", "manager")
+    html = manager_client.get("/manager/").data.decode("utf-8")
+    assert "Просроченных заявок нет" not in html
+    assert "Загрузка специалистов" in html
+
+    with app.app_context():
+        db = get_db()
+        db.execute("UPDATE tickets SET status = 'completed' WHERE id = ?", (ticket_id,))
+        db.execute("UPDATE ticket_help_requests SET status = 'resolved' WHERE ticket_id = ?", (ticket_id,))
+        db.commit()
+        assert db.execute("SELECT COUNT(*) FROM specialist_workload").fetchone()[0] == 0
+        assert db.execute("SELECT COUNT(*) FROM dashboard_due_tickets").fetchone()[0] == 0
+        assert db.execute("SELECT COUNT(*) FROM dashboard_open_help").fetchone()[0] == 0
+        assert sum(reconcile_dashboard(db).values()) == 0
+
+
+def test_reconcile_dashboard_repairs_drift(client, app):
+    ticket_id = _create_ticket(client)
+
+    with app.app_context():
+        db = get_db()
+        db.execute("UPDATE tickets SET due_at = '2000-01-01 23:59:59' WHERE id = ?", (ticket_id,))
+        db.execute("DELETE FROM dashboard_due_tickets")
+        db.execute("UPDATE specialist_workload SET active_tickets = 7")
+        db.commit()
+
+        runner = app.test_cli_runner()
+        result = runner.invoke(args=["reconcile-dashboard"])
+        assert result.exit_code == 0
+        assert "исправлено строк: 3" in result.output
+
+        db = get_db()
+        assert db.execute("SELECT active_tickets FROM specialist_workload WHERE specialist_user_id = 3").fetchone()[0] == 1
+        assert db.execute("SELECT ticket_id FROM dashboard_due_tickets").fetchone()[0] == ticket_id
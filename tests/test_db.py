@@ -0,0 +1,134 @@
+import sqlite3
+import threading
+
+import pytest
+
+from app.db import get_db
+from app.db import get_pool_stats
+from app.db import resolve_pragmas
+from app.db import run_write
+from app.pool import ConnectionPool
+
+
+def test_pool_reuses_connection_between_requests(client, app):
+    client.post("/login", data={"username": "operator", "password": "operator"})
+    client.get("/tickets/")
+    client.get("/tickets/")
+
+    with app.app_context():
+        stats = get_pool_stats()
+    assert stats.open_connections == 1
+    assert stats.hits >= 2
+
+
+def test_pool_bootstraps_connection_once(tmp_path):
+    calls = []
+    pool = ConnectionPool(tmp_path / "pool.sqlite3", size=2, bootstrap=calls.append)
+
+    first = pool.acquire()
+    pool.release(first)
+    second = pool.acquire()
+    pool.release(second)
+
+    assert first is second
+    assert len(calls) == 1
+    assert second.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+    pool.close()
+
+
+def test_pool_rolls_back_uncommitted_work_on_release(tmp_path):
+    pool = ConnectionPool(tmp_path / "pool.sqlite3", size=1)
+    connection = pool.acquire()
+    connection.execute("CREATE TABLE items (id INTEGER PRIMARY KEY)")
+    connection.commit()
+    connection.execute("INSERT INTO items DEFAULT VALUES")
+    pool.release(connection)
+
+    connection = pool.acquire()
+    assert connection.execute("SELECT COUNT(*) FROM items").fetchone()[0] == 0
+    pool.release(connection)
+    pool.close()
+
+
+def test_pool_waits_when_exhausted(tmp_path):
+    pool = ConnectionPool(tmp_path / "pool.sqlite3", size=1, timeout=5)
+    held = pool.acquire()
+    acquired = threading.Event()
+
+    def worker():
+        connection = pool.acquire()
+        acquired.set()
+        pool.release(connection)
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    assert not acquired.wait(0.2)
+    pool.release(held)
+    thread.join(5)
+
+    assert acquired.is_set()
+    stats = pool.stats()
+    assert stats.waits == 1
+    assert stats.open_connections == 1
+    pool.close()
+
+
+def test_pool_replaces_broken_connection(tmp_path):
+    pool = ConnectionPool(tmp_path / "pool.sqlite3", size=1)
+    connection = pool.acquire()
+    pool.release(connection)
+    connection.close()
+
+    replacement = pool.acquire()
+    assert replacement is not connection
+    assert replacement.execute("SELECT 1").fetchone()[0] == 1
+    assert pool.stats().health_check_failures == 1
+    pool.release(replacement)
+    pool.close()
+
+
+def test_balanced_profile_enables_wal(app):
+    with app.app_context():
+        db = get_db()
+        assert db.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert db.execute("PRAGMA synchronous").fetchone()[0] == 1
+        assert db.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+
+
+def test_profile_overrides_and_unknown_profile():
+    pragmas = resolve_pragmas("balanced", {"busy_timeout": 250})
+    assert pragmas["journal_mode"] == "WAL"
+    assert pragmas["busy_timeout"] == 250
+
+    with pytest.raises(ValueError):
+        resolve_pragmas("turbo")
+
+
+def test_run_write_retries_busy_errors(app):
+    app.config["DB_WRITE_RETRY_BACKOFF"] = 0
+    attempts = []
+
+    def operation(db):
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise sqlite3.OperationalError("database is locked")
+        db.execute("UPDATE users SET full_name = 'Оператор 2' WHERE username = 'operator'")
+        return "done"
+
+    with app.app_context():
+        assert run_write(operation) == "done"
+        row = get_db().execute("SELECT full_name FROM users WHERE username = 'operator'").fetchone()
+
+    assert len(attempts) == 3
+    assert row["full_name"] == "Оператор 2"
+
+
+def test_run_write_gives_up_after_configured_retries(app):
+    app.config.update(DB_WRITE_RETRIES=1, DB_WRITE_RETRY_BACKOFF=0)
+
+    def operation(db):
+        raise sqlite3.OperationalError("database is locked")
+
+    with app.app_context():
+        with pytest.raises(sqlite3.OperationalError):
+            run_write(operation)
@@ -0,0 +1,161 @@
+import sqlite3
+
+import pytest
+
+from app.db import get_db
+from app.db import init_db
+from app.migrations import LATEST_VERSION
+from app.migrations import migrate
+from app.migrations import schema_version
+
+LEGACY_SCHEMA = """
+CREATE TABLE users (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  username TEXT NOT NULL UNIQUE,
+  password_hash TEXT NOT NULL,
+  full_name TEXT NOT NULL,
+  role TEXT NOT NULL CHECK(role IN ('admin', 'operator', 'specialist')),
+  is_active INTEGER NOT NULL DEFAULT 1,
+  created_at TEXT NOT NULL DEFAULT (datetime('now'))
+);
+
+CREATE TABLE tickets (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  request_number TEXT NOT NULL UNIQUE,
+  created_at TEXT NOT NULL,
+  equipment_type TEXT NOT NULL,
+  device_model TEXT NOT NULL,
+  problem_description TEXT NOT NULL,
+  customer_full_name TEXT NOT NULL,
+  customer_phone TEXT NOT NULL,
+  status TEXT NOT NULL CHECK(status IN ('open', 'in_repair', 'waiting_parts', 'completed')),
+  assigned_specialist_id INTEGER,
+  completed_at TEXT,
+  updated_at TEXT NOT NULL,
+  FOREIGN KEY (assigned_specialist_id) REFERENCES users(id) ON DELETE SET NULL
+);
+
+CREATE INDEX idx_tickets_request_number ON tickets(request_number);
+
+CREATE TABLE notifications (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  user_id INTEGER NOT NULL,
+  ticket_id INTEGER,
+  type TEXT NOT NULL,
+  message TEXT NOT NULL,
+  is_read INTEGER NOT NULL DEFAULT 0,
+  created_at TEXT NOT NULL,
+  FOREIGN KEY(user_id) REFERENCES users(id) ON DELETE CASCADE,
+  FOREIGN KEY(ticket_id) REFERENCES tickets(id) ON DELETE CASCADE
+);
+"""
+
+
+def _legacy_db(path) -> sqlite3.Connection:
+    db = sqlite3.connect(path)
+    db.row_factory = sqlite3.Row
+    db.executescript(LEGACY_SCHEMA)
+    for index in range(1, 6):
+        db.execute(
+            "INSERT INTO users (username, password_hash, full_name, role) VALUES (?, 'x', ?, 'specialist')",
+            (f"user{index}", f"Пользователь {index}"),
+        )
+    db.execute(
+        """
+        INSERT INTO tickets (request_number, created_at, equipment_type, device_model, problem_description,
+                             customer_full_name, customer_phone, status, assigned_specialist_id, updated_at)
+        VALUES ('20240101-0001', '2024-01-01 10:00:00', 'Кондиционер', 'LG', 'Не включается',
+                'Иванов', '+7 999', 'open', 2, '2024-01-01 10:00:00')
+        """
+    )
+    db.executemany(
+        "INSERT INTO notifications (user_id, ticket_id, type, message, created_at) VALUES (2, 1, 'x', 'm', '2024-01-01')",
+        [()] * 3,
+    )
+    db.commit()
+    return db
+
+
+def test_migrate_upgrades_legacy_database_in_chunks(tmp_path):
+    db = _legacy_db(tmp_path / "legacy.sqlite3")
+    messages: list[str] = []
+
+    applied = migrate(db, batch_size=2, report=messages.append)
+
+    assert [m.version for m in applied] == list(range(1, LATEST_VERSION + 1))
+    assert schema_version(db) == LATEST_VERSION
+    assert "users: 2/5" in messages and "users: 5/5" in messages
+    assert any(message.startswith("indexes:") for message in messages)
+
+    db.execute("INSERT INTO users (username, password_hash, full_name, role) VALUES ('m', 'x', 'М', 'manager')")
+    row = db.execute("SELECT unread_notifications FROM users WHERE id = 2").fetchone()
+    assert row[0] == 3
+    ticket = db.execute("SELECT due_at, fault_category FROM tickets WHERE id = 1").fetchone()
+    assert ticket["due_at"] is None
+    assert ticket["fault_category"] == "Не включается"
+    assert db.execute("SELECT active_tickets FROM specialist_workload WHERE specialist_user_id = 2").fetchone()[0] == 1
+
+    names = {row[0] for row in db.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert "idx_tickets_request_number" not in names
+    assert {"idx_tickets_status_created", "idx_status_history_ticket"} <= names
+    db.close()
+
+
+def test_up_to_date_schema_skips_introspection(app):
+    with app.app_context():
+        db = get_db()
+        assert schema_version(db) == LATEST_VERSION
+
+        statements: list[str] = []
+        db.set_trace_callback(statements.append)
+        assert init_db() == []
+        db.set_trace_callback(None)
+        assert statements == ["PRAGMA user_version"]
+
+
+def test_db_migrate_command(app):
+    runner = app.test_cli_runner()
+    with app.app_context():
+        result = runner.invoke(args=["db-migrate", "--status"])
+        assert result.exit_code == 0
+        assert f"Версия схемы: {LATEST_VERSION} из {LATEST_VERSION}" in result.output
+
+        get_db().execute("PRAGMA user_version = 6")
+        result = runner.invoke(args=["db-migrate", "--batch-size", "10"])
+        assert result.exit_code == 0
+        assert "[7] indexes" in result.output
+        assert f"Применено миграций: {LATEST_VERSION - 6}" in result.output
+
+
+def test_startup_without_bootstrap_leaves_schema_to_cli(tmp_path):
+    from app import create_app
+
+    database = tmp_path / "worker.sqlite3"
+    app = create_app({"TESTING": True, "DATABASE": str(database), "BOOTSTRAP_ON_STARTUP": False})
+    assert not database.exists()
+
+    runner = app.test_cli_runner()
+    with app.app_context():
+        result = runner.invoke(args=["init-db"])
+        assert result.exit_code == 0
+        assert schema_version(get_db()) == LATEST_VERSION
+
+
+@pytest.mark.parametrize("value", ["0", "false", "False", "no", "OFF", " off "])
+def test_bootstrap_env_accepts_boolean_spellings(tmp_path, monkeypatch, value):
+    from app import create_app
+
+    monkeypatch.setenv("BOOTSTRAP_ON_STARTUP", value)
+    database = tmp_path / "worker.sqlite3"
+    app = create_app({"TESTING": True, "DATABASE": str(database)})
+    assert app.config["BOOTSTRAP_ON_STARTUP"] is False
+    assert not database.exists()
+
+
+@pytest.mark.parametrize("value", ["1", "true", "yes", "on"])
+def test_bootstrap_env_keeps_startup_bootstrap_on(tmp_path, monkeypatch, value):
+    from app import create_app
+
+    monkeypatch.setenv("BOOTSTRAP_ON_STARTUP", value)
+    app = create_app({"TESTING": True, "DATABASE": str(tmp_path / "app.sqlite3")})
+    assert app.config["BOOTSTRAP_ON_STARTUP"] is True
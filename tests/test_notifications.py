@@ -0,0 +1,411 @@
+import re
+import threading
+import time
+
+from app.db import get_db
+from app.services.notification_events import get_broker
+from app.services.notification_events import stream_connection_cap
+from app.services.notifications import NewNotification
+from app.services.notifications import create_notifications
+from app.services.outbox import drain_outbox
+from app.services.outbox import outbox_stats
+from app.services.outbox import stop_outbox_worker
+from app.utils import now_iso
+
+
+def _login(client, username: str, password: str) -> None:
+    response = client.post("/login", data={"username": username, "password": password})
+    assert response.status_code == 302
+
+
+def _create_ticket(client) -> str:
+    response = client.post(
+        "/tickets/new",
+        data={
+            "equipment_type": "Кондиционер",
+            "device_model": "LG S12EQ",
+            "problem_description": "Не включается",
+            "customer_full_name": "Иванов Иван",
+            "customer_phone": "+7 (999) 123-45-67",
+            "assigned_specialist_id": "3",
+        },
+    )
+    assert response.status_code == 302
+    return response.headers["Location"]
+
+
+def _status_notifications(app) -> list[tuple[str, int]]:
+    with app.app_context():
+        rows = get_db().execute(
+            """
+            SELECT u.username, n.ticket_id
+            FROM notifications n
+            JOIN users u ON u.id = n.user_id
+            WHERE n.type = 'status_changed'
+            ORDER BY u.username
+            """
+        ).fetchall()
+    return [(row["username"], row["ticket_id"]) for row in rows]
+
+
+def test_create_notifications_inserts_batch_and_counts_unread(app):
+    with app.app_context():
+        db = get_db()
+        create_notifications(
+            db=db,
+            notifications=[
+                NewNotification(user_id=1, ticket_id=None, type_="test", message="Первое"),
+                NewNotification(user_id=1, ticket_id=None, type_="test", message="Второе"),
+                NewNotification(user_id=2, ticket_id=None, type_="test", message="Третье"),
+            ],
+        )
+        create_notifications(db=db, notifications=[])
+        counters = db.execute("SELECT id, unread_notifications FROM users WHERE id IN (1, 2) ORDER BY id").fetchall()
+    assert [(row["id"], row["unread_notifications"]) for row in counters] == [(1, 2), (2, 1)]
+
+
+def test_status_change_notifies_staff_and_assigned_specialist(client, app):
+    _login(client, "operator", "operator")
+    ticket_url = _create_ticket(client)
+    ticket_id = int(ticket_url.rsplit("/", 1)[-1])
+
+    response = client.post(ticket_url + "/status", data={"status": "in_repair"})
+    assert response.status_code == 302
+    assert _status_notifications(app) == [("admin", ticket_id), ("operator", ticket_id), ("specialist", ticket_id)]
+
+
+def test_status_change_enqueues_one_event_in_the_status_transaction(client, app):
+    app.config["NOTIFICATION_DELIVERY"] = "external"
+    _login(client, "operator", "operator")
+    ticket_url = _create_ticket(client)
+
+    statements: list[str] = []
+    with app.app_context():
+        get_db().set_trace_callback(statements.append)
+    response = client.post(ticket_url + "/status", data={"status": "in_repair"})
+    with app.app_context():
+        get_db().set_trace_callback(None)
+
+    assert response.status_code == 302
+    assert any("UPDATE tickets SET status" in sql for sql in statements)
+    assert sum(1 for sql in statements if sql.strip().upper() == "COMMIT") == 1
+    assert _status_notifications(app) == []
+    with app.app_context():
+        assert outbox_stats(get_db()).pending == 2
+
+        assert drain_outbox(get_db()) == 2
+        stats = outbox_stats(get_db())
+    assert stats.pending == 0
+    assert stats.delivered_events == 2
+    assert [username for username, _ in _status_notifications(app)] == ["admin", "operator", "specialist"]
+
+
+def test_recipient_cache_follows_admin_changes(client, app):
+    admin_client = app.test_client()
+    _login(admin_client, "admin", "admin")
+    _login(client, "operator", "operator")
+    ticket_url = _create_ticket(client)
+    client.post(ticket_url + "/status", data={"status": "in_repair"})
+
+    response = admin_client.post(
+        "/admin/users/new",
+        data={"username": "operator2", "full_name": "Оператор 2", "role": "operator", "password": "operator2"},
+    )
+    assert response.status_code == 302
+
+    client.post(ticket_url + "/status", data={"status": "waiting_parts"})
+    assert [username for username, _ in _status_notifications(app)].count("operator2") == 1
+
+
+def test_edit_ticket_folds_notifications_into_one_commit(client, app):
+    _login(client, "operator", "operator")
+    ticket_url = _create_ticket(client)
+
+    response = client.post(
+        ticket_url + "/edit",
+        data={"status": "waiting_parts", "problem_description": "Не включается", "assigned_specialist_id": "3"},
+    )
+    assert response.status_code == 302
+    assert [username for username, _ in _status_notifications(app)] == ["admin", "operator", "specialist"]
+
+
+def test_failed_batch_stays_queued_for_retry(app):
+    with app.app_context():
+        db = get_db()
+        db.execute(
+            """
+            INSERT INTO notification_outbox (ticket_id, type, message, recipients, created_at, available_at)
+            VALUES (NULL, 'test', 'Сломанное событие', 'not json', '2025-12-16 10:00:00', '2025-12-16 10:00:00')
+            """
+        )
+        db.commit()
+
+        assert drain_outbox(db) == 0
+        row = db.execute("SELECT attempts, last_error, available_at FROM notification_outbox").fetchone()
+        stats = outbox_stats(db)
+
+    assert row["attempts"] == 1
+    assert row["last_error"]
+    assert row["available_at"] > "2025-12-16 10:00:00"
+    assert stats.pending == 1
+    assert stats.retrying == 1
+    assert stats.failed_batches == 1
+
+
+def _enqueue_raw(db, message: str, recipients: str) -> None:
+    db.execute(
+        """
+        INSERT INTO notification_outbox (ticket_id, type, message, recipients, created_at, available_at)
+        VALUES (NULL, 'test', ?, ?, '2025-12-16 10:00:00', '2025-12-16 10:00:00')
+        """,
+        (message, recipients),
+    )
+
+
+def test_bad_event_does_not_hold_back_its_batch(app):
+    with app.app_context():
+        db = get_db()
+        _enqueue_raw(db, "Первое", '{"user_ids": [1]}')
+        _enqueue_raw(db, "Сломанное событие", "not json")
+        _enqueue_raw(db, "Второе", '{"user_ids": [1]}')
+        _enqueue_raw(db, "Третье", '{"roles": ["operator"]}')
+        db.commit()
+
+        assert drain_outbox(db, batch_size=10) == 3
+        delivered = [row["message"] for row in db.execute("SELECT message FROM notifications WHERE type = 'test' ORDER BY id")]
+        queued = db.execute("SELECT message, attempts FROM notification_outbox").fetchall()
+
+    assert delivered == ["Первое", "Второе", "Третье"]
+    assert [(row["message"], row["attempts"]) for row in queued] == [("Сломанное событие", 1)]
+
+
+def test_event_moves_to_dead_letters_after_max_attempts(app):
+    app.config["NOTIFICATION_OUTBOX_MAX_ATTEMPTS"] = 2
+    with app.app_context():
+        db = get_db()
+        _enqueue_raw(db, "Сломанное событие", "not json")
+        db.commit()
+
+        drain_outbox(db)
+        db.execute("UPDATE notification_outbox SET available_at = '2000-01-01 00:00:00'")
+        db.commit()
+        drain_outbox(db)
+
+        dead = db.execute("SELECT message, attempts, last_error FROM notification_outbox_dead").fetchall()
+        stats = outbox_stats(db)
+        assert drain_outbox(db) == 0
+
+    assert [(row["message"], row["attempts"]) for row in dead] == [("Сломанное событие", 2)]
+    assert dead[0]["last_error"]
+    assert (stats.pending, stats.dead) == (0, 1)
+
+
+def test_thread_worker_delivers_in_background(client, app):
+    app.config.update(NOTIFICATION_DELIVERY="thread", NOTIFICATION_OUTBOX_POLL_INTERVAL=0.05)
+    try:
+        _login(client, "operator", "operator")
+        ticket_url = _create_ticket(client)
+        client.post(ticket_url + "/status", data={"status": "in_repair"})
+
+        deadline = time.monotonic() + 5
+        while len(_status_notifications(app)) < 3 and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        stop_outbox_worker(app)
+
+    assert [username for username, _ in _status_notifications(app)] == ["admin", "operator", "specialist"]
+
+
+def test_worker_command_drains_queue_once(client, app):
+    app.config["NOTIFICATION_DELIVERY"] = "external"
+    _login(client, "operator", "operator")
+    ticket_url = _create_ticket(client)
+    client.post(ticket_url + "/status", data={"status": "in_repair"})
+
+    runner = app.test_cli_runner()
+    with app.app_context():
+        result = runner.invoke(args=["notifications-worker", "--once"])
+    assert result.exit_code == 0
+    assert "Доставлено событий: 2" in result.output
+    assert len(_status_notifications(app)) == 3
+
+
+def _notify(app, user_id: int, message: str) -> None:
+    with app.app_context():
+        create_notifications(
+            db=get_db(),
+            notifications=[NewNotification(user_id=user_id, ticket_id=None, type_="test", message=message)],
+        )
+
+
+def test_stream_pushes_unread_count_and_new_notifications(client, app):
+    app.config.update(NOTIFICATION_STREAM_HEARTBEAT=0.05, NOTIFICATION_STREAM_MAX_AGE=1.0)
+    _login(client, "specialist", "specialist")
+
+    def publish_later() -> None:
+        time.sleep(0.3)
+        _notify(app, 3, "Живое уведомление")
+
+    publisher = threading.Thread(target=publish_later)
+    publisher.start()
+    response = client.get("/notifications/stream", buffered=False)
+    body = b"".join(response.response).decode("utf-8")
+    publisher.join()
+
+    assert response.mimetype == "text/event-stream"
+    assert body.startswith("retry: 50\n\n")
+    assert 'event: unread\ndata: {"count": 0}' in body
+    assert "event: notification" in body
+    assert "Живое уведомление" in body
+    assert 'event: unread\ndata: {"count": 1}' in body
+    with app.app_context():
+        assert get_broker().connections == 0
+
+
+def test_stream_rejects_connections_over_the_cap(client, app):
+    app.config["NOTIFICATION_STREAM_MAX_PER_USER"] = 1
+    _login(client, "specialist", "specialist")
+    with app.app_context():
+        subscription = get_broker().subscribe(3)
+    try:
+        response = client.get("/notifications/stream")
+    finally:
+        with app.app_context():
+            get_broker().unsubscribe(subscription)
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "30"
+    assert response.get_json()["poll_url"] == "/notifications/poll"
+
+
+def test_long_poll_returns_changes_and_waits_for_publish(client, app):
+    _login(client, "specialist", "specialist")
+    state = client.get("/notifications/poll", query_string={"timeout": "0"}).get_json()
+    assert state["unread"] == 0
+    assert state["notifications"] == []
+
+    _notify(app, 3, "Первое")
+    changed = client.get(
+        "/notifications/poll", query_string={"after": state["after"], "unread": 0, "timeout": "5"}
+    ).get_json()
+    assert changed["unread"] == 1
+    assert [item["message"] for item in changed["notifications"]] == ["Первое"]
+
+    threading.Timer(0.2, _notify, args=(app, 3, "Второе")).start()
+    started = time.monotonic()
+    waited = client.get(
+        "/notifications/poll", query_string={"after": changed["after"], "unread": 1, "timeout": "5"}
+    ).get_json()
+    assert time.monotonic() - started < 4
+    assert waited["unread"] == 2
+    assert [item["message"] for item in waited["notifications"]] == ["Второе"]
+
+
+def _seed_notifications(app, user_id: int, count: int, *, created_at: str = "2025-12-16 10:00:00") -> None:
+    with app.app_context():
+        create_notifications(
+            db=get_db(),
+            notifications=[
+                NewNotification(user_id=user_id, ticket_id=None, type_="test", message=f"Сообщение {idx:03d}", created_at=created_at)
+                for idx in range(count)
+            ],
+        )
+
+
+def test_inbox_pages_with_cursor_over_index(client, app):
+    app.config["NOTIFICATIONS_PAGE_SIZE"] = 20
+    _seed_notifications(app, 3, 45)
+    _login(client, "specialist", "specialist")
+
+    seen: list[str] = []
+    url = "/notifications"
+    pages = 0
+    while url:
+        html = client.get(url).data.decode("utf-8")
+        seen.extend(re.findall(r"Сообщение \d{3}", html))
+        match = re.search(r'href="(/notifications\?after=[^"]+)"', html)
+        url = match.group(1).replace("&amp;", "&") if match else None
+        pages += 1
+    assert pages == 3
+    assert seen == [f"Сообщение {idx:03d}" for idx in reversed(range(45))]
+
+    with app.app_context():
+        plan = " ".join(
+            row["detail"]
+            for row in get_db().execute(
+                """
+                EXPLAIN QUERY PLAN
+                SELECT n.* FROM notifications n
+                WHERE n.user_id = ? AND (n.created_at, n.id) < (?, ?)
+                ORDER BY n.created_at DESC, n.id DESC LIMIT 21
+                """,
+                (3, "2025-12-16 10:00:00", 10),
+            )
+        )
+    assert "idx_notifications_user_created" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_mark_single_and_selected_notifications_read(client, app):
+    _seed_notifications(app, 3, 4)
+    _login(client, "specialist", "specialist")
+    with app.app_context():
+        ids = [int(row["id"]) for row in get_db().execute("SELECT id FROM notifications ORDER BY id")]
+
+    response = client.post(f"/notifications/{ids[0]}/read", data={"return_to": "/notifications?per_page=2"})
+    assert response.status_code == 302
+    assert response.headers["Location"] == "/notifications?per_page=2"
+
+    client.post("/notifications/mark-read", data={"ids": [str(ids[1]), str(ids[2]), "x"]})
+    client.post(f"/notifications/{ids[1]}/read", data={"return_to": "https://example.com/"})
+
+    with app.app_context():
+        db = get_db()
+        unread = [int(row["id"]) for row in db.execute("SELECT id FROM notifications WHERE is_read = 0")]
+        counter = db.execute("SELECT unread_notifications FROM users WHERE id = 3").fetchone()[0]
+    assert unread == [ids[3]]
+    assert counter == 1
+    html = client.get("/notifications").data.decode("utf-8")
+    assert '<span class="badge" title="Непрочитанные">1</span>' in html
+
+
+def test_archive_command_moves_old_read_notifications(app):
+    _seed_notifications(app, 3, 3, created_at="2020-01-01 10:00:00")
+    _seed_notifications(app, 3, 2, created_at=now_iso())
+    with app.app_context():
+        db = get_db()
+        db.execute("UPDATE notifications SET is_read = 1 WHERE id IN (1, 2, 4)")
+        db.commit()
+
+    runner = app.test_cli_runner()
+    with app.app_context():
+        result = runner.invoke(args=["archive-notifications", "--days", "30", "--batch-size", "1"])
+        db = get_db()
+        remaining = [int(row["id"]) for row in db.execute("SELECT id FROM notifications ORDER BY id")]
+        archived = [int(row["id"]) for row in db.execute("SELECT id FROM notifications_archive ORDER BY id")]
+        counter = db.execute("SELECT unread_notifications FROM users WHERE id = 3").fetchone()[0]
+
+    assert result.exit_code == 0
+    assert "архив: 2" in result.output
+    assert remaining == [3, 4, 5]
+    assert archived == [1, 2]
+    assert counter == 2
+
+
+def test_stream_cap_defaults_to_a_share_of_worker_threads():
+    assert stream_connection_cap({}) == 2
+    assert stream_connection_cap({"WEB_WORKER_THREADS": 2}) == 1
+    assert stream_connection_cap({"WEB_WORKER_THREADS": 32}) == 8
+    assert stream_connection_cap({"WEB_WORKER_THREADS": 32, "NOTIFICATION_STREAM_MAX_CONNECTIONS": 0}) == 0
+
+
+def test_long_poll_backs_off_when_no_slot_is_free(client, app):
+    app.config["NOTIFICATION_STREAM_MAX_CONNECTIONS"] = 0
+    _login(client, "specialist", "specialist")
+    assert client.get("/notifications/stream").status_code == 503
+
+    started = time.monotonic()
+    state = client.get("/notifications/poll", query_string={"unread": 0, "timeout": "5"}).get_json()
+    assert time.monotonic() - started < 2
+    assert state["notifications"] == []
+    assert state["retry_after"] == 15
@@ -0,0 +1,118 @@
+from app.db import get_db
+from app.services.notifications import NewNotification
+from app.services.notifications import create_notifications
+from app.services.page_cache import data_version
+
+
+def _login(client, username: str, password: str) -> None:
+    response = client.post("/login", data={"username": username, "password": password})
+    assert response.status_code == 302
+
+
+def _create_ticket(client) -> str:
+    response = client.post(
+        "/tickets/new",
+        data={
+            "equipment_type": "Кондиционер",
+            "device_model": "LG S12EQ",
+            "problem_description": "Не включается",
+            "customer_full_name": "Иванов Иван",
+            "customer_phone": "+7 (999) 123-45-67",
+            "assigned_specialist_id": "3",
+        },
+    )
+    assert response.status_code == 302
+    return response.headers["Location"]
+
+
+def _version(app) -> int:
+    with app.app_context():
+        return data_version(get_db())[0]
+
+
+def test_writes_bump_data_version(client, app):
+    before = _version(app)
+    _login(client, "operator", "operator")
+    ticket_url = _create_ticket(client)
+    after_create = _version(app)
+    assert after_create > before
+
+    client.post(ticket_url + "/comment", data={"body": "Комментарий"})
+    assert _version(app) > after_create
+
+    unchanged = _version(app)
+    with app.app_context():
+        create_notifications(
+            db=get_db(),
+            notifications=[NewNotification(user_id=2, ticket_id=None, type_="test", message="Не меняет страницы")],
+        )
+    assert _version(app) == unchanged
+
+
+def test_unchanged_pages_answer_304(client, app):
+    _login(client, "admin", "admin")
+    ticket_url = _create_ticket(client)
+    client.get("/tickets/")  # consumes the flash message from creating the ticket
+
+    for url in ("/tickets/", ticket_url, "/stats", "/manager/"):
+        first = client.get(url)
+        assert first.status_code == 200
+        etag = first.headers["ETag"]
+        assert first.headers["Cache-Control"] == "private, no-cache"
+        assert "Last-Modified" in first.headers
+
+        again = client.get(url, headers={"If-None-Match": etag})
+        assert again.status_code == 304
+        assert again.data == b""
+
+    list_etag = client.get("/tickets/").headers["ETag"]
+    client.post(ticket_url + "/comment", data={"body": "Новый комментарий"})
+    client.get(ticket_url)
+    response = client.get("/tickets/", headers={"If-None-Match": list_etag})
+    assert response.status_code == 200
+
+
+def test_unread_badge_changes_etag(client, app):
+    _login(client, "operator", "operator")
+    client.get("/tickets/")
+    etag = client.get("/tickets/").headers["ETag"]
+    with app.app_context():
+        create_notifications(
+            db=get_db(),
+            notifications=[NewNotification(user_id=2, ticket_id=None, type_="test", message="Новое")],
+        )
+    response = client.get("/tickets/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert '<span class="badge" title="Непрочитанные">1</span>' in response.data.decode("utf-8")
+
+
+def test_pages_with_flash_messages_are_not_revalidated(client, app):
+    _login(client, "operator", "operator")
+    response = client.get("/tickets/", query_string={"q": "нет такой заявки"})
+    assert "По вашему запросу заявок не найдено" in response.data.decode("utf-8")
+    assert "ETag" not in response.headers
+    assert response.headers["Cache-Control"] == "no-store"
+
+    repeated = client.get("/tickets/", query_string={"q": "нет такой заявки"})
+    assert "По вашему запросу заявок не найдено" in repeated.data.decode("utf-8")
+
+
+def test_fragment_cache_skips_queries_and_respects_role(client, app):
+    _login(client, "operator", "operator")
+    _create_ticket(client)
+    client.get("/tickets/")
+
+    statements: list[str] = []
+    with app.app_context():
+        get_db().set_trace_callback(statements.append)
+    html = client.get("/tickets/").data.decode("utf-8")
+    with app.app_context():
+        get_db().set_trace_callback(None)
+    assert "Иванов Иван" in html
+    assert not any("FROM tickets t" in sql for sql in statements)
+
+    specialist_client = app.test_client()
+    _login(specialist_client, "specialist", "specialist")
+    specialist_html = specialist_client.get("/tickets/").data.decode("utf-8")
+    assert "Иванов Иван" in specialist_html
+    assert 'href="/tickets/new"' not in specialist_html.split('<main')[1]
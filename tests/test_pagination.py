@@ -0,0 +1,85 @@
+import re
+
+from app.db import get_db
+from app.pagination import decode_cursor
+from app.pagination import encode_cursor
+
+
+def _login(client, username: str, password: str) -> None:
+    response = client.post("/login", data={"username": username, "password": password})
+    assert response.status_code == 302
+
+
+def _insert_tickets(app, created_ats: list[str]) -> None:
+    with app.app_context():
+        db = get_db()
+        for idx, created_at in enumerate(created_ats, start=1):
+            db.execute(
+                """
+                INSERT INTO tickets (
+                  request_number, created_at, equipment_type, device_model, problem_description,
+                  customer_full_name, customer_phone, status, updated_at
+                )
+                VALUES (?, ?, 'Кондиционер', 'LG S12EQ', 'Не включается', ?, '+7 (999) 000-00-00', 'open', ?)
+                """,
+                (f"R-TEST-{idx:04d}", created_at, f"Клиент {idx:02d}", created_at),
+            )
+        db.commit()
+
+
+def _page(client, **query) -> tuple[list[str], str | None, str | None]:
+    response = client.get("/tickets/", query_string=query)
+    assert response.status_code == 200
+    html = response.data.decode("utf-8")
+    numbers = re.findall(r"R-TEST-\d{4}", html)
+    next_match = re.search(r'href="[^"]*after=([^&"]+)', html)
+    prev_match = re.search(r'href="[^"]*before=([^&"]+)', html)
+    return numbers, next_match.group(1) if next_match else None, prev_match.group(1) if prev_match else None
+
+
+def test_keyset_pagination_walks_forward_and_back(client, app):
+    _insert_tickets(
+        app,
+        [
+            "2025-12-01 10:00:00",
+            "2025-12-02 10:00:00",
+            "2025-12-02 10:00:00",
+            "2025-12-03 10:00:00",
+            "2025-12-04 10:00:00",
+        ],
+    )
+    _login(client, "operator", "operator")
+
+    first, next_cursor, prev_cursor = _page(client, per_page=2)
+    assert first == ["R-TEST-0005", "R-TEST-0004"]
+    assert prev_cursor is None
+
+    second, next_cursor, prev_cursor = _page(client, per_page=2, after=next_cursor)
+    assert second == ["R-TEST-0003", "R-TEST-0002"]
+    assert prev_cursor is not None
+
+    third, last_next, _ = _page(client, per_page=2, after=next_cursor)
+    assert third == ["R-TEST-0001"]
+    assert last_next is None
+
+    back, _, back_prev = _page(client, per_page=2, before=prev_cursor)
+    assert back == ["R-TEST-0005", "R-TEST-0004"]
+    assert back_prev is None
+
+
+def test_pagination_reports_capped_total_and_ignores_bad_cursor(client, app):
+    app.config["TICKETS_COUNT_LIMIT"] = 3
+    _insert_tickets(app, [f"2025-12-0{day} 10:00:00" for day in range(1, 6)])
+    _login(client, "operator", "operator")
+
+    response = client.get("/tickets/", query_string={"per_page": 2, "after": "not-a-cursor"})
+    html = response.data.decode("utf-8")
+    assert "более 3" in html
+    assert re.findall(r"R-TEST-\d{4}", html) == ["R-TEST-0005", "R-TEST-0004"]
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor(["2025-12-02 10:00:00", 7])
+    assert decode_cursor(cursor, size=2) == ("2025-12-02 10:00:00", 7)
+    assert decode_cursor(cursor, size=3) is None
+    assert decode_cursor("%%%", size=2) is None
@@ -0,0 +1,104 @@
+import re
+
+import pytest
+
+from app.db import get_db
+
+HOT_PAGES = (
+    "/tickets/",
+    "/tickets/?status=open",
+    "/tickets/?specialist_id=3",
+    "/tickets/?date_from=2024-01-01&date_to=2030-12-31",
+    "/tickets/?q=включается",
+    "/tickets/1",
+    "/notifications",
+    "/notifications/poll?timeout=0",
+)
+MANAGER_PAGES = (
+    "/manager/",
+    "/stats?date_from=2020-01-01&date_to=2030-12-31",
+)
+PAGES_BY_USER = {
+    "admin": HOT_PAGES + MANAGER_PAGES,
+    "specialist": HOT_PAGES,
+    "manager": HOT_PAGES + MANAGER_PAGES,
+}
+
+# One row per specialist: reading it whole is the cheapest plan.
+SMALL_TABLES = {"specialist_workload", "sqlite_master"}
+
+_ALIAS_RE = re.compile(r"\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?", re.IGNORECASE)
+_SCAN_RE = re.compile(r"^SCAN (\w+)$")
+
+
+@pytest.fixture()
+def app_config():
+    # Cached pages would skip the very queries whose plans are checked here.
+    return {"PAGE_CACHE_ENABLED": False, "PAGE_FRAGMENT_CACHE_ENABLED": False}
+
+
+def _login(client, username: str) -> None:
+    response = client.post("/login", data={"username": username, "password": username})
+    assert response.status_code == 302
+
+
+def _full_scans(db, sql: str) -> list[str]:
+    aliases = {alias or table: table for table, alias in _ALIAS_RE.findall(sql)}
+    scans = []
+    for row in db.execute("EXPLAIN QUERY PLAN " + sql).fetchall():
+        match = _SCAN_RE.match(row["detail"])
+        if match is None:
+            continue
+        table = aliases.get(match.group(1))
+        if table is not None and table not in SMALL_TABLES:
+            scans.append(f"{row['detail']} ({table})")
+    return scans
+
+
+def test_hot_queries_do_not_scan_whole_tables(app):
+    operator = app.test_client()
+    _login(operator, "operator")
+    response = operator.post(
+        "/tickets/new",
+        data={
+            "equipment_type": "Кондиционер",
+            "device_model": "LG S12EQ",
+            "problem_description": "Не включается",
+            "customer_full_name": "Иванов Иван",
+            "customer_phone": "+7 (999) 123-45-67",
+            "assigned_specialist_id": "3",
+        },
+    )
+    assert response.status_code == 302
+
+    statements: list[str] = []
+    with app.app_context():
+        get_db().set_trace_callback(statements.append)
+    for username, pages in PAGES_BY_USER.items():
+        client = app.test_client()
+        _login(client, username)
+        for url in pages:
+            response = client.get(url)
+            assert response.status_code == 200, f"{username}: {url} -> {response.status_code}"
+
+    with app.app_context():
+        db = get_db()
+        db.set_trace_callback(None)
+        queries = {
+            sql.strip()
+            for sql in statements
+            if sql.lstrip().upper().startswith(("SELECT", "WITH", "UPDATE", "DELETE"))
+        }
+        assert any("FROM tickets t" in sql for sql in queries)
+        assert any("FROM notifications n" in sql for sql in queries)
+
+        problems = {sql: scans for sql in sorted(queries) if (scans := _full_scans(db, sql))}
+        assert not problems, "\n\n".join(f"{sql}\n-> {scans}" for sql, scans in problems.items())
+
+        specialist_lists = [sql for sql in queries if "specialist_user_id = 3" in sql and "LIMIT" in sql]
+        assert specialist_lists
+        for sql in specialist_lists:
+            plan = " | ".join(row["detail"] for row in db.execute("EXPLAIN QUERY PLAN " + sql).fetchall())
+            assert "idx_tickets_assigned_created" in plan
+            assert "idx_ticket_specialists_specialist" in plan
+
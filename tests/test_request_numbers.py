@@ -0,0 +1,123 @@
+import multiprocessing
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from app.db import get_db
+from app.utils import generate_request_number
+from app.utils import now_iso
+
+CREATED_AT = "2025-12-16 10:00:00"
+
+
+def _allocate_tickets(db_path: str, count: int) -> None:
+    connection = sqlite3.connect(db_path, timeout=30)
+    connection.row_factory = sqlite3.Row
+    connection.execute("PRAGMA busy_timeout = 30000")
+    created = 0
+    while created < count:
+        try:
+            request_number = generate_request_number(connection, CREATED_AT)
+            connection.execute(
+                """
+                INSERT INTO tickets (
+                  request_number, created_at, equipment_type, device_model, problem_description,
+                  customer_full_name, customer_phone, status, updated_at
+                )
+                VALUES (?, ?, 'Кондиционер', 'LG', 'Шум', 'Клиент', '+79990000000', 'open', ?)
+                """,
+                (request_number, CREATED_AT, CREATED_AT),
+            )
+            connection.commit()
+            created += 1
+        except sqlite3.OperationalError as exc:
+            connection.rollback()
+            if "locked" not in str(exc) and "busy" not in str(exc):
+                raise
+            time.sleep(0.01)
+    connection.close()
+
+
+def _request_numbers(app) -> list[str]:
+    with app.app_context():
+        rows = get_db().execute("SELECT request_number FROM tickets ORDER BY request_number").fetchall()
+    return [row["request_number"] for row in rows]
+
+
+def test_request_numbers_are_unique_across_threads(app):
+    db_path = app.config["DATABASE"]
+    threads = [threading.Thread(target=_allocate_tickets, args=(db_path, 15)) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    numbers = _request_numbers(app)
+    assert len(numbers) == 90
+    assert numbers == [f"R-20251216-{seq:04d}" for seq in range(1, 91)]
+
+
+def test_request_numbers_are_unique_across_processes(app):
+    db_path = str(Path(app.config["DATABASE"]))
+    context = multiprocessing.get_context("spawn")
+    processes = [context.Process(target=_allocate_tickets, args=(db_path, 10)) for _ in range(3)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(60)
+        assert process.exitcode == 0
+
+    numbers = _request_numbers(app)
+    assert len(set(numbers)) == len(numbers) == 30
+
+
+def test_sequence_continues_after_existing_tickets(app):
+    with app.app_context():
+        db = get_db()
+        db.execute(
+            """
+            INSERT INTO tickets (
+              request_number, created_at, equipment_type, device_model, problem_description,
+              customer_full_name, customer_phone, status, updated_at
+            )
+            VALUES ('R-20251216-0007', ?, 'Кондиционер', 'LG', 'Шум', 'Клиент', '+79990000000', 'open', ?)
+            """,
+            (CREATED_AT, CREATED_AT),
+        )
+        assert generate_request_number(db, CREATED_AT) == "R-20251216-0008"
+        assert generate_request_number(db, CREATED_AT) == "R-20251216-0009"
+        assert generate_request_number(db, "2025-12-17 09:00:00") == "R-20251217-0001"
+        db.commit()
+
+
+def test_create_ticket_skips_number_taken_outside_the_sequence(client, app):
+    day = now_iso()[:10].replace("-", "")
+    with app.app_context():
+        db = get_db()
+        db.execute("INSERT INTO request_number_sequences (day, last_value) VALUES (?, 0)", (day,))
+        db.execute(
+            """
+            INSERT INTO tickets (
+              request_number, created_at, equipment_type, device_model, problem_description,
+              customer_full_name, customer_phone, status, updated_at
+            )
+            VALUES (?, ?, 'Кондиционер', 'LG', 'Шум', 'Клиент', '+79990000000', 'open', ?)
+            """,
+            (f"R-{day}-0001", CREATED_AT, CREATED_AT),
+        )
+        db.commit()
+
+    client.post("/login", data={"username": "operator", "password": "operator"})
+    response = client.post(
+        "/tickets/new",
+        data={
+            "equipment_type": "Кондиционер",
+            "device_model": "LG S12EQ",
+            "problem_description": "Не включается",
+            "customer_full_name": "Иванов Иван",
+            "customer_phone": "+7 (999) 123-45-67",
+        },
+        follow_redirects=True,
+    )
+    assert f"R-{day}-0002" in response.data.decode("utf-8")
@@ -0,0 +1,99 @@
+from app.db import get_db
+from app.services.search import build_search_filter
+
+
+def _login(client, username: str, password: str) -> None:
+    response = client.post("/login", data={"username": username, "password": password})
+    assert response.status_code == 302
+
+
+def _create_ticket(client, *, customer: str, phone: str, model: str = "LG S12EQ") -> None:
+    response = client.post(
+        "/tickets/new",
+        data={
+            "equipment_type": "Кондиционер",
+            "device_model": model,
+            "problem_description": "Не включается",
+            "customer_full_name": customer,
+            "customer_phone": phone,
+            "assigned_specialist_id": "3",
+        },
+    )
+    assert response.status_code == 302
+
+
+def _search(client, q: str, **extra) -> str:
+    response = client.get("/tickets/", query_string={"q": q, **extra})
+    assert response.status_code == 200
+    return response.data.decode("utf-8")
+
+
+def test_search_matches_partial_phone_and_cyrillic_name_case_insensitive(client):
+    _login(client, "operator", "operator")
+    _create_ticket(client, customer="Петров Петр", phone="+7 (916) 555-12-34")
+    _create_ticket(client, customer="Сидорова Анна", phone="+7 (903) 777-98-76")
+
+    html = _search(client, "555-12")
+    assert "Петров Петр" in html
+    assert "Сидорова Анна" not in html
+
+    html = _search(client, "сидоров")
+    assert "Сидорова Анна" in html
+    assert "Петров Петр" not in html
+
+
+def test_search_combines_tokens_across_columns_and_short_tokens(client):
+    _login(client, "operator", "operator")
+    _create_ticket(client, customer="Петров Петр", phone="+7 (916) 555-12-34", model="Daikin FTXB")
+    _create_ticket(client, customer="Петров Иван", phone="+7 (916) 555-00-00", model="LG S12EQ")
+
+    html = _search(client, "Петров Daikin")
+    assert "Петров Петр" in html
+    assert "Петров Иван" not in html
+
+    html = _search(client, "LG Петров")
+    assert "Петров Иван" in html
+    assert "Петров Петр" not in html
+
+
+def test_search_index_follows_updates_and_deletes(client, app):
+    _login(client, "operator", "operator")
+    _create_ticket(client, customer="Козлов Олег", phone="+7 (925) 100-20-30")
+
+    with app.app_context():
+        db = get_db()
+        db.execute("UPDATE tickets SET customer_full_name = 'Морозов Олег'")
+        db.commit()
+
+    assert "Морозов Олег" in _search(client, "Морозов")
+    assert "Козлов Олег" not in _search(client, "Козлов")
+
+    with app.app_context():
+        db = get_db()
+        db.execute("DELETE FROM tickets")
+        db.commit()
+        assert db.execute("SELECT COUNT(*) FROM tickets_fts WHERE tickets_fts MATCH '\"Морозов\"'").fetchone()[0] == 0
+
+
+def test_search_falls_back_to_like_when_fts_disabled(client, app):
+    app.config["TICKET_SEARCH_FTS"] = False
+    _login(client, "operator", "operator")
+    _create_ticket(client, customer="Новиков Павел", phone="+7 (929) 111-22-33")
+
+    assert "Новиков Павел" in _search(client, "111-22")
+
+
+def test_search_relevance_ordering(client):
+    _login(client, "operator", "operator")
+    _create_ticket(client, customer="Лебедев Кондиционер", phone="+7 (926) 222-33-44")
+    _create_ticket(client, customer="Соколов Андрей", phone="+7 (926) 333-44-55")
+
+    html = _search(client, "Кондиционер", sort="relevance")
+    assert html.index("Лебедев Кондиционер") < html.index("Соколов Андрей")
+
+
+def test_build_search_filter_quotes_fts_tokens():
+    search = build_search_filter(['ab"c', "ив"], use_fts=True)
+    assert search.match == '"ab""c"'
+    assert len(search.clauses) == 1
+    assert search.params == ["%ив%"] * 5
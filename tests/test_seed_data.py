@@ -0,0 +1,141 @@
+import multiprocessing
+from datetime import datetime
+
+import pytest
+
+from app import create_app
+from app.db import ensure_initial_users
+from app.db import get_db
+from app.db import init_db
+from app.seed_data import seed_app_db
+from app.seed_data import seed_app_db_bulk
+from app.services.dashboard import reconcile_dashboard
+
+NOW = datetime(2025, 6, 1, 12, 0, 0)
+OPTIONS = dict(seed=11, tickets_count=120, operators_count=2, specialists_count=4, days_back=20, comments_max=3, parts_max=2)
+TABLES = (
+    "tickets",
+    "status_history",
+    "ticket_due_history",
+    "ticket_specialists",
+    "ticket_comments",
+    "ticket_parts",
+    "ticket_help_requests",
+    "ticket_reviews",
+    "request_number_sequences",
+)
+
+
+def _snapshot(app) -> dict[str, list[tuple]]:
+    with app.app_context():
+        db = get_db()
+        return {table: [tuple(row) for row in db.execute(f"SELECT * FROM {table} ORDER BY 1").fetchall()] for table in TABLES}
+
+
+@pytest.fixture()
+def make_app(tmp_path):
+    def factory(name: str):
+        app = create_app({"TESTING": True, "DATABASE": str(tmp_path / name), "BOOTSTRAP_ON_STARTUP": False})
+        with app.app_context():
+            init_db()
+            ensure_initial_users()
+        return app
+
+    return factory
+
+
+def test_bulk_seed_matches_row_by_row_seed(make_app):
+    regular = make_app("regular.sqlite3")
+    with regular.app_context():
+        db = get_db()
+        expected = seed_app_db(db, now=NOW, **OPTIONS)
+        db.commit()
+
+    bulk = make_app("bulk.sqlite3")
+    progress: list[tuple[int, int]] = []
+    with bulk.app_context():
+        result = seed_app_db_bulk(get_db(), now=NOW, batch_size=50, report=lambda *args: progress.append(args), **OPTIONS)
+
+    assert result == expected
+    assert progress == [(50, 120), (100, 120), (120, 120)]
+    assert _snapshot(bulk) == _snapshot(regular)
+
+
+def test_bulk_seed_restores_triggers_and_derived_data(make_app):
+    app = make_app("bulk.sqlite3")
+    with app.app_context():
+        db = get_db()
+        objects_before = db.execute("SELECT type, name FROM sqlite_master ORDER BY type, name").fetchall()
+        seed_app_db_bulk(db, now=NOW, batch_size=40, **OPTIONS)
+
+        assert db.execute("SELECT type, name FROM sqlite_master ORDER BY type, name").fetchall() == objects_before
+        assert sum(reconcile_dashboard(db).values()) == 0
+        number = db.execute("SELECT request_number FROM tickets ORDER BY id DESC LIMIT 1").fetchone()[0]
+        matches = db.execute("SELECT COUNT(*) FROM tickets_fts WHERE tickets_fts MATCH ?", (f'"{number}"',)).fetchone()[0]
+        assert matches == 1
+
+
+def test_seed_db_command_bulk_reports_rate(app):
+    runner = app.test_cli_runner()
+    with app.app_context():
+        result = runner.invoke(args=["seed-db", "--tickets", "30", "--bulk", "--batch-size", "10"])
+    assert result.exit_code == 0, result.output
+    assert "заявки: 30/30" in result.output
+    assert "заявок в секунду" in result.output
+
+
+def test_sharded_bulk_seed_is_deterministic_per_worker_count(make_app):
+    snapshots = []
+    for name in ("first.sqlite3", "second.sqlite3"):
+        app = make_app(name)
+        with app.app_context():
+            result = seed_app_db_bulk(get_db(), now=NOW, batch_size=25, workers=2, **OPTIONS)
+        assert result.tickets_created == OPTIONS["tickets_count"]
+        snapshots.append(_snapshot(app))
+    assert snapshots[0] == snapshots[1]
+
+    tickets = snapshots[0]["tickets"]
+    assert len({row[1] for row in tickets}) == len(tickets)
+    # Each worker owns whole days: the day ranges of the two id blocks do not overlap.
+    days = [row[2][:10] for row in tickets]
+    assert any(max(days[:split]) < min(days[split:]) for split in range(1, len(days)))
+
+
+def test_bulk_seed_fails_instead_of_hanging_when_a_worker_dies(make_app):
+    app = make_app("killed.sqlite3")
+    options = dict(OPTIONS, tickets_count=20000)
+
+    def kill_workers(done, total):
+        for process in multiprocessing.active_children():
+            process.kill()
+
+    with app.app_context():
+        db = get_db()
+        with pytest.raises(RuntimeError, match="exited with code"):
+            seed_app_db_bulk(db, now=NOW, batch_size=50, workers=2, report=kill_workers, **options)
+        triggers = db.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'tickets'").fetchone()[0]
+
+    assert triggers > 0
+
+
+def test_parallel_bulk_seed_handles_zero_day_window(make_app):
+    app = make_app("zero_days.sqlite3")
+    with app.app_context():
+        result = seed_app_db_bulk(get_db(), now=NOW, batch_size=50, workers=2, **dict(OPTIONS, days_back=0))
+        created = {row[0] for row in get_db().execute("SELECT created_at FROM tickets")}
+
+    assert result.tickets_created == OPTIONS["tickets_count"]
+    assert created == {"2025-06-01 12:00:00"}
+
+
+def test_bulk_seed_does_not_reuse_ids_of_deleted_tickets(make_app):
+    app = make_app("deleted.sqlite3")
+    with app.app_context():
+        db = get_db()
+        seed_app_db_bulk(db, now=NOW, batch_size=50, **dict(OPTIONS, tickets_count=10))
+        db.execute("DELETE FROM tickets WHERE id = 10")
+        db.commit()
+        seed_app_db_bulk(db, now=NOW, batch_size=50, **dict(OPTIONS, seed=12, tickets_count=5))
+        ids = [row[0] for row in db.execute("SELECT id FROM tickets ORDER BY id")]
+
+    assert ids == list(range(1, 10)) + list(range(11, 16))
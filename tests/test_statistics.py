@@ -1,4 +1,12 @@
+import pytest
+
+from app.db import get_db
+from app.seed_data import seed_app_db
+from app.services.statistics import StatisticsResult
 from app.services.statistics import calculate_statistics
+from app.services.statistics import calculate_statistics_sql
+from app.services.statistics import categorize_fault_type
+from app.services.statistics import categorize_many
 
 
 def test_calculate_statistics_counts_average_and_fault_types():
@@ -27,3 +35,161 @@ def test_calculate_statistics_counts_average_and_fault_types():
     assert result.fault_type_counts["Не включается"] == 1
     assert result.fault_type_counts["Шум/вибрация"] == 1
 
+
+def test_fault_type_priority_follows_keyword_table_order():
+    assert categorize_fault_type("Течет вода и НЕ ВКЛЮЧАЕТСЯ") == "Не включается"
+    assert categorize_fault_type("Код ошибки E5, сильный шум") == "Шум/вибрация"
+    assert categorize_fault_type("Запах, капает конденсат") == "Протечка"
+    assert categorize_fault_type("") == "Другое"
+    assert categorize_fault_type(None) == "Другое"  # type: ignore[arg-type]
+
+
+def test_categorize_many_matches_single_calls():
+    descriptions = ["Плохо греет", "Стук", "Плохо греет", "", "Error 42", "Что-то странное"]
+    assert categorize_many(descriptions) == [categorize_fault_type(text) for text in descriptions]
+    assert categorize_many(iter(())) == []
+
+
+def _completed_rows(db, date_from: str, date_to: str) -> list[dict]:
+    rows = db.execute(
+        """
+        SELECT created_at, completed_at, problem_description
+        FROM tickets
+        WHERE status = 'completed'
+          AND completed_at IS NOT NULL
+          AND completed_at BETWEEN ? AND ?
+        """,
+        (date_from, date_to),
+    ).fetchall()
+    return [dict(row) for row in rows]
+
+
+def test_sql_statistics_match_python_implementation(app):
+    with app.app_context():
+        db = get_db()
+        seed_app_db(
+            db,
+            seed=7,
+            tickets_count=300,
+            operators_count=1,
+            specialists_count=3,
+            days_back=60,
+            comments_max=0,
+            parts_max=0,
+        )
+        db.execute(
+            """
+            INSERT INTO tickets (
+              request_number, created_at, equipment_type, device_model, problem_description,
+              customer_full_name, customer_phone, status, completed_at, updated_at
+            )
+            VALUES
+              ('R-EDGE-0001', '2025-12-10 12:00:00', 'Кондиционер', 'LG', 'Течет вода', 'А', '+7000', 'completed', '2025-12-10 11:00:00', '2025-12-10 12:00:00'),
+              ('R-EDGE-0002', 'not a date', 'Кондиционер', 'LG', 'Запах гари', 'Б', '+7000', 'completed', '2025-12-10 11:00:00', '2025-12-10 12:00:00')
+            """
+        )
+        db.commit()
+
+        date_from, date_to = "1900-01-01 00:00:00", "2999-12-31 23:59:59"
+        expected = calculate_statistics(_completed_rows(db, date_from, date_to))
+        actual = calculate_statistics_sql(db, date_from, date_to)
+
+    assert expected.completed_count > 0
+    assert actual.completed_count == expected.completed_count
+    assert actual.average_seconds == pytest.approx(expected.average_seconds)
+    assert actual.fault_type_counts == expected.fault_type_counts
+
+
+def test_sql_statistics_empty_period(app):
+    with app.app_context():
+        result = calculate_statistics_sql(get_db(), "2000-01-01 00:00:00", "2000-01-31 23:59:59")
+    assert result == StatisticsResult(completed_count=0, average_seconds=0.0, fault_type_counts={})
+
+
+def test_stats_view_renders_sql_result(client, app):
+    with app.app_context():
+        db = get_db()
+        db.execute(
+            """
+            INSERT INTO tickets (
+              request_number, created_at, equipment_type, device_model, problem_description,
+              customer_full_name, customer_phone, status, completed_at, updated_at
+            )
+            VALUES ('R-STAT-0001', '2025-12-10 10:00:00', 'Кондиционер', 'LG', 'Сильный шум', 'А', '+7000',
+                    'completed', '2025-12-10 12:00:00', '2025-12-10 12:00:00')
+            """
+        )
+        db.commit()
+
+    client.post("/login", data={"username": "manager", "password": "manager"})
+    response = client.get("/stats", query_string={"date_from": "2025-12-01", "date_to": "2025-12-31"})
+    html = response.data.decode("utf-8")
+    assert response.status_code == 200
+    assert "2 ч." in html
+    assert "Шум/вибрация" in html
+
+
+def _fault_category(app, request_number: str) -> str | None:
+    with app.app_context():
+        row = get_db().execute(
+            "SELECT fault_category FROM tickets WHERE request_number = ?", (request_number,)
+        ).fetchone()
+    return row["fault_category"]
+
+
+def test_fault_category_is_stored_on_create_and_edit(client, app):
+    client.post("/login", data={"username": "operator", "password": "operator"})
+    response = client.post(
+        "/tickets/new",
+        data={
+            "equipment_type": "Кондиционер",
+            "device_model": "LG S12EQ",
+            "problem_description": "Течет вода из блока",
+            "customer_full_name": "Иванов Иван",
+            "customer_phone": "+7 (999) 123-45-67",
+        },
+    )
+    assert response.status_code == 302
+    ticket_url = response.headers["Location"]
+    with app.app_context():
+        row = get_db().execute("SELECT request_number FROM tickets").fetchone()
+    request_number = row["request_number"]
+    assert _fault_category(app, request_number) == "Протечка"
+
+    response = client.post(
+        ticket_url + "/edit",
+        data={"status": "open", "problem_description": "Запах гари"},
+    )
+    assert response.status_code == 302
+    assert _fault_category(app, request_number) == "Запах"
+
+
+def test_backfill_command_fills_missing_categories(app):
+    with app.app_context():
+        db = get_db()
+        db.execute(
+            """
+            INSERT INTO tickets (
+              request_number, created_at, equipment_type, device_model, problem_description,
+              customer_full_name, customer_phone, status, updated_at
+            )
+            VALUES
+              ('R-FILL-0001', '2025-12-10 10:00:00', 'Кондиционер', 'LG', 'Сильный шум', 'А', '+7000', 'open', '2025-12-10 10:00:00'),
+              ('R-FILL-0002', '2025-12-10 10:00:00', 'Кондиционер', 'LG', 'Плохо греет', 'Б', '+7000', 'open', '2025-12-10 10:00:00'),
+              ('R-FILL-0003', '2025-12-10 10:00:00', 'Кондиционер', 'LG', 'Что-то странное', 'В', '+7000', 'open', '2025-12-10 10:00:00')
+            """
+        )
+        db.commit()
+
+    runner = app.test_cli_runner()
+    with app.app_context():
+        result = runner.invoke(args=["backfill-fault-categories", "--batch-size", "2"])
+    assert result.exit_code == 0
+    assert "3" in result.output
+    assert _fault_category(app, "R-FILL-0001") == "Шум/вибрация"
+    assert _fault_category(app, "R-FILL-0002") == "Не греет"
+    assert _fault_category(app, "R-FILL-0003") == "Другое"
+
+    with app.app_context():
+        result = runner.invoke(args=["backfill-fault-categories"])
+    assert "обновлены: 0" in result.output
@@ -0,0 +1,295 @@
+import csv
+import shutil
+import sqlite3
+
+import pytest
+
+from tools import task2_manage
+
+
+TICKET_HEADER = [
+    "request_number",
+    "created_at",
+    "customer_full_name",
+    "customer_phone",
+    "equipment_type_name",
+    "equipment_model_name",
+    "problem_description",
+    "fault_type_name",
+    "status_code",
+    "opened_by_username",
+    "assigned_specialist_username",
+    "completed_at",
+]
+
+
+def _write_csv(path, header, rows):
+    with path.open("w", encoding="utf-8", newline="") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def _import_dir(tmp_path):
+    import_dir = tmp_path / "import"
+    import_dir.mkdir()
+    _write_csv(import_dir / "roles.csv", ["code", "name"], [["operator", "Оператор"], ["", "Без кода"]])
+    _write_csv(
+        import_dir / "users.csv",
+        ["username", "password", "full_name", "role_code", "is_active"],
+        [["op", "op", "Оператор", "operator", "1"], ["ghost", "x", "Призрак", "nobody", "1"]],
+    )
+    _write_csv(
+        import_dir / "ticket_statuses.csv",
+        ["code", "name", "is_final"],
+        [["open", "Открыта", "0"], ["completed", "Завершена", "1"]],
+    )
+    _write_csv(
+        import_dir / "tickets.csv",
+        TICKET_HEADER,
+        [
+            ["R-1", "2025-01-01 10:00:00", "Иванов", "+7 1", "Кондиционер", "LG", "Шумит", "", "open", "op", "", ""],
+            ["R-2", "2025-01-02 10:00:00", "Иванов", "+7 1", "Кондиционер", "LG", "Течёт", "", "completed", "op", "", "2025-01-03 10:00:00"],
+            ["R-1", "2025-01-04 10:00:00", "Петров", "+7 2", "Кондиционер", "LG", "Дубль", "", "open", "op", "", ""],
+            ["R-3", "2025-01-05 10:00:00", "Петров", "+7 2", "Кондиционер", "LG", "", "", "open", "op", "", ""],
+            ["R-4", "2025-01-05 10:00:00", "Петров", "+7 2", "Кондиционер", "LG", "Пищит", "", "lost", "op", "", ""],
+        ],
+    )
+    _write_csv(
+        import_dir / "ticket_parts.csv",
+        ["request_number", "part_name", "quantity", "created_by_username", "created_at"],
+        [
+            ["R-1", "Фильтр", "2", "op", "2025-01-01 11:00:00"],
+            ["R-1", "Фильтр", "1", "op", "2025-01-01 12:00:00"],
+            ["R-2", "Фильтр", "0", "op", "2025-01-02 11:00:00"],
+            ["R-9", "Фильтр", "1", "op", "2025-01-02 11:00:00"],
+        ],
+    )
+    return import_dir
+
+
+def test_import_streams_batches_and_reports_rejects(tmp_path):
+    db_path = tmp_path / "task2.sqlite3"
+    task2_manage.init_db(db_path)
+
+    results = task2_manage.import_data(db_path, _import_dir(tmp_path), batch_size=2)
+    stats = {item.name: item for item in results}
+
+    assert stats["roles.csv"].rejected == {"missing code or name": 1}
+    assert stats["users.csv"].rejected == {"unknown role_code": 1}
+    assert stats["tickets.csv"].loaded == 2
+    assert stats["tickets.csv"].rejected == {
+        "already exists": 1,
+        "missing problem_description": 1,
+        "unknown status_code": 1,
+    }
+    assert stats["ticket_parts.csv"].loaded == 1
+    assert stats["ticket_parts.csv"].rejected == {
+        "already exists": 1,
+        "invalid quantity": 1,
+        "unknown request_number": 1,
+    }
+    assert stats["customers.csv"].rows == 0
+
+    db = sqlite3.connect(db_path)
+    assert db.execute("SELECT COUNT(*) FROM customers").fetchone()[0] == 1
+    assert db.execute("SELECT COUNT(*) FROM equipment_models").fetchone()[0] == 1
+    history = db.execute(
+        """
+        SELECT t.request_number, h.comment
+        FROM ticket_status_history h
+        JOIN tickets t ON t.id = h.ticket_id
+        ORDER BY h.id
+        """
+    ).fetchall()
+    assert history == [
+        ("R-1", "Создание заявки"),
+        ("R-2", "Создание заявки"),
+        ("R-2", "Завершение заявки"),
+    ]
+
+
+def test_ticket_ids_continue_after_deleted_rows(tmp_path):
+    db_path = tmp_path / "task2.sqlite3"
+    task2_manage.init_db(db_path)
+    import_dir = _import_dir(tmp_path)
+    task2_manage.import_data(db_path, import_dir)
+
+    with sqlite3.connect(db_path) as db:
+        db.execute("DELETE FROM tickets WHERE request_number = 'R-2'")
+    _write_csv(
+        import_dir / "tickets.csv",
+        TICKET_HEADER,
+        [["R-5", "2025-02-01 10:00:00", "Иванов", "+7 1", "Кондиционер", "LG", "Шумит", "", "open", "op", "", ""]],
+    )
+    task2_manage.import_data(db_path, import_dir)
+
+    db = sqlite3.connect(db_path)
+    assert db.execute("SELECT id FROM tickets WHERE request_number = 'R-5'").fetchone()[0] == 3
+
+
+def _dump(db_path):
+    db = sqlite3.connect(db_path)
+    tables = ("customers", "equipment_models", "parts", "tickets", "ticket_status_history", "ticket_comments", "ticket_parts")
+    return {table: db.execute(f"SELECT * FROM {table} ORDER BY id").fetchall() for table in tables}
+
+
+def test_parallel_parsing_keeps_order_and_ids(tmp_path):
+    dumps = []
+    for workers in (1, 2):
+        db_path = tmp_path / f"task2_{workers}.sqlite3"
+        task2_manage.init_db(db_path)
+        results = task2_manage.import_data(db_path, task2_manage.IMPORT_DIR, batch_size=64, workers=workers)
+        assert sum(item.loaded for item in results if item.name in task2_manage.PARALLEL_FILES) > 0
+        dumps.append(_dump(db_path))
+
+    # customers.created_at defaults to the import time for rows from customers.csv.
+    for dump in dumps:
+        dump["customers"] = [row[:3] for row in dump["customers"]]
+    assert dumps[0] == dumps[1]
+
+
+def _count(db_path, table):
+    return sqlite3.connect(db_path).execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def test_import_resumes_after_failure_and_skips_unchanged_files(tmp_path, monkeypatch):
+    import_dir = tmp_path / "import"
+    shutil.copytree(task2_manage.IMPORT_DIR, import_dir)
+    db_path = tmp_path / "task2.sqlite3"
+    task2_manage.init_db(db_path)
+
+    batches = 0
+
+    def failing_write(dims, batch, stats):
+        nonlocal batches
+        batches += 1
+        if batches == 3:
+            raise RuntimeError("disk full")
+        task2_manage._write_ticket_comments(dims, batch, stats)
+
+    files = tuple(
+        (name, parse, failing_write if name == "ticket_comments.csv" else write)
+        for name, parse, write in task2_manage.IMPORT_FILES
+    )
+    monkeypatch.setattr(task2_manage, "IMPORT_FILES", files)
+    with pytest.raises(RuntimeError):
+        task2_manage.import_data(db_path, import_dir, batch_size=100)
+    monkeypatch.undo()
+    assert _count(db_path, "tickets") == 500
+    assert _count(db_path, "ticket_comments") == 200
+
+    stats = {item.name: item for item in task2_manage.import_data(db_path, import_dir, batch_size=100)}
+    assert stats["tickets.csv"].skipped
+    assert stats["ticket_comments.csv"].resumed_at == 200
+    assert stats["ticket_comments.csv"].loaded == 1278
+    assert _count(db_path, "ticket_comments") == 1478
+    assert _count(db_path, "ticket_status_history") == 633
+
+    stats = task2_manage.import_data(db_path, import_dir)
+    assert all(item.skipped for item in stats)
+    assert _count(db_path, "ticket_comments") == 1478
+
+
+def test_import_reads_only_appended_rows(tmp_path):
+    db_path = tmp_path / "task2.sqlite3"
+    task2_manage.init_db(db_path)
+    import_dir = _import_dir(tmp_path)
+    task2_manage.import_data(db_path, import_dir)
+    parts_csv = import_dir / "ticket_parts.csv"
+
+    with parts_csv.open("a", encoding="utf-8", newline="") as handle:
+        csv.writer(handle).writerow(["R-2", "Датчик", "1", "op", "2025-01-03 11:00:00"])
+    stats = {item.name: item for item in task2_manage.import_data(db_path, import_dir)}
+    assert stats["tickets.csv"].skipped
+    assert stats["ticket_parts.csv"].resumed_at == 4
+    assert (stats["ticket_parts.csv"].loaded, stats["ticket_parts.csv"].rows) == (1, 1)
+
+    # A rewritten file cannot be resumed and is read from the top.
+    _write_csv(
+        parts_csv,
+        ["request_number", "part_name", "quantity", "created_by_username", "created_at"],
+        [["R-2", "Датчик", "1", "op", "2025-01-03 11:00:00"], ["R-2", "Фильтр", "3", "op", "2025-01-03 12:00:00"]],
+    )
+    stats = {item.name: item for item in task2_manage.import_data(db_path, import_dir)}
+    assert stats["ticket_parts.csv"].resumed_at == 0
+    assert stats["ticket_parts.csv"].loaded == 1
+    assert stats["ticket_parts.csv"].rejected == {"already exists": 1}
+    assert _count(db_path, "ticket_parts") == 3
+
+
+def test_reimport_of_edited_comments_file_skips_existing_comments(tmp_path):
+    import_dir = tmp_path / "import"
+    shutil.copytree(task2_manage.IMPORT_DIR, import_dir)
+    db_path = tmp_path / "task2.sqlite3"
+    task2_manage.init_db(db_path)
+    task2_manage.import_data(db_path, import_dir)
+    comments_csv = import_dir / "ticket_comments.csv"
+
+    def edit_first_comment(change):
+        with comments_csv.open(encoding="utf-8", newline="") as handle:
+            rows = list(csv.reader(handle))
+        rows[1][3] = change(rows[1][3])
+        with comments_csv.open("w", encoding="utf-8", newline="") as handle:
+            csv.writer(handle).writerows(rows)
+
+    # Re-exported with different whitespace: the file changed, the comments did not.
+    edit_first_comment(lambda body: f"  {body} ")
+    stats = {item.name: item for item in task2_manage.import_data(db_path, import_dir)}
+    assert stats["ticket_comments.csv"].resumed_at == 0
+    assert stats["ticket_comments.csv"].rejected == {"already exists": 1478}
+    assert _count(db_path, "ticket_comments") == 1478
+
+    edit_first_comment(lambda body: body + " (уточнено)")
+    stats = {item.name: item for item in task2_manage.import_data(db_path, import_dir)}
+    assert stats["ticket_comments.csv"].loaded == 1
+    assert _count(db_path, "ticket_comments") == 1479
+
+
+def test_csv_ranges_split_only_between_records(tmp_path):
+    path = tmp_path / "ticket_comments.csv"
+    _write_csv(
+        path,
+        ["request_number", "username", "created_at", "body"],
+        [
+            [f"R-{index}", "op", "2025-01-01 10:00:00", f'строка {index}\n"в кавычках"\n' * (index % 3)]
+            for index in range(200)
+        ],
+    )
+
+    expected = list(task2_manage.CsvStream(path))
+    stream = task2_manage.CsvStream(path)
+    ranges = list(stream.ranges(64))
+    assert len(ranges) > 10
+    assert [row for csv_range in ranges for row in csv_range.rows()] == expected
+    assert ranges[-1].end == path.stat().st_size
+    assert stream.checkpoint() == task2_manage.CsvStream(path, stream.checkpoint()).start
+
+
+def test_import_adds_comment_key_to_older_databases(tmp_path):
+    import_dir = tmp_path / "import"
+    shutil.copytree(task2_manage.IMPORT_DIR, import_dir)
+    db_path = tmp_path / "task2.sqlite3"
+    task2_manage.init_db(db_path)
+    with sqlite3.connect(db_path) as db:
+        db.execute("DROP INDEX idx_ticket_comments_unique")
+    task2_manage.import_data(db_path, import_dir)
+
+    with sqlite3.connect(db_path) as db:
+        db.execute("DELETE FROM import_checkpoints WHERE file_name = 'ticket_comments.csv'")
+    stats = {item.name: item for item in task2_manage.import_data(db_path, import_dir)}
+    assert stats["ticket_comments.csv"].rejected == {"already exists": 1478}
+    assert _count(db_path, "ticket_comments") == 1478
+
+
+def test_import_refuses_databases_with_duplicate_comments(tmp_path):
+    db_path = tmp_path / "task2.sqlite3"
+    task2_manage.init_db(db_path)
+    task2_manage.import_data(db_path, _import_dir(tmp_path))
+    with sqlite3.connect(db_path) as db:
+        db.execute("DROP INDEX idx_ticket_comments_unique")
+        for _ in range(2):
+            db.execute("INSERT INTO ticket_comments (ticket_id, user_id, body, created_at) VALUES (1, 1, 'Дубль', '2025-01-01')")
+
+    with pytest.raises(RuntimeError, match="recreate"):
+        task2_manage.import_data(db_path, tmp_path / "import")
@@ -78,3 +78,33 @@ def test_qr_endpoint_returns_svg(client, app):
     assert response.mimetype == "image/svg+xml"
     assert response.data.lstrip().startswith(b"<svg")
 
+
+
+def test_qr_endpoint_is_cacheable_and_has_png_variant(client, app, tmp_path):
+    app.config["QR_CACHE_DIR"] = str(tmp_path / "qr")
+    ticket_url = _create_ticket_as_operator(client)
+    ticket_id = int(ticket_url.rsplit("/", 1)[-1])
+
+    operator_client = app.test_client()
+    _login(operator_client, "operator", "operator")
+
+    html = operator_client.get(ticket_url).data.decode("utf-8")
+    assert f'src="/tickets/{ticket_id}/qr?v=' in html
+
+    first = operator_client.get(f"/tickets/{ticket_id}/qr")
+    etag = first.headers["ETag"]
+    assert "immutable" in first.headers["Cache-Control"]
+    assert not etag.startswith("W/")
+
+    cached = operator_client.get(f"/tickets/{ticket_id}/qr", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.data == b""
+
+    png = operator_client.get(f"/tickets/{ticket_id}/qr", query_string={"format": "png"})
+    assert png.status_code == 200
+    assert png.mimetype == "image/png"
+    assert png.data.startswith(b"\x89PNG")
+    assert png.headers["ETag"] != etag
+    assert sorted(path.suffix for path in (tmp_path / "qr").iterdir()) == [".png", ".svg"]
+
+    assert operator_client.get(f"/tickets/{ticket_id}/qr", query_string={"format": "gif"}).status_code == 404
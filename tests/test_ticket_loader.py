@@ -0,0 +1,76 @@
+import pytest
+
+from app.db import get_db
+from app.services.tickets import load_ticket_aggregate
+
+
+def _login(client, username: str, password: str) -> None:
+    response = client.post("/login", data={"username": username, "password": password})
+    assert response.status_code == 302
+
+
+def _create_ticket(client) -> str:
+    response = client.post(
+        "/tickets/new",
+        data={
+            "equipment_type": "Кондиционер",
+            "device_model": "LG S12EQ",
+            "problem_description": "Не включается",
+            "customer_full_name": "Иванов Иван",
+            "customer_phone": "+7 (999) 123-45-67",
+            "assigned_specialist_id": "3",
+            "due_date": "2025-12-20",
+        },
+    )
+    assert response.status_code == 302
+    return response.headers["Location"]
+
+
+def test_aggregate_collects_all_child_collections(client, app):
+    _login(client, "operator", "operator")
+    ticket_url = _create_ticket(client)
+    ticket_id = int(ticket_url.rsplit("/", 1)[-1])
+    client.post(ticket_url + "/comment", data={"body": "Первый комментарий"})
+    client.post(ticket_url + "/part", data={"part_name": "Фильтр", "quantity": "2"})
+
+    with app.app_context():
+        aggregate = load_ticket_aggregate(get_db(), ticket_id)
+
+    assert aggregate is not None
+    assert aggregate.ticket["id"] == ticket_id
+    assert aggregate.ticket["specialist_name"] == "Специалист"
+    assert [c["body"] for c in aggregate.comments] == ["Первый комментарий"]
+    assert aggregate.comments[0]["full_name"] == "Оператор"
+    assert [(p["part_name"], p["quantity"]) for p in aggregate.parts] == [("Фильтр", 2)]
+    assert [h["new_status"] for h in aggregate.history] == ["open"]
+    assert [h["new_due_at"] for h in aggregate.due_history] == ["2025-12-20 23:59:59"]
+    assert aggregate.assistants == ()
+    assert aggregate.help_requests == ()
+    assert aggregate.review is None
+    assert aggregate.is_worker(3)
+
+    with pytest.raises(TypeError):
+        aggregate.ticket["status"] = "completed"  # type: ignore[index]
+
+
+def test_aggregate_for_missing_ticket_is_none(app):
+    with app.app_context():
+        assert load_ticket_aggregate(get_db(), 999) is None
+
+
+def test_cached_detail_page_is_invalidated_by_mutations(client, app):
+    _login(client, "operator", "operator")
+    ticket_url = _create_ticket(client)
+
+    assert client.get(ticket_url).status_code == 200
+
+    response = client.post(ticket_url + "/comment", data={"body": "Новый комментарий после кэша"})
+    assert response.status_code == 302
+
+    html = client.get(ticket_url).data.decode("utf-8")
+    assert "Новый комментарий после кэша" in html
+
+    response = client.post(ticket_url + "/status", data={"status": "in_repair"})
+    assert response.status_code == 302
+    html = client.get(ticket_url).data.decode("utf-8")
+    assert "В процессе ремонта" in html
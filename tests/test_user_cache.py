@@ -0,0 +1,85 @@
+from app.db import get_db
+from app.db import get_pool_stats
+
+
+def _login(client, username: str, password: str) -> None:
+    response = client.post("/login", data={"username": username, "password": password})
+    assert response.status_code == 302
+
+
+def _checkouts(app) -> int:
+    with app.app_context():
+        stats = get_pool_stats()
+    return stats.hits + stats.misses
+
+
+def _unread_counter(app, username: str) -> int:
+    with app.app_context():
+        row = get_db().execute("SELECT unread_notifications FROM users WHERE username = ?", (username,)).fetchone()
+    return int(row["unread_notifications"])
+
+
+def test_cached_session_user_needs_no_database(client, app):
+    _login(client, "operator", "operator")
+    client.get("/login")
+
+    before = _checkouts(app)
+    response = client.get("/login")
+    assert response.status_code == 200
+    assert _checkouts(app) == before
+
+
+def test_cache_can_be_disabled(client, app):
+    app.config["USER_CACHE_ENABLED"] = False
+    _login(client, "operator", "operator")
+    client.get("/login")
+
+    before = _checkouts(app)
+    client.get("/login")
+    assert _checkouts(app) == before + 1
+
+
+def test_unread_counter_follows_create_and_mark_all_read(client, app):
+    specialist_client = app.test_client()
+    _login(specialist_client, "specialist", "specialist")
+    specialist_client.get("/notifications")
+
+    _login(client, "operator", "operator")
+    response = client.post(
+        "/tickets/new",
+        data={
+            "equipment_type": "Кондиционер",
+            "device_model": "LG S12EQ",
+            "problem_description": "Не включается",
+            "customer_full_name": "Иванов Иван",
+            "customer_phone": "+7 (999) 123-45-67",
+            "assigned_specialist_id": "3",
+        },
+    )
+    assert response.status_code == 302
+    assert _unread_counter(app, "specialist") == 1
+
+    html = specialist_client.get("/notifications").data.decode("utf-8")
+    assert '<span class="badge" title="Непрочитанные">1</span>' in html
+
+    specialist_client.post("/notifications/mark-all-read")
+    assert _unread_counter(app, "specialist") == 0
+    html = specialist_client.get("/notifications").data.decode("utf-8")
+    assert 'title="Непрочитанные"' not in html
+
+
+def test_blocking_user_drops_cached_session(client, app):
+    specialist_client = app.test_client()
+    _login(specialist_client, "specialist", "specialist")
+    assert specialist_client.get("/tickets/").status_code == 200
+
+    _login(client, "admin", "admin")
+    response = client.post(
+        "/admin/users/3/edit",
+        data={"full_name": "Специалист", "role": "specialist", "password": ""},
+    )
+    assert response.status_code == 302
+
+    response = specialist_client.get("/tickets/")
+    assert response.status_code == 302
+    assert "/login" in response.headers["Location"]
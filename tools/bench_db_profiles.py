@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import argparse
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.db import DB_PROFILES  # noqa: E402
+from app.db import apply_pragmas  # noqa: E402
+from app.db import is_busy_error  # noqa: E402
+from app.db import resolve_pragmas  # noqa: E402
+
+SCHEMA_PATH = PROJECT_ROOT / "app" / "schema.sql"
+
+LIST_QUERY = """
+SELECT t.*, u.full_name AS specialist_name
+FROM tickets t
+LEFT JOIN users u ON u.id = t.assigned_specialist_id
+ORDER BY t.created_at DESC
+LIMIT 50
+"""
+
+
+def _connect(db_path: Path, profile: str) -> sqlite3.Connection:
+    connection = sqlite3.connect(db_path, check_same_thread=False)
+    connection.execute("PRAGMA foreign_keys = ON")
+    apply_pragmas(connection, resolve_pragmas(profile))
+    return connection
+
+
+def _prepare(db_path: Path, profile: str, tickets: int) -> None:
+    connection = _connect(db_path, profile)
+    connection.executescript(SCHEMA_PATH.read_text(encoding="utf-8"))
+    connection.execute(
+        "INSERT INTO users (username, password_hash, full_name, role) VALUES ('bench', '-', 'Bench', 'operator')"
+    )
+    connection.executemany(
+        """
+        INSERT INTO tickets (
+          request_number, created_at, equipment_type, device_model, problem_description,
+          customer_full_name, customer_phone, status, updated_at
+        )
+        VALUES (?, datetime('now', ?), 'Кондиционер', 'LG S12EQ', 'Не включается', 'Иванов Иван', '+79991234567', 'open', datetime('now'))
+        """,
+        ((f"B-{idx:08d}", f"-{idx} minutes") for idx in range(tickets)),
+    )
+    connection.commit()
+    connection.close()
+
+
+def run_profile(profile: str, *, tickets: int, readers: int, seconds: float) -> dict[str, float]:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench.sqlite3"
+        _prepare(db_path, profile, tickets)
+
+        stop = threading.Event()
+        counters = {"reads": 0, "writes": 0, "busy": 0}
+        lock = threading.Lock()
+
+        def reader() -> None:
+            connection = _connect(db_path, profile)
+            done = 0
+            busy = 0
+            while not stop.is_set():
+                try:
+                    connection.execute(LIST_QUERY).fetchall()
+                    done += 1
+                except sqlite3.OperationalError as exc:
+                    if not is_busy_error(exc):
+                        raise
+                    busy += 1
+            connection.close()
+            with lock:
+                counters["reads"] += done
+                counters["busy"] += busy
+
+        def writer() -> None:
+            connection = _connect(db_path, profile)
+            seq = 0
+            busy = 0
+            while not stop.is_set():
+                seq += 1
+                try:
+                    connection.execute(
+                        "UPDATE tickets SET status = ?, updated_at = datetime('now') WHERE id = ?",
+                        ("in_repair" if seq % 2 else "open", seq % tickets + 1),
+                    )
+                    connection.execute(
+                        """
+                        INSERT INTO status_history (ticket_id, old_status, new_status, changed_by_user_id, changed_at)
+                        VALUES (?, 'open', 'in_repair', 1, datetime('now'))
+                        """,
+                        (seq % tickets + 1,),
+                    )
+                    connection.commit()
+                except sqlite3.OperationalError as exc:
+                    connection.rollback()
+                    if not is_busy_error(exc):
+                        raise
+                    busy += 1
+            connection.close()
+            with lock:
+                counters["writes"] += seq - busy
+                counters["busy"] += busy
+
+        threads = [threading.Thread(target=reader) for _ in range(readers)]
+        threads.append(threading.Thread(target=writer))
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+    return {
+        "reads_per_sec": counters["reads"] / seconds,
+        "writes_per_sec": counters["writes"] / seconds,
+        "busy_errors": counters["busy"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Read throughput of the list query while a writer commits")
+    parser.add_argument("--profiles", nargs="+", default=list(DB_PROFILES), choices=list(DB_PROFILES))
+    parser.add_argument("--tickets", type=int, default=5000)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    args = parser.parse_args()
+
+    print(f"{'profile':<10} {'reads/s':>10} {'writes/s':>10} {'busy':>6}")
+    for profile in args.profiles:
+        result = run_profile(profile, tickets=args.tickets, readers=args.readers, seconds=args.seconds)
+        print(
+            f"{profile:<10} {result['reads_per_sec']:>10.1f} {result['writes_per_sec']:>10.1f} "
+            f"{int(result['busy_errors']):>6}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.seed_data import PROBLEM_DESCRIPTIONS  # noqa: E402
+from app.services.statistics import DEFAULT_FAULT_TYPE  # noqa: E402
+from app.services.statistics import FAULT_TYPE_KEYWORDS  # noqa: E402
+from app.services.statistics import categorize_fault_type  # noqa: E402
+from app.services.statistics import categorize_many  # noqa: E402
+
+
+def legacy_categorize_fault_type(problem_description: str) -> str:
+    text = (problem_description or "").lower()
+
+    keywords: dict[str, tuple[str, ...]] = {
+        "Не включается": ("не включ", "не запуска", "нет питания", "не горит"),
+        "Шум/вибрация": ("шум", "гуд", "вибрац", "стук"),
+        "Не охлаждает": ("не охлажд", "плохо охлажд", "теплый воздух"),
+        "Не греет": ("не греет", "плохо греет"),
+        "Протечка": ("теч", "капает", "конденсат", "вода"),
+        "Запах": ("запах", "воняет"),
+        "Ошибка/код": ("ошибк", "код", "error", "err"),
+    }
+
+    for label, parts in keywords.items():
+        for part in parts:
+            if part in text:
+                return label
+
+    return "Другое"
+
+
+_LABELS = tuple(FAULT_TYPE_KEYWORDS)
+_GROUPED_PATTERN = re.compile(
+    "|".join(
+        f"(?P<g{index}>{'|'.join(re.escape(part) for part in parts)})"
+        for index, parts in enumerate(FAULT_TYPE_KEYWORDS.values())
+    )
+)
+
+
+def regex_categorize_fault_type(problem_description: str) -> str:
+    # One pass with a precompiled alternation; the lowest group index seen wins.
+    text = (problem_description or "").lower()
+    best: int | None = None
+    for match in _GROUPED_PATTERN.finditer(text):
+        index = match.lastindex - 1
+        if index == 0:
+            return _LABELS[0]
+        if best is None or index < best:
+            best = index
+    return DEFAULT_FAULT_TYPE if best is None else _LABELS[best]
+
+
+FILLER = [
+    "Клиент сообщает, что",
+    "после транспортировки",
+    "периодически",
+    "в режиме ожидания",
+    "на дисплее ничего нет",
+    "требуется выезд мастера",
+]
+
+
+def _descriptions(count: int, *, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    result = []
+    for _ in range(count):
+        parts = rng.sample(FILLER, k=rng.randint(0, 3)) + [rng.choice(PROBLEM_DESCRIPTIONS)]
+        rng.shuffle(parts)
+        result.append(" ".join(parts) + f" (#{rng.randint(1, 10**6)})")
+    return result
+
+
+def _measure(label: str, func, descriptions: list[str]) -> float:
+    started = time.perf_counter()
+    func(descriptions)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<28} {elapsed * 1000:9.1f} ms  {len(descriptions) / elapsed:12.0f} texts/s")
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare fault-type classifiers.")
+    parser.add_argument("--count", type=int, default=200_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    unique = _descriptions(args.count, seed=args.seed)
+    rng = random.Random(args.seed)
+    repeated = [rng.choice(PROBLEM_DESCRIPTIONS) for _ in range(args.count)]
+
+    legacy = [legacy_categorize_fault_type(text) for text in unique]
+    for candidate in (
+        [categorize_fault_type(text) for text in unique],
+        [regex_categorize_fault_type(text) for text in unique],
+        categorize_many(unique),
+    ):
+        if candidate != legacy:
+            raise SystemExit("Matcher results differ from the legacy implementation")
+
+    print(f"Описаний: {args.count}")
+    print("-- уникальные тексты --")
+    _measure("legacy nested loops", lambda items: [legacy_categorize_fault_type(t) for t in items], unique)
+    _measure("alternation regex", lambda items: [regex_categorize_fault_type(t) for t in items], unique)
+    _measure("flattened keyword table", lambda items: [categorize_fault_type(t) for t in items], unique)
+    _measure("categorize_many", categorize_many, unique)
+    print("-- повторяющиеся тексты --")
+    _measure("legacy nested loops", lambda items: [legacy_categorize_fault_type(t) for t in items], repeated)
+    _measure("alternation regex", lambda items: [regex_categorize_fault_type(t) for t in items], repeated)
+    _measure("flattened keyword table", lambda items: [categorize_fault_type(t) for t in items], repeated)
+    _measure("categorize_many", categorize_many, repeated)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+# Runs in a fresh interpreter each time, so module imports are really cold.
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+app = create_app({"DATABASE": sys.argv[1], "BOOTSTRAP_ON_STARTUP": sys.argv[2] == "1"})
+created = time.perf_counter()
+print(json.dumps({"import": imported - started, "factory": created - imported}))
+"""
+
+
+def _probe(database: Path, *, bootstrap: bool) -> dict[str, float]:
+    completed = subprocess.run(
+        [sys.executable, "-c", PROBE, str(database), "1" if bootstrap else "0"],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def _report(label: str, samples: list[dict[str, float]]) -> None:
+    for key in ("import", "factory"):
+        values = [sample[key] * 1000 for sample in samples]
+        print(f"{label:<22} {key:<8} median {statistics.median(values):8.1f} ms  min {min(values):8.1f} ms")
+    totals = [(sample["import"] + sample["factory"]) * 1000 for sample in samples]
+    print(f"{label:<22} {'total':<8} median {statistics.median(totals):8.1f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure cold import and app factory time.")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--database", type=Path, default=None, help="Existing DB to start against (default: a fresh temp DB)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = args.database or Path(tmp) / "bench.sqlite3"
+        # Prepare the schema and users once, as the deploy step would.
+        _probe(database, bootstrap=True)
+
+        print(f"Запусков: {args.runs}, БД: {database}")
+        _report("bootstrap on startup", [_probe(database, bootstrap=True) for _ in range(args.runs)])
+        _report("bootstrap via CLI", [_probe(database, bootstrap=False) for _ in range(args.runs)])
+
+
+if __name__ == "__main__":
+    main()
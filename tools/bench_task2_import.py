@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import argparse
+import csv
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from tools import task2_manage  # noqa: E402
+
+SCALED_FILES = ("tickets.csv", "ticket_comments.csv", "ticket_parts.csv")
+
+
+def _scale(source: Path, target: Path, copies: int) -> None:
+    # Reference files as they are; every ticket (with its comments and parts) repeated under new numbers.
+    shutil.copytree(source, target)
+    for name in SCALED_FILES:
+        with (source / name).open("r", encoding="utf-8", newline="") as handle:
+            reader = csv.reader(handle)
+            header = next(reader)
+            rows = list(reader)
+        number = header.index("request_number")
+        with (target / name).open("w", encoding="utf-8", newline="") as handle:
+            writer = csv.writer(handle)
+            writer.writerow(header)
+            for copy in range(copies):
+                for row in rows:
+                    row = list(row)
+                    row[number] = f"{row[number]}-{copy}"
+                    writer.writerow(row)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Time task2 CSV import with different worker counts.")
+    parser.add_argument("--copies", type=int, default=400, help="How many times to repeat the sample tickets")
+    parser.add_argument("--workers", type=int, nargs="+", default=None, help="Worker counts (default: 1, 2, ... CPUs)")
+    parser.add_argument("--batch-size", type=int, default=task2_manage.DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    cpus = os.cpu_count() or 1
+    workers = args.workers or sorted({1, *[n for n in (2, 4, 8) if n <= cpus], cpus})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        import_dir = Path(tmp) / "import"
+        _scale(task2_manage.IMPORT_DIR, import_dir, args.copies)
+        reference_dir = Path(tmp) / "reference"
+        shutil.copytree(import_dir, reference_dir, ignore=shutil.ignore_patterns(*SCALED_FILES))
+        sizes = {name: (import_dir / name).stat().st_size for name in SCALED_FILES}
+        print(f"CPU: {cpus}, файлы: " + ", ".join(f"{name} {size / 2**20:.1f} МБ" for name, size in sizes.items()))
+
+        baseline = None
+        for count in workers:
+            db_path = Path(tmp) / f"bench_{count}.sqlite3"
+            task2_manage.init_db(db_path)
+            # Reference files (users mean password hashing) are loaded up front; the timed run skips them
+            # as unchanged and reads only the scaled files.
+            task2_manage.import_data(db_path, reference_dir)
+            # CPU time of this process is what the single writer spends; with enough cores it bounds
+            # the wall time, so it shows the gain even where the box has fewer CPUs than workers.
+            cpu_started = time.process_time()
+            results = task2_manage.import_data(db_path, import_dir, batch_size=args.batch_size, workers=count)
+            writer_cpu = time.process_time() - cpu_started
+            timed = [stats for stats in results if stats.name in SCALED_FILES]
+            seconds = sum(stats.seconds for stats in timed)
+            rows = sum(stats.rows for stats in timed)
+            baseline = baseline or seconds
+            print(
+                f"workers {count:>2}: {seconds:7.2f} с  {rows / seconds:10.0f} строк/с  "
+                f"ускорение x{baseline / seconds:.2f}  CPU главного процесса {writer_cpu:7.2f} с"
+            )
+
+
+if __name__ == "__main__":
+    main()
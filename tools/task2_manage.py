@@ -2,10 +2,32 @@ from __future__ import annotations
 
 import argparse
 import csv
+import hashlib
+import io
+import multiprocessing
 import shutil
 import sqlite3
+import time
+from collections import Counter
+from collections import deque
+from concurrent.futures import Executor
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from contextlib import closing
+from dataclasses import dataclass
+from dataclasses import field
 from datetime import datetime
+from functools import cached_property
+from functools import partial
+from itertools import count
+from itertools import islice
 from pathlib import Path
+from typing import BinaryIO
+from typing import Callable
+from typing import Iterable
+from typing import Iterator
+from typing import TypeVar
 
 from werkzeug.security import generate_password_hash
 
@@ -17,6 +39,9 @@ QUERIES_DIR = PROJECT_ROOT / "task2" / "queries"
 REPORTS_DIR = PROJECT_ROOT / "task2" / "reports"
 BACKUPS_DIR = PROJECT_ROOT / "task2" / "backups"
 
+T = TypeVar("T")
+R = TypeVar("R")
+
 
 def connect(db_path: Path) -> sqlite3.Connection:
     db_path.parent.mkdir(parents=True, exist_ok=True)
@@ -32,353 +57,839 @@ def init_db(db_path: Path) -> None:
         db.executescript(schema_sql)
 
 
-def read_csv_rows(path: Path) -> list[dict[str, str]]:
-    if not path.exists():
-        return []
-    with path.open("r", encoding="utf-8", newline="") as handle:
-        reader = csv.DictReader(handle)
-        return [dict(row) for row in reader]
+DEFAULT_BATCH_SIZE = 500
+TRUE_VALUES = {"1", "true", "True", "yes", "Да"}
 
 
-def build_map(db: sqlite3.Connection, table: str, key_col: str, value_col: str = "id") -> dict[str, int]:
-    rows = db.execute(f"SELECT {value_col} AS id, {key_col} AS key FROM {table}").fetchall()
-    return {str(row["key"]): int(row["id"]) for row in rows}
+class RowRejected(ValueError):
+    """The row is skipped; the message is the reason counted in the import summary."""
 
 
-def import_data(db_path: Path, import_dir: Path) -> None:
-    with connect(db_path) as db:
-        try:
-            _import_roles(db, import_dir)
-            _import_users(db, import_dir)
-            _import_ticket_statuses(db, import_dir)
-            _import_equipment_types(db, import_dir)
-            _import_equipment_models(db, import_dir)
-            _import_fault_types(db, import_dir)
-            _import_customers(db, import_dir)
-            _import_parts(db, import_dir)
-            _import_tickets(db, import_dir)
-            _import_ticket_comments(db, import_dir)
-            _import_ticket_parts(db, import_dir)
-            db.commit()
-        except Exception:
-            db.rollback()
-            raise
+@dataclass
+class FileStats:
+    name: str
+    loaded: int = 0
+    rejected: Counter[str] = field(default_factory=Counter)
+    seconds: float = 0.0
+    resumed_at: int = 0
+    skipped: bool = False
 
+    @property
+    def rows(self) -> int:
+        return self.loaded + sum(self.rejected.values())
 
-def _import_roles(db: sqlite3.Connection, import_dir: Path) -> None:
-    for row in read_csv_rows(import_dir / "roles.csv"):
-        code = (row.get("code") or "").strip()
-        name = (row.get("name") or "").strip()
-        if not code or not name:
-            continue
-        db.execute("INSERT OR IGNORE INTO roles (code, name) VALUES (?, ?)", (code, name))
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
 
+    def reject(self, reason: str, count: int = 1) -> None:
+        self.rejected[reason] += count
 
-def _import_users(db: sqlite3.Connection, import_dir: Path) -> None:
-    roles = build_map(db, "roles", "code")
-    for row in read_csv_rows(import_dir / "users.csv"):
-        username = (row.get("username") or "").strip()
-        password = row.get("password") or ""
-        full_name = (row.get("full_name") or "").strip()
-        role_code = (row.get("role_code") or "").strip()
-        is_active = 1 if (row.get("is_active") or "1").strip() in {"1", "true", "True", "yes", "Да"} else 0
 
-        if not username or not password or not full_name or role_code not in roles:
-            continue
+# Import bookkeeping, kept out of schema.sql: that file is the 3NF model of the
+# assignment (it only drops this table so a fresh schema re-imports everything).
+CHECKPOINTS_SQL = """
+CREATE TABLE IF NOT EXISTS import_checkpoints (
+  file_name TEXT PRIMARY KEY,
+  byte_offset INTEGER NOT NULL,
+  row_offset INTEGER NOT NULL,
+  prefix_sha256 TEXT NOT NULL,
+  updated_at TEXT NOT NULL DEFAULT (datetime('now'))
+)
+"""
 
-        db.execute(
-            """
-            INSERT OR IGNORE INTO users (username, password_hash, full_name, role_id, is_active)
-            VALUES (?, ?, ?, ?, ?)
-            """,
-            (username, generate_password_hash(password), full_name, roles[role_code], is_active),
-        )
 
+# Comments have no natural key column; this index is what lets a re-read file skip them.
+# schema.sql creates it too, this covers databases initialized before it was added.
+COMMENT_KEY_SQL = """
+CREATE UNIQUE INDEX IF NOT EXISTS idx_ticket_comments_unique
+ON ticket_comments(ticket_id, user_id, created_at, body)
+"""
 
-def _import_ticket_statuses(db: sqlite3.Connection, import_dir: Path) -> None:
-    for row in read_csv_rows(import_dir / "ticket_statuses.csv"):
-        code = (row.get("code") or "").strip()
-        name = (row.get("name") or "").strip()
-        is_final = 1 if (row.get("is_final") or "0").strip() in {"1", "true", "True", "yes", "Да"} else 0
-        if not code or not name:
-            continue
-        db.execute(
-            "INSERT OR IGNORE INTO ticket_statuses (code, name, is_final) VALUES (?, ?, ?)",
-            (code, name, is_final),
-        )
 
+def _ensure_comment_key(db: sqlite3.Connection) -> None:
+    try:
+        db.execute(COMMENT_KEY_SQL)
+    except sqlite3.IntegrityError:
+        raise RuntimeError(
+            "ticket_comments already contains duplicate comments, so imports cannot skip them; "
+            "run 'recreate' to rebuild the DB"
+        ) from None
 
-def _import_equipment_types(db: sqlite3.Connection, import_dir: Path) -> None:
-    for row in read_csv_rows(import_dir / "equipment_types.csv"):
-        name = (row.get("name") or "").strip()
-        if not name:
-            continue
-        db.execute("INSERT OR IGNORE INTO equipment_types (name) VALUES (?)", (name,))
 
+@dataclass(frozen=True)
+class Checkpoint:
+    """Progress through one CSV: bytes and data rows already committed, and the hash of those bytes."""
 
-def _import_equipment_models(db: sqlite3.Connection, import_dir: Path) -> None:
-    type_map = build_map(db, "equipment_types", "name")
-    for row in read_csv_rows(import_dir / "equipment_models.csv"):
-        type_name = (row.get("equipment_type_name") or "").strip()
-        name = (row.get("name") or "").strip()
-        manufacturer = (row.get("manufacturer") or "").strip() or None
-        if not type_name or not name:
-            continue
-        if type_name not in type_map:
-            db.execute("INSERT INTO equipment_types (name) VALUES (?)", (type_name,))
-            type_map = build_map(db, "equipment_types", "name")
-        db.execute(
-            """
-            INSERT OR IGNORE INTO equipment_models (equipment_type_id, name, manufacturer)
-            VALUES (?, ?, ?)
-            """,
-            (type_map[type_name], name, manufacturer),
-        )
+    byte_offset: int = 0
+    row_offset: int = 0
+    prefix_sha256: str = hashlib.sha256().hexdigest()
 
 
-def _import_fault_types(db: sqlite3.Connection, import_dir: Path) -> None:
-    for row in read_csv_rows(import_dir / "fault_types.csv"):
-        name = (row.get("name") or "").strip()
-        if not name:
-            continue
-        db.execute("INSERT OR IGNORE INTO fault_types (name) VALUES (?)", (name,))
+def load_checkpoint(db: sqlite3.Connection, file_name: str) -> Checkpoint | None:
+    row = db.execute(
+        "SELECT byte_offset, row_offset, prefix_sha256 FROM import_checkpoints WHERE file_name = ?",
+        (file_name,),
+    ).fetchone()
+    if row is None:
+        return None
+    return Checkpoint(int(row["byte_offset"]), int(row["row_offset"]), row["prefix_sha256"])
 
 
-def _import_customers(db: sqlite3.Connection, import_dir: Path) -> None:
-    for row in read_csv_rows(import_dir / "customers.csv"):
-        full_name = (row.get("full_name") or "").strip()
-        phone = (row.get("phone") or "").strip()
-        if not full_name or not phone:
-            continue
-        db.execute(
-            "INSERT OR IGNORE INTO customers (full_name, phone) VALUES (?, ?)",
-            (full_name, phone),
-        )
+def _save_checkpoint(db: sqlite3.Connection, file_name: str, checkpoint: Checkpoint) -> None:
+    db.execute(
+        """
+        INSERT INTO import_checkpoints (file_name, byte_offset, row_offset, prefix_sha256, updated_at)
+        VALUES (?, ?, ?, ?, datetime('now'))
+        ON CONFLICT(file_name) DO UPDATE SET
+          byte_offset = excluded.byte_offset,
+          row_offset = excluded.row_offset,
+          prefix_sha256 = excluded.prefix_sha256,
+          updated_at = excluded.updated_at
+        """,
+        (file_name, checkpoint.byte_offset, checkpoint.row_offset, checkpoint.prefix_sha256),
+    )
+
+
+@dataclass(frozen=True)
+class CsvRange:
+    """Whole records ``[start, end)`` of a CSV file; ``prefix_sha256`` covers ``[0, end)``."""
+
+    path: Path
+    header: list[str]
+    start: int
+    end: int
+    prefix_sha256: str
+
+    def rows(self) -> Iterator[dict[str, str]]:
+        with self.path.open("rb") as handle:
+            handle.seek(self.start)
+            text = handle.read(self.end - self.start).decode("utf-8")
+        for values in csv.reader(io.StringIO(text, newline="")):
+            if values:
+                yield dict(zip(self.header, values))
+
+
+class CsvStream:
+    """Iterates CSV rows as dicts, tracking how far into the file it has read.
+
+    Given a checkpoint whose hash still matches the start of the file, reading
+    resumes right after it: the file was only appended to (or not changed at
+    all) since those rows were committed. Otherwise the file is read from the top.
+    """
+
+    def __init__(self, path: Path, checkpoint: Checkpoint | None = None) -> None:
+        self.path = path
+        self.size = path.stat().st_size if path.exists() else 0
+        self._digest = hashlib.sha256()
+        self.start = self._resume_point(checkpoint) if checkpoint else Checkpoint()
+        self.byte_offset = self.start.byte_offset
+        self.row_offset = self.start.row_offset
+
+    def _resume_point(self, checkpoint: Checkpoint) -> Checkpoint:
+        if checkpoint.byte_offset > self.size:
+            return Checkpoint()
+        digest = hashlib.sha256()
+        with self.path.open("rb") as handle:
+            remaining = checkpoint.byte_offset
+            while remaining:
+                chunk = handle.read(min(remaining, 1 << 20))
+                digest.update(chunk)
+                remaining -= len(chunk)
+        if digest.hexdigest() != checkpoint.prefix_sha256:
+            return Checkpoint()
+        self._digest = digest
+        return checkpoint
+
+    @property
+    def exhausted(self) -> bool:
+        return self.byte_offset >= self.size
+
+    def checkpoint(self) -> Checkpoint:
+        return Checkpoint(self.byte_offset, self.row_offset, self._digest.hexdigest())
+
+    def _lines(self, handle: BinaryIO) -> Iterator[str]:
+        for raw in handle:
+            self._digest.update(raw)
+            self.byte_offset += len(raw)
+            yield raw.decode("utf-8")
+
+    def _open_after_header(self, handle: BinaryIO) -> list[str]:
+        # Positions the handle at the first unread record and returns the column names.
+        line = handle.readline()
+        if self.start.byte_offset:
+            handle.seek(self.start.byte_offset)
+        else:
+            self._digest.update(line)
+            self.byte_offset = len(line)
+        return next(csv.reader([line.decode("utf-8")]), [])
+
+    def __iter__(self) -> Iterator[dict[str, str]]:
+        if self.exhausted:
+            return
+        # Reading bytes keeps the offset exact: a newline byte never occurs inside a
+        # multi-byte UTF-8 sequence, and csv joins quoted multi-line fields itself.
+        # csv.reader does not read ahead, so after each row the offset is right past it.
+        with self.path.open("rb") as handle:
+            header = self._open_after_header(handle)
+            if not header:
+                return
+            for values in csv.reader(self._lines(handle)):
+                if not values:
+                    continue
+                self.row_offset += 1
+                yield dict(zip(header, values))
+
+    def ranges(self, size: int) -> Iterator[CsvRange]:
+        """Cut the unread part of the file into record-aligned ranges of about ``size`` bytes.
+
+        Only bytes are handled here (hashing and counting quotes run in C); decoding
+        and csv parsing of each range are left to whoever reads it. A newline ends a
+        record only outside quotes, i.e. after an even number of quote characters,
+        which holds at every range start.
+        """
+        if self.exhausted:
+            return
+        with self.path.open("rb") as handle:
+            header = self._open_after_header(handle)
+            if not header:
+                return
+            while data := handle.read(size):
+                if not data.endswith(b"\n"):
+                    data += handle.readline()
+                quotes = data.count(b'"')
+                while quotes % 2 and (line := handle.readline()):
+                    data += line
+                    quotes += line.count(b'"')
+                start = self.byte_offset
+                self._digest.update(data)
+                self.byte_offset += len(data)
+                yield CsvRange(self.path, header, start, self.byte_offset, self._digest.hexdigest())
 
 
-def _import_parts(db: sqlite3.Connection, import_dir: Path) -> None:
-    for row in read_csv_rows(import_dir / "parts.csv"):
-        name = (row.get("name") or "").strip()
-        if not name:
-            continue
-        db.execute("INSERT OR IGNORE INTO parts (name) VALUES (?)", (name,))
+def build_map(db: sqlite3.Connection, table: str, key_col: str, value_col: str = "id") -> dict[str, int]:
+    rows = db.execute(f"SELECT {value_col} AS id, {key_col} AS key FROM {table}").fetchall()
+    return {str(row["key"]): int(row["id"]) for row in rows}
 
 
-def _import_tickets(db: sqlite3.Connection, import_dir: Path) -> None:
-    status_map = build_map(db, "ticket_statuses", "code")
-    user_map = build_map(db, "users", "username")
-    fault_map = build_map(db, "fault_types", "name")
-    customer_rows = db.execute("SELECT id, phone, full_name FROM customers").fetchall()
-    customer_map = {(row["phone"], row["full_name"]): int(row["id"]) for row in customer_rows}
+def _next_id(db: sqlite3.Connection, table: str) -> int:
+    # AUTOINCREMENT never reuses ids of deleted rows, so honour sqlite_sequence too.
+    row = db.execute(
+        f"""
+        SELECT MAX(
+          COALESCE((SELECT seq FROM sqlite_sequence WHERE name = ?), 0),
+          COALESCE((SELECT MAX(id) FROM {table}), 0)
+        ) + 1 AS id
+        """,
+        (table,),
+    ).fetchone()
+    return int(row["id"])
 
-    model_rows = db.execute(
-        """
-        SELECT em.id, et.name AS type_name, em.name AS model_name
-        FROM equipment_models em
-        JOIN equipment_types et ON et.id = em.equipment_type_id
-        """
-    ).fetchall()
-    model_map = {(row["type_name"], row["model_name"]): int(row["id"]) for row in model_rows}
-
-    for row in read_csv_rows(import_dir / "tickets.csv"):
-        request_number = (row.get("request_number") or "").strip()
-        created_at = (row.get("created_at") or "").strip()
-        customer_full_name = (row.get("customer_full_name") or "").strip()
-        customer_phone = (row.get("customer_phone") or "").strip()
-        equipment_type_name = (row.get("equipment_type_name") or "").strip()
-        equipment_model_name = (row.get("equipment_model_name") or "").strip()
-        problem_description = (row.get("problem_description") or "").strip()
-        fault_type_name = (row.get("fault_type_name") or "").strip()
-        status_code = (row.get("status_code") or "").strip()
-        opened_by_username = (row.get("opened_by_username") or "").strip()
-        assigned_specialist_username = (row.get("assigned_specialist_username") or "").strip()
-        completed_at = (row.get("completed_at") or "").strip() or None
-
-        if not request_number or not created_at:
+
+class _Dimensions:
+    """Key -> id maps shared by the importers.
+
+    Each map is read from the DB on first use and then kept in sync with the rows
+    the importers insert, so resolving a key never needs a follow-up SELECT.
+    """
+
+    def __init__(self, db: sqlite3.Connection) -> None:
+        self.db = db
+
+    @cached_property
+    def roles(self) -> dict[str, int]:
+        return build_map(self.db, "roles", "code")
+
+    @cached_property
+    def users(self) -> dict[str, int]:
+        return build_map(self.db, "users", "username")
+
+    @cached_property
+    def statuses(self) -> dict[str, int]:
+        return build_map(self.db, "ticket_statuses", "code")
+
+    @cached_property
+    def equipment_types(self) -> dict[str, int]:
+        return build_map(self.db, "equipment_types", "name")
+
+    @cached_property
+    def fault_types(self) -> dict[str, int]:
+        return build_map(self.db, "fault_types", "name")
+
+    @cached_property
+    def parts(self) -> dict[str, int]:
+        return build_map(self.db, "parts", "name")
+
+    @cached_property
+    def tickets(self) -> dict[str, int]:
+        return build_map(self.db, "tickets", "request_number")
+
+    @cached_property
+    def customers(self) -> dict[tuple[str, str], int]:
+        rows = self.db.execute("SELECT id, phone, full_name FROM customers").fetchall()
+        return {(row["phone"], row["full_name"]): int(row["id"]) for row in rows}
+
+    @cached_property
+    def models(self) -> dict[tuple[str, str], int]:
+        rows = self.db.execute(
+            """
+            SELECT em.id, et.name AS type_name, em.name AS model_name
+            FROM equipment_models em
+            JOIN equipment_types et ON et.id = em.equipment_type_id
+            """
+        ).fetchall()
+        return {(row["type_name"], row["model_name"]): int(row["id"]) for row in rows}
+
+    @cached_property
+    def _ticket_ids(self) -> Iterator[int]:
+        return count(_next_id(self.db, "tickets"))
+
+    def forget(self, name: str) -> None:
+        """Drop a cached map after its table was bulk-written."""
+        self.__dict__.pop(name, None)
+
+    def insert(self, sql: str, params: tuple) -> int:
+        return int(self.db.execute(f"{sql} RETURNING id", params).fetchone()["id"])
+
+    def equipment_type_id(self, name: str) -> int:
+        if name not in self.equipment_types:
+            self.equipment_types[name] = self.insert("INSERT INTO equipment_types (name) VALUES (?)", (name,))
+        return self.equipment_types[name]
+
+    def model_id(self, type_name: str, model_name: str, manufacturer: str | None = None) -> int:
+        key = (type_name, model_name)
+        if key not in self.models:
+            self.models[key] = self.insert(
+                "INSERT INTO equipment_models (equipment_type_id, name, manufacturer) VALUES (?, ?, ?)",
+                (self.equipment_type_id(type_name), model_name, manufacturer),
+            )
+        return self.models[key]
+
+    def customer_id(self, full_name: str, phone: str, created_at: str) -> int:
+        key = (phone, full_name)
+        if key not in self.customers:
+            self.customers[key] = self.insert(
+                "INSERT INTO customers (full_name, phone, created_at) VALUES (?, ?, ?)",
+                (full_name, phone, created_at),
+            )
+        return self.customers[key]
+
+    def part_id(self, name: str) -> int:
+        if name not in self.parts:
+            self.parts[name] = self.insert("INSERT INTO parts (name) VALUES (?)", (name,))
+        return self.parts[name]
+
+    def add_ticket(self, request_number: str) -> int:
+        # Ticket ids are assigned here so a whole batch (and its history rows)
+        # can go through executemany without reading the ids back.
+        ticket_id = next(self._ticket_ids)
+        self.tickets[request_number] = ticket_id
+        return ticket_id
+
+
+def _field(row: dict[str, str], name: str) -> str:
+    return (row.get(name) or "").strip()
+
+
+def _parse_role(row: dict[str, str]) -> tuple:
+    code = _field(row, "code")
+    name = _field(row, "name")
+    if not code or not name:
+        raise RowRejected("missing code or name")
+    return (code, name)
+
+
+def _parse_user(row: dict[str, str]) -> tuple:
+    username = _field(row, "username")
+    password = row.get("password") or ""
+    full_name = _field(row, "full_name")
+    role_code = _field(row, "role_code")
+    is_active = 1 if (row.get("is_active") or "1").strip() in TRUE_VALUES else 0
+    if not username or not password or not full_name:
+        raise RowRejected("missing username, password or full_name")
+    return (username, password, full_name, role_code, is_active)
+
+
+def _parse_ticket_status(row: dict[str, str]) -> tuple:
+    code = _field(row, "code")
+    name = _field(row, "name")
+    is_final = 1 if (row.get("is_final") or "0").strip() in TRUE_VALUES else 0
+    if not code or not name:
+        raise RowRejected("missing code or name")
+    return (code, name, is_final)
+
+
+def _parse_name(row: dict[str, str]) -> tuple:
+    name = _field(row, "name")
+    if not name:
+        raise RowRejected("missing name")
+    return (name,)
+
+
+def _parse_equipment_model(row: dict[str, str]) -> tuple:
+    type_name = _field(row, "equipment_type_name")
+    name = _field(row, "name")
+    manufacturer = _field(row, "manufacturer") or None
+    if not type_name or not name:
+        raise RowRejected("missing equipment_type_name or name")
+    return (type_name, name, manufacturer)
+
+
+def _parse_customer(row: dict[str, str]) -> tuple:
+    full_name = _field(row, "full_name")
+    phone = _field(row, "phone")
+    if not full_name or not phone:
+        raise RowRejected("missing full_name or phone")
+    return (full_name, phone)
+
+
+def _parse_ticket(row: dict[str, str]) -> tuple:
+    request_number = _field(row, "request_number")
+    created_at = _field(row, "created_at")
+    customer_full_name = _field(row, "customer_full_name")
+    customer_phone = _field(row, "customer_phone")
+    equipment_type_name = _field(row, "equipment_type_name")
+    equipment_model_name = _field(row, "equipment_model_name")
+    problem_description = _field(row, "problem_description")
+
+    if not request_number or not created_at:
+        raise RowRejected("missing request_number or created_at")
+    if not customer_full_name or not customer_phone:
+        raise RowRejected("missing customer")
+    if not equipment_type_name or not equipment_model_name:
+        raise RowRejected("missing equipment type or model")
+    if not problem_description:
+        raise RowRejected("missing problem_description")
+
+    return (
+        request_number,
+        created_at,
+        customer_full_name,
+        customer_phone,
+        equipment_type_name,
+        equipment_model_name,
+        problem_description,
+        _field(row, "fault_type_name"),
+        _field(row, "status_code"),
+        _field(row, "opened_by_username"),
+        _field(row, "assigned_specialist_username"),
+        _field(row, "completed_at") or None,
+    )
+
+
+def _parse_ticket_comment(row: dict[str, str]) -> tuple:
+    created_at = _field(row, "created_at")
+    body = _field(row, "body")
+    if not created_at or not body:
+        raise RowRejected("missing created_at or body")
+    return (_field(row, "request_number"), _field(row, "username"), created_at, body)
+
+
+def _parse_ticket_part(row: dict[str, str]) -> tuple:
+    part_name = _field(row, "part_name")
+    created_at = _field(row, "created_at")
+    if not part_name:
+        raise RowRejected("missing part_name")
+    if not created_at:
+        raise RowRejected("missing created_at")
+    try:
+        quantity = int(_field(row, "quantity"))
+    except ValueError:
+        raise RowRejected("invalid quantity") from None
+    if quantity <= 0:
+        raise RowRejected("invalid quantity")
+    return (_field(row, "request_number"), part_name, quantity, _field(row, "created_by_username"), created_at)
+
+
+def _insert_batch(db: sqlite3.Connection, sql: str, rows: list[tuple], stats: FileStats) -> None:
+    inserted = db.executemany(sql, rows).rowcount if rows else 0
+    stats.loaded += inserted
+    if inserted < len(rows):
+        stats.reject("already exists", len(rows) - inserted)
+
+
+def _write_reference(dims: _Dimensions, batch: list[tuple], stats: FileStats, *, sql: str, map_name: str) -> None:
+    _insert_batch(dims.db, sql, batch, stats)
+    dims.forget(map_name)
+
+
+def _write_users(dims: _Dimensions, batch: list[tuple], stats: FileStats) -> None:
+    for username, password, full_name, role_code, is_active in batch:
+        if role_code not in dims.roles:
+            stats.reject("unknown role_code")
+            continue
+        if username in dims.users:
+            stats.reject("already exists")
             continue
-        if not customer_full_name or not customer_phone:
+        # Password hashing dominates here, so one INSERT per new account is free.
+        dims.users[username] = dims.insert(
+            "INSERT INTO users (username, password_hash, full_name, role_id, is_active) VALUES (?, ?, ?, ?, ?)",
+            (username, generate_password_hash(password), full_name, dims.roles[role_code], is_active),
+        )
+        stats.loaded += 1
+
+
+def _write_equipment_models(dims: _Dimensions, batch: list[tuple], stats: FileStats) -> None:
+    for type_name, name, manufacturer in batch:
+        if (type_name, name) in dims.models:
+            stats.reject("already exists")
             continue
-        if not equipment_type_name or not equipment_model_name:
+        dims.model_id(type_name, name, manufacturer)
+        stats.loaded += 1
+
+
+def _write_tickets(dims: _Dimensions, batch: list[tuple], stats: FileStats) -> None:
+    tickets = []
+    history = []
+    for (
+        request_number,
+        created_at,
+        customer_full_name,
+        customer_phone,
+        equipment_type_name,
+        equipment_model_name,
+        problem_description,
+        fault_type_name,
+        status_code,
+        opened_by_username,
+        assigned_specialist_username,
+        completed_at,
+    ) in batch:
+        status_id = dims.statuses.get(status_code)
+        opened_by_id = dims.users.get(opened_by_username)
+        if status_id is None:
+            stats.reject("unknown status_code")
             continue
-        if not problem_description or status_code not in status_map:
+        if opened_by_id is None:
+            stats.reject("unknown opened_by_username")
             continue
-        if opened_by_username not in user_map:
+        if request_number in dims.tickets:
+            stats.reject("already exists")
             continue
 
-        customer_key = (customer_phone, customer_full_name)
-        if customer_key not in customer_map:
-            db.execute(
-                "INSERT INTO customers (full_name, phone, created_at) VALUES (?, ?, ?)",
-                (customer_full_name, customer_phone, created_at),
-            )
-            new_id = db.execute("SELECT id FROM customers WHERE phone = ? AND full_name = ?", customer_key).fetchone()
-            customer_map[customer_key] = int(new_id["id"])
-
-        model_key = (equipment_type_name, equipment_model_name)
-        if model_key not in model_map:
-            db.execute("INSERT OR IGNORE INTO equipment_types (name) VALUES (?)", (equipment_type_name,))
-            type_id = db.execute("SELECT id FROM equipment_types WHERE name = ?", (equipment_type_name,)).fetchone()
-            if type_id is None:
-                continue
-            db.execute(
-                "INSERT OR IGNORE INTO equipment_models (equipment_type_id, name) VALUES (?, ?)",
-                (int(type_id["id"]), equipment_model_name),
-            )
-            model_id = db.execute(
-                """
-                SELECT em.id
-                FROM equipment_models em
-                JOIN equipment_types et ON et.id = em.equipment_type_id
-                WHERE et.name = ? AND em.name = ?
-                """,
-                model_key,
-            ).fetchone()
-            if model_id is None:
-                continue
-            model_map[model_key] = int(model_id["id"])
-
-        fault_type_id = fault_map.get(fault_type_name) if fault_type_name else None
-        status_id = status_map[status_code]
-        opened_by_id = user_map[opened_by_username]
-        assigned_id = user_map.get(assigned_specialist_username) if assigned_specialist_username else None
-
-        db.execute(
-            """
-            INSERT OR IGNORE INTO tickets (
-              request_number,
-              created_at,
-              customer_id,
-              equipment_model_id,
-              problem_description,
-              fault_type_id,
-              status_id,
-              opened_by_user_id,
-              assigned_specialist_user_id,
-              completed_at,
-              updated_at
-            )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
+        ticket_id = dims.add_ticket(request_number)
+        tickets.append(
             (
+                ticket_id,
                 request_number,
                 created_at,
-                customer_map[customer_key],
-                model_map[model_key],
+                dims.customer_id(customer_full_name, customer_phone, created_at),
+                dims.model_id(equipment_type_name, equipment_model_name),
                 problem_description,
-                fault_type_id,
+                dims.fault_types.get(fault_type_name),
                 status_id,
                 opened_by_id,
-                assigned_id,
+                dims.users.get(assigned_specialist_username),
                 completed_at,
                 completed_at or created_at,
-            ),
-        )
-
-        ticket_row = db.execute("SELECT id FROM tickets WHERE request_number = ?", (request_number,)).fetchone()
-        if ticket_row is None:
-            continue
-        ticket_id = int(ticket_row["id"])
-
-        db.execute(
-            """
-            INSERT INTO ticket_status_history (
-              ticket_id,
-              old_status_id,
-              new_status_id,
-              changed_by_user_id,
-              changed_at,
-              comment
             )
-            VALUES (?, ?, ?, ?, ?, ?)
-            """,
-            (ticket_id, None, status_id, opened_by_id, created_at, "Создание заявки"),
         )
-
+        history.append((ticket_id, None, status_id, opened_by_id, created_at, "Создание заявки"))
         if completed_at and status_code == "completed":
-            db.execute(
-                """
-                INSERT INTO ticket_status_history (
-                  ticket_id,
-                  old_status_id,
-                  new_status_id,
-                  changed_by_user_id,
-                  changed_at,
-                  comment
-                )
-                VALUES (?, ?, ?, ?, ?, ?)
-                """,
-                (ticket_id, None, status_id, opened_by_id, completed_at, "Завершение заявки"),
-            )
+            history.append((ticket_id, None, status_id, opened_by_id, completed_at, "Завершение заявки"))
 
-
-def _import_ticket_comments(db: sqlite3.Connection, import_dir: Path) -> None:
-    user_map = build_map(db, "users", "username")
-    ticket_rows = db.execute("SELECT id, request_number FROM tickets").fetchall()
-    ticket_map = {row["request_number"]: int(row["id"]) for row in ticket_rows}
-
-    for row in read_csv_rows(import_dir / "ticket_comments.csv"):
-        request_number = (row.get("request_number") or "").strip()
-        username = (row.get("username") or "").strip()
-        created_at = (row.get("created_at") or "").strip()
-        body = (row.get("body") or "").strip()
-
-        if request_number not in ticket_map or username not in user_map:
+    dims.db.executemany(
+        """
+        INSERT INTO tickets (
+          id,
+          request_number,
+          created_at,
+          customer_id,
+          equipment_model_id,
+          problem_description,
+          fault_type_id,
+          status_id,
+          opened_by_user_id,
+          assigned_specialist_user_id,
+          completed_at,
+          updated_at
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        tickets,
+    )
+    dims.db.executemany(
+        """
+        INSERT INTO ticket_status_history (
+          ticket_id,
+          old_status_id,
+          new_status_id,
+          changed_by_user_id,
+          changed_at,
+          comment
+        )
+        VALUES (?, ?, ?, ?, ?, ?)
+        """,
+        history,
+    )
+    stats.loaded += len(tickets)
+
+
+def _write_ticket_comments(dims: _Dimensions, batch: list[tuple], stats: FileStats) -> None:
+    rows = []
+    for request_number, username, created_at, body in batch:
+        ticket_id = dims.tickets.get(request_number)
+        user_id = dims.users.get(username)
+        if ticket_id is None:
+            stats.reject("unknown request_number")
+            continue
+        if user_id is None:
+            stats.reject("unknown username")
             continue
-        if not created_at or not body:
+        rows.append((ticket_id, user_id, body, created_at))
+
+    _insert_batch(
+        dims.db,
+        "INSERT OR IGNORE INTO ticket_comments (ticket_id, user_id, body, created_at) VALUES (?, ?, ?, ?)",
+        rows,
+        stats,
+    )
+
+
+def _write_ticket_parts(dims: _Dimensions, batch: list[tuple], stats: FileStats) -> None:
+    rows = []
+    for request_number, part_name, quantity, created_by_username, created_at in batch:
+        ticket_id = dims.tickets.get(request_number)
+        user_id = dims.users.get(created_by_username)
+        if ticket_id is None:
+            stats.reject("unknown request_number")
             continue
+        if user_id is None:
+            stats.reject("unknown created_by_username")
+            continue
+        rows.append((ticket_id, dims.part_id(part_name), quantity, user_id, created_at))
 
-        db.execute(
-            """
-            INSERT INTO ticket_comments (ticket_id, user_id, body, created_at)
-            VALUES (?, ?, ?, ?)
-            """,
-            (ticket_map[request_number], user_map[username], body, created_at),
+    _insert_batch(
+        dims.db,
+        """
+        INSERT OR IGNORE INTO ticket_parts (
+          ticket_id,
+          part_id,
+          quantity,
+          created_by_user_id,
+          created_at
         )
+        VALUES (?, ?, ?, ?, ?)
+        """,
+        rows,
+        stats,
+    )
+
+
+Parser = Callable[[dict[str, str]], tuple]
+Writer = Callable[[_Dimensions, list[tuple], FileStats], None]
+
+# Files in dependency order: every writer resolves keys against maps of the files before it.
+IMPORT_FILES: tuple[tuple[str, Parser, Writer], ...] = (
+    (
+        "roles.csv",
+        _parse_role,
+        partial(_write_reference, sql="INSERT OR IGNORE INTO roles (code, name) VALUES (?, ?)", map_name="roles"),
+    ),
+    ("users.csv", _parse_user, _write_users),
+    (
+        "ticket_statuses.csv",
+        _parse_ticket_status,
+        partial(
+            _write_reference,
+            sql="INSERT OR IGNORE INTO ticket_statuses (code, name, is_final) VALUES (?, ?, ?)",
+            map_name="statuses",
+        ),
+    ),
+    (
+        "equipment_types.csv",
+        _parse_name,
+        partial(
+            _write_reference,
+            sql="INSERT OR IGNORE INTO equipment_types (name) VALUES (?)",
+            map_name="equipment_types",
+        ),
+    ),
+    ("equipment_models.csv", _parse_equipment_model, _write_equipment_models),
+    (
+        "fault_types.csv",
+        _parse_name,
+        partial(_write_reference, sql="INSERT OR IGNORE INTO fault_types (name) VALUES (?)", map_name="fault_types"),
+    ),
+    (
+        "customers.csv",
+        _parse_customer,
+        partial(
+            _write_reference,
+            sql="INSERT OR IGNORE INTO customers (full_name, phone) VALUES (?, ?)",
+            map_name="customers",
+        ),
+    ),
+    (
+        "parts.csv",
+        _parse_name,
+        partial(_write_reference, sql="INSERT OR IGNORE INTO parts (name) VALUES (?)", map_name="parts"),
+    ),
+    ("tickets.csv", _parse_ticket, _write_tickets),
+    ("ticket_comments.csv", _parse_ticket_comment, _write_ticket_comments),
+    ("ticket_parts.csv", _parse_ticket_part, _write_ticket_parts),
+)
+
+
+# Large exports whose parsing is worth shipping to worker processes.
+PARALLEL_FILES = frozenset({"tickets.csv", "ticket_comments.csv", "ticket_parts.csv"})
+# Workers get byte ranges of about batch_size rows of a typical tickets.csv.
+RANGE_BYTES_PER_ROW = 256
+
+
+def _batched(items: Iterable[T], size: int) -> Iterator[list[T]]:
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _parse_rows(parse: Parser, rows: Iterable[dict[str, str]]) -> tuple[list[tuple], Counter[str], int]:
+    parsed = []
+    rejected: Counter[str] = Counter()
+    seen = 0
+    for seen, row in enumerate(rows, start=1):
+        try:
+            parsed.append(parse(row))
+        except RowRejected as exc:
+            rejected[str(exc)] += 1
+    return parsed, rejected, seen
+
+
+def _parse_range(parse: Parser, csv_range: CsvRange) -> tuple[list[tuple], Counter[str], int]:
+    # Runs in a pool worker: reading, decoding and csv parsing happen here too, so
+    # only the range bounds go in and only the normalized tuples come back.
+    return _parse_rows(parse, csv_range.rows())
+
+
+def _map_in_order(
+    pool: Executor, fn: Callable[[T], R], items: Iterable[T], *, window: int
+) -> Iterator[tuple[T, R]]:
+    # Executor.map submits the whole input up front; keeping at most `window` items
+    # in flight bounds memory by the chunk size, not by the file size.
+    pending: deque[tuple[T, Future[R]]] = deque()
+    for item in items:
+        pending.append((item, pool.submit(fn, item)))
+        if len(pending) >= window:
+            done, future = pending.popleft()
+            yield done, future.result()
+    while pending:
+        done, future = pending.popleft()
+        yield done, future.result()
+
+
+def _parsed_batches(
+    stream: CsvStream,
+    parse: Parser,
+    stats: FileStats,
+    batch_size: int,
+    pool: Executor | None = None,
+    window: int = 1,
+) -> Iterator[tuple[list[tuple], Checkpoint]]:
+    if pool is None:
+        for rows in _batched(stream, batch_size):
+            parsed, rejected, _ = _parse_rows(parse, rows)
+            stats.rejected.update(rejected)
+            yield parsed, stream.checkpoint()
+        return
 
+    ranges = stream.ranges(batch_size * RANGE_BYTES_PER_ROW)
+    for csv_range, (parsed, rejected, rows) in _map_in_order(pool, partial(_parse_range, parse), ranges, window=window):
+        stats.rejected.update(rejected)
+        stream.row_offset += rows
+        yield parsed, Checkpoint(csv_range.end, stream.row_offset, csv_range.prefix_sha256)
+
+
+def _import_file(
+    dims: _Dimensions,
+    path: Path,
+    parse: Parser,
+    write: Writer,
+    batch_size: int,
+    pool: Executor | None = None,
+    window: int = 1,
+) -> FileStats:
+    stats = FileStats(path.name)
+    started = time.perf_counter()
+    stream = CsvStream(path, load_checkpoint(dims.db, path.name))
+    stats.resumed_at = stream.start.row_offset
+    stats.skipped = bool(stream.start.byte_offset) and stream.exhausted
+    for parsed, checkpoint in _parsed_batches(stream, parse, stats, batch_size, pool, window):
+        try:
+            for batch in _batched(parsed, batch_size):
+                write(dims, batch, stats)
+            _save_checkpoint(dims.db, path.name, checkpoint)
+            dims.db.commit()
+        except Exception:
+            dims.db.rollback()
+            raise
+    stats.seconds = time.perf_counter() - started
+    return stats
+
+
+def import_data(
+    db_path: Path,
+    import_dir: Path,
+    *,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    workers: int = 1,
+) -> list[FileStats]:
+    """Stream every CSV into the DB; returns per-file statistics.
+
+    Every batch is committed together with the file's checkpoint in
+    ``import_checkpoints``. A re-run therefore continues after the last committed
+    batch, skips files that have not changed, and reads only the appended tail of
+    files that grew; a file whose already imported part changed is read again from
+    the top; rows imported before are then rejected as ``already exists``.
+
+    With ``workers > 1`` this process only cuts the files in ``PARALLEL_FILES`` into
+    record-aligned byte ranges; pool workers read, decode, parse and validate them.
+    This process stays the only writer and consumes ranges in file order, so the
+    resulting ids are the same as with a single worker.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be positive")
+    if workers < 1:
+        raise ValueError("workers must be positive")
+
+    with ExitStack() as stack:
+        pool = None
+        if workers > 1:
+            pool = stack.enter_context(
+                ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            )
+        db = stack.enter_context(closing(connect(db_path)))
+        db.execute(CHECKPOINTS_SQL)
+        _ensure_comment_key(db)
+        dims = _Dimensions(db)
+        return [
+            _import_file(
+                dims,
+                import_dir / name,
+                parse,
+                write,
+                batch_size,
+                pool if name in PARALLEL_FILES else None,
+                window=workers * 2,
+            )
+            for name, parse, write in IMPORT_FILES
+        ]
 
-def _import_ticket_parts(db: sqlite3.Connection, import_dir: Path) -> None:
-    user_map = build_map(db, "users", "username")
-    part_map = build_map(db, "parts", "name")
-    ticket_rows = db.execute("SELECT id, request_number FROM tickets").fetchall()
-    ticket_map = {row["request_number"]: int(row["id"]) for row in ticket_rows}
-
-    for row in read_csv_rows(import_dir / "ticket_parts.csv"):
-        request_number = (row.get("request_number") or "").strip()
-        part_name = (row.get("part_name") or "").strip()
-        quantity_raw = (row.get("quantity") or "").strip()
-        created_by_username = (row.get("created_by_username") or "").strip()
-        created_at = (row.get("created_at") or "").strip()
 
-        if request_number not in ticket_map:
+def print_import_stats(results: list[FileStats]) -> None:
+    for stats in results:
+        if stats.skipped:
+            print(f"{stats.name:<22} unchanged, skipped")
             continue
-        if not part_name or created_by_username not in user_map:
-            continue
-        if not created_at:
-            continue
-        try:
-            quantity = int(quantity_raw)
-        except ValueError:
+        if not stats.rows:
             continue
-        if quantity <= 0:
-            continue
-
-        if part_name not in part_map:
-            db.execute("INSERT OR IGNORE INTO parts (name) VALUES (?)", (part_name,))
-            part_map = build_map(db, "parts", "name")
-
-        db.execute(
-            """
-            INSERT OR IGNORE INTO ticket_parts (
-              ticket_id,
-              part_id,
-              quantity,
-              created_by_user_id,
-              created_at
-            )
-            VALUES (?, ?, ?, ?, ?)
-            """,
-            (ticket_map[request_number], part_map[part_name], quantity, user_map[created_by_username], created_at),
+        if stats.resumed_at:
+            print(f"{stats.name:<22} resumed after row {stats.resumed_at}")
+        print(
+            f"{stats.name:<22} loaded {stats.loaded:>8}  rejected {sum(stats.rejected.values()):>6}"
+            f"  {stats.rows_per_second:>10.0f} rows/s"
         )
+        for reason, hits in stats.rejected.most_common():
+            print(f"    {reason}: {hits}")
 
 
 def write_reports(db_path: Path, date_from: str, date_to: str, output_dir: Path) -> None:
@@ -439,9 +950,13 @@ def parse_args() -> argparse.Namespace:
 
     p_import = sub.add_parser("import", help="Import CSV data from task2/import/")
     p_import.add_argument("--path", default=str(IMPORT_DIR), help="Path to import directory")
+    p_import.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Rows per executemany batch")
+    p_import.add_argument("--workers", type=int, default=1, help="Processes parsing tickets/comments/parts CSV")
 
     p_recreate = sub.add_parser("recreate", help="Reset DB and import CSV data")
     p_recreate.add_argument("--path", default=str(IMPORT_DIR), help="Path to import directory")
+    p_recreate.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Rows per executemany batch")
+    p_recreate.add_argument("--workers", type=int, default=1, help="Processes parsing tickets/comments/parts CSV")
 
     p_reports = sub.add_parser("reports", help="Run SQL queries and write Markdown reports")
     p_reports.add_argument("--date-from", default="1900-01-01 00:00:00", help="Period start (ISO)")
@@ -473,7 +988,7 @@ def main() -> None:
 
     if args.cmd == "import":
         import_path = Path(args.path)
-        import_data(db_path, import_path)
+        print_import_stats(import_data(db_path, import_path, batch_size=args.batch_size, workers=args.workers))
         print(f"OK: Data imported from: {import_path}")
         return
 
@@ -482,7 +997,7 @@ def main() -> None:
             db_path.unlink()
         init_db(db_path)
         import_path = Path(args.path)
-        import_data(db_path, import_path)
+        print_import_stats(import_data(db_path, import_path, batch_size=args.batch_size, workers=args.workers))
         print(f"OK: DB recreated and imported from: {import_path}")
         return
 